@@ -1,7 +1,8 @@
 from dotenv import load_dotenv
 
 from livekit import agents
-from livekit.agents import AgentSession, Agent, RoomInputOptions, ConversationItemAddedEvent
+from livekit.agents import AgentSession, Agent, RoomInputOptions, ConversationItemAddedEvent, MetricsCollectedEvent, metrics
+from livekit.agents import AgentStateChangedEvent, FunctionToolsExecutedEvent, UserInputTranscribedEvent
 from livekit.plugins import (
     openai,
     noise_cancellation,
@@ -20,16 +21,29 @@ import logging
 import re
 import asyncio
 import time
+import numpy as np
 from datetime import datetime
 from prompts import AGENT_INSTRUCTIONS
-from local_mcp_server import get_local_tools, call_tool
+from tool_registry import tool_registry
+from tool_cache import tool_cache
 from conversation_logger import ConversationLogger
 from users_manager import UsersManager
 from professional_conversation_manager import ProfessionalConversationManager
 from vision_processor import VisionProcessor
+from vision_pipeline_manager import VisionPipelineManager, VisionPipeline
+from vision_rate_limiter import vision_rate_limiter
 
 # Import new visual context system
 from visual_context_models import VisualContextStore
+from prompt_cache import PromptCacheStats
+from prompt_sections import PROMPT_SECTION_RETRIEVAL, PromptSectionIndex
+from chat_history_manager import create_history_manager
+from greetings import GENERAL_GREETING, build_greeting, known_greetings
+from phrase_audio_cache import PhraseAudioCache
+from answer_cache import ANSWER_CACHE_ENABLED, answer_cache
+from speculative_llm import SPECULATIVE_LLM, SpeculativeGenerator
+from knowledge_base_manager import kb_manager
+from kb_watcher import kb_watcher
 from visual_aware_agent import VisualAwareAgent
 
 # Import workflow analyzer for performance tracking
@@ -101,6 +115,16 @@ conversation_context = {
     'last_assistant_msg': None
 }
 
+
+# External MCP servers whose tools are added to the agent (comma-separated SSE URLs)
+MCP_SERVER_URLS = [url.strip() for url in os.getenv("MCP_SERVER_URLS", "").split(",") if url.strip()]
+
+
+def prewarm(proc: agents.JobProcess):
+    """Runs once per worker process before it takes jobs"""
+    tool_registry.warm()
+
+
 async def entrypoint(ctx: agents.JobContext):
     # Start workflow tracking
     workflow_analyzer.start_step("Connection Initialization")
@@ -122,7 +146,7 @@ async def entrypoint(ctx: agents.JobContext):
     print(f"اللغة: العربية - Language: Arabic")
 
     # Get local tools
-    local_tools = get_local_tools()
+    local_tools = tool_registry.definitions
     print(f"\nتحميل {len(local_tools)} أداة محلية - Loading {len(local_tools)} local tools...")
     for tool in local_tools:
         print(f"   {tool['name']}: {tool['description'][:50]}...")
@@ -225,6 +249,7 @@ async def entrypoint(ctx: agents.JobContext):
                     sync_alignment=True,                # Enable word-level timestamps
                 )
                 session_config["tts"] = tts
+                tts_voice, tts_model = elevenlabs_voice_id, "eleven_multilingual_v2"
 
                 print("✅ ElevenLabs TTS configured successfully!")
                 print(f"   Model: eleven_multilingual_v2")
@@ -238,14 +263,20 @@ async def entrypoint(ctx: agents.JobContext):
             print(f"⚠️  ElevenLabs failed: {e}")
             print("   Falling back to OpenAI TTS...")
             session_config["tts"] = openai.TTS(voice="onyx", speed=1.0)
+            tts_voice, tts_model = "onyx", "openai-tts"
             print("✅ OpenAI TTS configured (fallback: onyx)")
     else:
         print("⚠️  ElevenLabs plugin not available, using OpenAI TTS...")
         session_config["tts"] = openai.TTS(voice="onyx", speed=1.0)
+        tts_voice, tts_model = "onyx", "openai-tts"
         print("✅ OpenAI TTS configured (voice: onyx)")
 
+    # Greetings are pre-rendered with this voice and played without a TTS round trip
+    phrase_cache = PhraseAudioCache(session_config["tts"], voice=tts_voice, model=tts_model)
+
     # Arabic STT with VAD
-    session_config["stt"] = openai.STT(language="ar")
+    # Speculative LLM needs interim transcripts, which only the streaming (realtime) STT gives
+    session_config["stt"] = openai.STT(language="ar", use_realtime=SPECULATIVE_LLM)
     session_config["vad"] = silero.VAD.load()
     print("التعرف على الكلام العربي جاهز - Arabic STT ready")
     print("VAD (Voice Activity Detection) مفعل - VAD enabled")
@@ -255,87 +286,77 @@ async def entrypoint(ctx: agents.JobContext):
 
     session = AgentSession(**session_config)
 
-    # Create visual context store using Pydantic
+    # Create visual context store (identity / scene / emotion channels)
     visual_store = VisualContextStore(
         enabled=True,
         max_age_seconds=15.0  # Context expires after 15 seconds
     )
-    print("✅ Visual context store created (Pydantic-based)")
+    print("✅ Visual context store created")
 
     # Create Visual-Aware Agent (injects context before each LLM call)
+    # Optional: send only the always-on core and add topic sections per turn
+    section_index = PromptSectionIndex(AGENT_INSTRUCTIONS) if PROMPT_SECTION_RETRIEVAL else None
     agent = VisualAwareAgent(
-        instructions=AGENT_INSTRUCTIONS,
-        visual_store=visual_store
+        instructions=section_index.core_text if section_index else AGENT_INSTRUCTIONS,
+        visual_store=visual_store,
+        section_index=section_index,
+        # Long calls: last N turns verbatim, older ones folded into a rolling summary
+        history_manager=create_history_manager(fact_extractor=extract_user_info),
+        # Repeated FAQ questions are answered from the answer cache without an LLM call
+        answer_cache=answer_cache if ANSWER_CACHE_ENABLED else None
     )
     print("تم إنشاء الوكيل - Visual-Aware Agent created")
     print("   Uses llm_node override for automatic context injection")
+    print(f"   Static prompt prefix: {agent.prefix_guard.tokens} tokens (fingerprint {agent.prefix_guard.fingerprint})")
+    if agent.history_manager:
+        print(f"   Chat history: last {agent.history_manager.keep_turns} turns verbatim, older turns summarized")
+    if section_index:
+        print(f"   Prompt sections: core {section_index.core_tokens} of {section_index.full_tokens} tokens, rest per turn")
+    if SPECULATIVE_LLM:
+        agent.speculation = SpeculativeGenerator(agent, session_config["llm"])
+        print(f"   Speculative LLM: starts on interims stable for {agent.speculation.stable_ms:.0f}ms")
+    # Cached answers and tool results are dropped whenever the knowledge base content changes
+    # (nothing is polled if neither cache is in use)
+    if agent.answer_cache:
+        kb_watcher.subscribe(answer_cache.on_knowledge_base_change)
+    if any(spec.cache_ttl for spec in tool_registry.specs.values()):
+        kb_watcher.subscribe(tool_cache.invalidate)
+    kb_watcher.start(kb_manager.content_fingerprint)
+    if agent.answer_cache:
+        print(f"   Answer cache: {answer_cache.get_stats()['entries']} cached answers (threshold {answer_cache.threshold})")
 
     # Register tools with the agent
     print("\nتسجيل الأدوات مع الوكيل - Registering tools...")
 
-    from livekit.agents.llm import function_tool
-    import json
-    import inspect
-
-    # Create decorated tool functions
-    tools = []
-    for tool in local_tools:
-        tool_name = tool["name"]
-        tool_desc = tool["description"]
-        tool_schema = tool["inputSchema"]
-
-        # Build function parameters from schema
-        params = []
-        annotations = {}
-        schema_props = tool_schema.get("properties", {})
-        schema_required = set(tool_schema.get("required", []))
-        type_map = {
-            "string": str, "integer": int, "number": float,
-            "boolean": bool, "array": list, "object": dict,
-        }
-
-        for p_name, p_details in schema_props.items():
-            json_type = p_details.get("type", "string")
-            py_type = type_map.get(json_type, str)
-            annotations[p_name] = py_type
-
-            default = inspect.Parameter.empty if p_name in schema_required else None
-            params.append(inspect.Parameter(
-                name=p_name,
-                kind=inspect.Parameter.KEYWORD_ONLY,
-                annotation=py_type,
-                default=default
-            ))
-
-        # Create the tool function with closure
-        def make_tool_fn(name, desc, sig_params, annots):
-            async def tool_fn(**kwargs):
-                print(f"\nاستدعاء أداة: {name} - Calling tool")
-                print(f"   Parameters: {kwargs}")
-                result = call_tool(name, kwargs)
-                print(f"   Result: {result.get('success', False)}")
-                return json.dumps(result)
-
-            tool_fn.__signature__ = inspect.Signature(parameters=sig_params)
-            tool_fn.__name__ = name
-            tool_fn.__doc__ = desc
-            tool_fn.__annotations__ = {'return': str, **annots}
-
-            return tool_fn
-
-        # Create and decorate the function
-        func = make_tool_fn(tool_name, tool_desc, params, annotations)
-        decorated_func = function_tool()(func)
-        tools.append(decorated_func)
-        print(f"   {tool_name}")
+    # Built once per worker process (see tool_registry) - only the list is handed over per job
+    tools_start = time.perf_counter()
+    tools = tool_registry.agent_tools()
+    for tool in tool_registry.definitions:
+        print(f"   {tool['name']}")
 
     # Add tools to agent
     if hasattr(agent, '_tools') and isinstance(agent._tools, list):
         agent._tools.extend(tools)
-        print(f"تم تسجيل {len(tools)} أداة - Registered {len(tools)} tools!")
+        print(f"تم تسجيل {len(tools)} أداة - Registered {len(tools)} tools! ({(time.perf_counter() - tools_start) * 1000:.2f}ms)")
     else:
         print("تحذير: الوكيل لا يحتوي على _tools")
 
+    # External MCP servers (MCP_SERVER_URLS): pooled sessions, connected before the user speaks
+    if MCP_SERVER_URLS:
+        from mcp_client import mcp_session_pool
+        from mcp_client.agent_tools import MCPToolsIntegration
+
+        ctx.add_shutdown_callback(mcp_session_pool.close)
+        mcp_servers = []
+        for url in MCP_SERVER_URLS:
+            try:
+                mcp_servers.append(await mcp_session_pool.sse({"url": url}))
+            except Exception as e:
+                print(f"⚠️  MCP server {url} not connected: {e}")
+        mcp_tools = await MCPToolsIntegration.prepare_dynamic_tools(mcp_servers, auto_connect=False)
+        agent._tools.extend(mcp_tools)
+        print(f"   MCP: {len(mcp_tools)} tools from {len(mcp_servers)}/{len(MCP_SERVER_URLS)} servers")
+
     print(f"\nحفظ المحادثات مفعّل - Conversation logging ENABLED")
 
     # Initialize Tavus video avatar AFTER session creation
@@ -429,6 +450,40 @@ async def entrypoint(ctx: agents.JobContext):
 
         print("✅ Listening to conversation_item_added event (local buffering)")
 
+        # Per-turn LLM cost/latency - shows the effect of prompt and visual context size
+        prompt_cache_stats = PromptCacheStats()
+        # Per-turn breakdown: end of speech, STT, LLM TTFT, tools, TTS TTFB, playout
+        turn_latency = workflow_analyzer.track_turns()
+
+        @session.on("metrics_collected")
+        def on_metrics_collected(event: MetricsCollectedEvent):
+            m = event.metrics
+            if agent.speculation:
+                m = agent.speculation.session_metrics(m)  # Discarded speculative requests don't count
+                if m is None:
+                    return
+            turn_latency.on_metrics(m)
+            if isinstance(m, metrics.LLMMetrics):
+                cached_share = prompt_cache_stats.record(m)
+                print(
+                    f"📊 LLM turn: {m.prompt_tokens} input tokens "
+                    f"({m.prompt_cached_tokens} cached, {cached_share:.0%}), "
+                    f"TTFT {m.ttft * 1000:.0f}ms"
+                )
+
+        @session.on("agent_state_changed")
+        def on_agent_state_changed(event: AgentStateChangedEvent):
+            turn_latency.on_agent_state(event.new_state, event.created_at)
+
+        if agent.speculation:
+            @session.on("user_input_transcribed")
+            def on_user_input_transcribed(event: UserInputTranscribedEvent):
+                agent.speculation.on_transcript(event.transcript, event.is_final)
+
+        @session.on("function_tools_executed")
+        def on_function_tools_executed(event: FunctionToolsExecutedEvent):
+            turn_latency.on_tools_executed(len(event.function_calls))
+
         # Add shutdown callback to save everything to database
         async def save_final_conversation():
             """Save complete conversation to database when call ends"""
@@ -467,15 +522,50 @@ async def entrypoint(ctx: agents.JobContext):
                 traceback.print_exc()
 
         ctx.add_shutdown_callback(save_final_conversation)
+
+        async def report_prompt_cache():
+            prompt_cache_stats.print_report()
+
+        ctx.add_shutdown_callback(report_prompt_cache)
+
+        async def report_turn_latency():
+            turn_latency.print_report()
+            workflow_analyzer.print_turn_report()
+            tool_registry.print_metrics()
+            stats = tool_cache.get_stats()
+            print(
+                f"📦 Tool cache: {stats['hits'] + stats['stale_hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%}), {stats['refreshes']} background refreshes"
+            )
+
+        ctx.add_shutdown_callback(report_turn_latency)
+
+        if agent.answer_cache:
+            async def report_answer_cache():
+                stats = answer_cache.get_stats()
+                print(
+                    f"⚡ Answer cache: {stats['hits']}/{stats['lookups']} hits ({stats['hit_rate']:.0%}), "
+                    f"~{stats['saved_seconds']:.1f}s LLM latency saved, {stats['entries']} entries"
+                )
+
+            ctx.add_shutdown_callback(report_answer_cache)
+
+        if agent.speculation:
+            async def report_speculation():
+                agent.speculation.print_report()
+
+            ctx.add_shutdown_callback(report_speculation)
+
+        if agent.history_manager:
+            ctx.add_shutdown_callback(agent.history_manager.aclose)
         print("✅ Shutdown callback registered (professional system)")
 
-        # Initialize vision processor BEFORE session starts (for faster face detection)
-        print("\n🎥 Initializing vision processor early...")
-        vision_processor = VisionProcessor()
-        vision_task = None
+        # Vision pipelines are created per camera track once the session starts
+        print("\n🎥 Preparing vision pipelines...")
         greeted_people = set()  # Track who we've already greeted in this session
 
         # Preload InsightFace model to avoid lazy loading delay during first recognition
+        registered_names = []
         if FACE_RECOGNITION_ENABLED:
             try:
                 print("🔄 Preloading InsightFace model for faster recognition...")
@@ -483,18 +573,28 @@ async def entrypoint(ctx: agents.JobContext):
                 # Trigger lazy loading now instead of during first call
                 fr._ensure_model_loaded()
                 print("✅ InsightFace model preloaded and ready!")
+                registered_names = [person["name"] for person in fr.get_registered_people()]
             except Exception as e:
                 print(f"⚠️  InsightFace preload warning: {e}")
+
+        # Render every predictable greeting (general, VIPs, enrolled people) in the background;
+        # already-rendered ones load from disk
+        greeting_warmup = asyncio.create_task(phrase_cache.warm(known_greetings(registered_names)))
+
+        async def stop_greeting_warmup():
+            greeting_warmup.cancel()
+
+        ctx.add_shutdown_callback(stop_greeting_warmup)
         greeting_flags = {
             "initial_greeting_sent": False,  # ONE greeting per entire session - starts False (not sent yet)
             "greeting_lock": asyncio.Lock(),  # Async lock to prevent race conditions
             "first_visual_time": None,  # Track when first visual update arrived (None until first frame)
             "session_identity": ctx.room.name or f"session-{os.urandom(4).hex()}"  # Unique session ID
         }
-        print("✅ Vision processor ready - will start on first video track")
+        print("✅ Vision ready - one pipeline per camera track")
 
         # Define handle_visual_update BEFORE starting session
-        async def handle_visual_update(analysis: str, frame_bytes: bytes = None):
+        async def handle_visual_update(analysis: str, frame: np.ndarray = None, pipeline: VisionPipeline = None):
             """
             Handle visual analysis updates with face recognition
             Greets recognized ministers by name FIRST, or uses general greeting if not recognized
@@ -503,21 +603,42 @@ async def entrypoint(ctx: agents.JobContext):
             """
             nonlocal greeted_people, greeting_flags
 
+            # Recognize outside the greeting lock so camera pipelines don't queue behind each other
+            match = None
+            recognition_error = None
+            if FACE_RECOGNITION_ENABLED and frame is not None:
+                # Timed locally: several camera pipelines recognize at once, so the
+                # analyzer's shared current step can't be used here
+                recognition_start = time.perf_counter()
+                try:
+                    # Lazy load face recognizer on first use
+                    global face_recognizer
+                    if face_recognizer is None:
+                        from insightface_recognition import face_recognizer as fr
+                        face_recognizer = fr
+
+                    match = await vision_pipelines.recognize(pipeline, face_recognizer.recognize_person, frame)
+                    # Crop the next vision frame around this face (or full frame if none)
+                    pipeline.processor.set_focus_box(match.bbox)
+                    workflow_analyzer.record_step(
+                        "Face Recognition", time.perf_counter() - recognition_start,
+                        matched=match.matched if match else False
+                    )
+                except Exception as e:
+                    recognition_error = e
+                    workflow_analyzer.record_step(
+                        "Face Recognition", time.perf_counter() - recognition_start,
+                        success=False, error=str(e)
+                    )
+
             # Use async lock to prevent race conditions with greeting
             async with greeting_flags["greeting_lock"]:
-                # Try face recognition if enabled and frame provided
                 recognized_person = None
-                if FACE_RECOGNITION_ENABLED and frame_bytes:
+                if FACE_RECOGNITION_ENABLED and frame is not None:
                     try:
-                        # Lazy load face recognizer on first use
-                        global face_recognizer
-                        if face_recognizer is None:
-                            from insightface_recognition import face_recognizer as fr
-                            face_recognizer = fr
-
-                        workflow_analyzer.start_step("Face Recognition")
-                        match = face_recognizer.recognize_person(frame_bytes)
-                        workflow_analyzer.complete_step(matched=match.matched if match else False)
+                        if recognition_error:
+                            raise recognition_error
+
                         if match.matched:
                             recognized_person = match.user_name
                             print(f"👤 RECOGNIZED: {match.user_name} (confidence: {match.confidence:.0%})")
@@ -525,51 +646,34 @@ async def entrypoint(ctx: agents.JobContext):
                             # ✅ SINGLE GREETING PER SESSION - Only greet once at the beginning
                             if not greeting_flags["initial_greeting_sent"]:
                                 greeting_flags["initial_greeting_sent"] = True
+                                vision_budget.identifying = False  # Identification window over - lower vision priority
                                 greeted_people.add(match.phone)
 
                                 # Build simple, natural Arabic greeting based on recognition
                                 # Format: السلام عليكم [with title if VIP, just name if regular]
-                                user_type = "guest"
-                                user_context = ""
-
-                                # Check for specific VIPs - use formal titles
-                                if "Abd Salam Haykal" in match.user_name or "عبد السلام هيكل" in match.user_name:
-                                    user_type = "minister"
-                                    greeting = "السلام عليكم معالي الوزير عبد السلام هيكل، أهلاً وسهلاً بك في شركة أورنينا"
-                                    user_context = "Government Minister: Abd Salam Haykal"
-                                elif "Asaad Chaibani" in match.user_name or "أسعد شيباني" in match.user_name:
-                                    user_type = "minister"
-                                    greeting = "السلام عليكم معالي الوزير أسعد شيباني، أهلاً وسهلاً بك في شركة أورنينا"
-                                    user_context = "Government Minister: Asaad Chaibani"
-                                elif "Mohamed Bardouni" in match.user_name or "محمد البردوني" in match.user_name:
-                                    user_type = "developer"
-                                    greeting = "السلام عليكم سيد محمد، أهلاً وسهلاً بك في شركة أورنينا"
-                                    user_context = "Developer: Mohamed Bardouni"
-                                elif "Radwan Nassar" in match.user_name or "رضوان نصار" in match.user_name:
-                                    user_type = "ceo"
-                                    greeting = "السلام عليكم السيد رضوان نصار، أهلاً وسهلاً بك في شركة أورنينا"
-                                    user_context = "CEO of Ornina Media: Radwan Nassar"
-                                elif "طارق مارديني" in match.user_name or "Tarik Mardini" in match.user_name:
-                                    user_type = "operations_director"
-                                    greeting = "السلام عليكم السيد طارق مارديني، أهلاً وسهلاً بك في شركة أورنينا"
-                                    user_context = "Operations Director & Board Member: Tarik Mardini"
-                                else:
-                                    # Regular recognized person - simple greeting with name
-                                    user_type = "recognized_guest"
-                                    greeting = f"السلام عليكم السيد {match.user_name}، أهلاً وسهلاً بك"
-                                    user_context = f"Recognized Guest: {match.user_name}"
+                                greeting, user_type, user_context = build_greeting(match.user_name)
 
                                 print(f"🎤 First Greeting ({user_type}): {greeting}")
                                 print(f"   👥 {user_context}")
                                 print(f"   ✅ Session: {greeting_flags['session_identity']} - NO MORE GREETINGS THIS SESSION")
 
                                 workflow_analyzer.start_step("Deliver First Greeting")
-                                await session.say(greeting, allow_interruptions=True)
+                                await phrase_cache.say(session, greeting, allow_interruptions=True)
                                 workflow_analyzer.complete_step(person=match.user_name, user_type=user_type)
 
                                 # Print performance report after first greeting
                                 workflow_analyzer.print_report()
 
+                            # Identity confirmed and greeted - drop this camera to a presence heartbeat
+                            if greeting_flags["initial_greeting_sent"] and match.bbox:
+                                def keep_identity_fresh(name=match.user_name, pipeline=pipeline):
+                                    if vision_pipelines.is_focus(pipeline):
+                                        agent.update_visual_context(f"Current person: {name}")
+
+                                vision_pipelines.hibernate(
+                                    pipeline, match.bbox, face_recognizer.detect_faces, keep_identity_fresh
+                                )
+
                             # Add recognition to context (preserve recognition data)
                             recognition_text = f"\n\n👤 Person: {match.user_name}"
                             # Don't overwrite analysis - append instead
@@ -593,10 +697,10 @@ async def entrypoint(ctx: agents.JobContext):
                                 if elapsed > 10:
                                     # After 5 seconds of trying, send general greeting
                                     greeting_flags["initial_greeting_sent"] = True
-                                    general_greeting = "السلام عليكم! أهلاً بك في شركة أورنينا للذكاء الاصطناعي. كيف بقدر ساعدك اليوم؟"
+                                    vision_budget.identifying = False  # Identification window over - lower vision priority
                                     print(f"🎤 Sending general greeting (person not recognized after {elapsed:.1f}s - tried multiple times)")
                                     workflow_analyzer.start_step("Deliver First Greeting")
-                                    await session.say(general_greeting, allow_interruptions=True)
+                                    await phrase_cache.say(session, GENERAL_GREETING, allow_interruptions=True)
                                     workflow_analyzer.complete_step(person="Unknown")
 
                                     # Print performance report after first greeting
@@ -609,11 +713,15 @@ async def entrypoint(ctx: agents.JobContext):
                         # If error and no greeting sent yet, send general greeting ONLY ONCE
                         if not greeting_flags["initial_greeting_sent"]:
                             greeting_flags["initial_greeting_sent"] = True
-                            general_greeting = "السلام عليكم! أهلاً بك في شركة أورنينا للذكاء الاصطناعي. كيف بقدر ساعدك اليوم؟"
+                            vision_budget.identifying = False  # Identification window over - lower vision priority
                             print(f"🎤 Sending general greeting (recognition error)")
-                            await session.say(general_greeting, allow_interruptions=True)
+                            await phrase_cache.say(session, GENERAL_GREETING, allow_interruptions=True)
+
+                # Only the focus participant (active speaker) drives the LLM's visual context
+                if not vision_pipelines.is_focus(pipeline):
+                    return
 
-                # Update visual context in Pydantic store (outside the lock)
+                # Update visual context store (outside the lock)
                 if recognized_person:
                     agent.update_visual_context(f"Current person: {recognized_person}")
                     print(f"✅ Visual context updated: {recognized_person}")
@@ -621,76 +729,20 @@ async def entrypoint(ctx: agents.JobContext):
                     # No one recognized
                     print(f"👤 No person recognized")
 
-        # Monitor for video tracks
-        async def monitor_video_tracks():
-            """Monitor for user video tracks and start vision processing"""
-            nonlocal vision_task
-
-            print("👁️  Monitoring for video tracks...")
-            print(f"    Local participant: {ctx.room.local_participant.identity}")
-
-            # Wait for remote participants
-            attempt = 0
-            while True:
-                await asyncio.sleep(2)
-                attempt += 1
-
-                # Get remote participants
-                remote_participants = ctx.room.remote_participants
-
-                # Log all participants every 5 attempts
-                if attempt % 5 == 0:
-                    print(f"👥 Remote participants in room ({len(remote_participants)}):")
-                    for p in remote_participants.values():
-                        print(f"   - {p.identity}: {len(p.track_publications)} tracks")
-
-                for participant in remote_participants.values():
-                    # Skip our own agent
-                    if participant.identity == ctx.room.local_participant.identity:
-                        continue
-
-                    print(f"🔍 Checking participant: {participant.identity}")
-                    print(f"   Tracks: {len(participant.track_publications)}")
-
-                    # Look for video tracks
-                    for track_sid, pub in participant.track_publications.items():
-                        print(f"   Track {track_sid}: kind={pub.kind}, source={pub.source}, subscribed={pub.subscribed}")
-
-                        # Check if it's a camera/video track
-                        from livekit import rtc
-                        if pub.source == rtc.TrackSource.SOURCE_CAMERA:
-                            print(f"   ✅ Found camera track!")
-
-                            # Subscribe if not already subscribed
-                            if not pub.subscribed:
-                                print(f"   📡 Subscribing to track...")
-                                # Subscription happens automatically in LiveKit agents
-
-                            # Wait a bit for subscription to complete
-                            await asyncio.sleep(1)
-
-                            if pub.track and not vision_task:
-                                video_track = pub.track
-                                print(f"📹 Got user video track from {participant.identity}")
-                                print("🎥 Starting vision analysis...")
-
-                                workflow_analyzer.start_step("Vision Processing Startup")
-
-                                # Start continuous vision analysis
-                                try:
-                                    vision_task = asyncio.create_task(
-                                        vision_processor.start_continuous_analysis(
-                                            video_track,
-                                            callback=handle_visual_update
-                                        )
-                                    )
-                                    workflow_analyzer.complete_step()
-                                    print("✅ Vision analysis task started!")
-                                    return
-                                except Exception as e:
-                                    print(f"❌ Failed to start vision analysis: {e}")
-                                    import traceback
-                                    traceback.print_exc()
+        # One vision pipeline per camera track - started by room track events
+        # All pipelines in this session draw on one vision API budget
+        vision_budget = vision_rate_limiter.register_session(conversation_id)
+        vision_pipelines = VisionPipelineManager(
+            ctx.room,
+            handle_visual_update,
+            processor_factory=lambda: VisionProcessor(budget=vision_budget)
+        )
+
+        async def shutdown_vision():
+            await vision_pipelines.stop()
+            vision_rate_limiter.release_session(conversation_id)
+
+        ctx.add_shutdown_callback(shutdown_vision)
 
         # NOW start the session with all handlers ready
         workflow_analyzer.complete_step()
@@ -715,8 +767,8 @@ async def entrypoint(ctx: agents.JobContext):
         print("قل: السلام عليكم - Say: Assalamu Alaikum")
         print("="*60 + "\n")
 
-        # Start video monitoring in background (will detect faces BEFORE greeting)
-        asyncio.create_task(monitor_video_tracks())
+        # Start vision as soon as camera tracks are subscribed (will detect faces BEFORE greeting)
+        vision_pipelines.start()
 
     except Exception as e:
         print(f"فشل بدء الجلسة - Failed to start: {e}")
@@ -726,4 +778,4 @@ async def entrypoint(ctx: agents.JobContext):
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
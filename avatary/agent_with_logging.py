@@ -16,10 +16,11 @@ except ImportError:
     ELEVENLABS_AVAILABLE = False
 
 import os
+import time
 import logging
 import re
 from prompts import AGENT_INSTRUCTIONS
-from local_mcp_server import get_local_tools, call_tool
+from tool_registry import tool_registry
 from conversation_logger import ConversationLogger
 from users_manager import UsersManager
 
@@ -110,6 +111,11 @@ class LoggingAssistant(Agent):
             traceback.print_exc()
 
 
+def prewarm(proc: agents.JobProcess):
+    """Runs once per worker process before it takes jobs"""
+    tool_registry.warm()
+
+
 async def entrypoint(ctx: agents.JobContext):
     print("\n" + "="*60)
     print("🚀 اتصال جديد! - NEW CONNECTION!")
@@ -129,7 +135,7 @@ async def entrypoint(ctx: agents.JobContext):
     print(f"🔧 MCP Server: Local")
 
     # Get local tools
-    local_tools = get_local_tools()
+    local_tools = tool_registry.definitions
     print(f"\n🔧 تحميل {len(local_tools)} أداة محلية - Loading {len(local_tools)} local tools...")
     for tool in local_tools:
         print(f"   ✅ {tool['name']}: {tool['description'][:50]}...")
@@ -178,66 +184,16 @@ async def entrypoint(ctx: agents.JobContext):
     # Register tools with the agent
     print("\n🔧 تسجيل الأدوات مع الوكيل - Registering tools...")
 
-    from livekit.agents.llm import function_tool
-    import json
-    import inspect
-
-    # Create decorated tool functions
-    tools = []
-    for tool in local_tools:
-        tool_name = tool["name"]
-        tool_desc = tool["description"]
-        tool_schema = tool["inputSchema"]
-
-        # Build function parameters from schema
-        params = []
-        annotations = {}
-        schema_props = tool_schema.get("properties", {})
-        schema_required = set(tool_schema.get("required", []))
-        type_map = {
-            "string": str, "integer": int, "number": float,
-            "boolean": bool, "array": list, "object": dict,
-        }
-
-        for p_name, p_details in schema_props.items():
-            json_type = p_details.get("type", "string")
-            py_type = type_map.get(json_type, str)
-            annotations[p_name] = py_type
-
-            default = inspect.Parameter.empty if p_name in schema_required else None
-            params.append(inspect.Parameter(
-                name=p_name,
-                kind=inspect.Parameter.KEYWORD_ONLY,
-                annotation=py_type,
-                default=default
-            ))
-
-        # Create the tool function with closure
-        def make_tool_fn(name, desc, sig_params, annots):
-            async def tool_fn(**kwargs):
-                print(f"\n📞 استدعاء أداة: {name} - Calling tool: {name}")
-                print(f"   المعاملات - Parameters: {kwargs}")
-                result = call_tool(name, kwargs)
-                print(f"   النتيجة - Result: {result.get('success', False)}")
-                return json.dumps(result)
-
-            tool_fn.__signature__ = inspect.Signature(parameters=sig_params)
-            tool_fn.__name__ = name
-            tool_fn.__doc__ = desc
-            tool_fn.__annotations__ = {'return': str, **annots}
-
-            return tool_fn
-
-        # Create and decorate the function
-        func = make_tool_fn(tool_name, tool_desc, params, annotations)
-        decorated_func = function_tool()(func)
-        tools.append(decorated_func)
-        print(f"   ✅ {tool_name}")
+    # Built once per worker process (see tool_registry) - only the list is handed over per job
+    tools_start = time.perf_counter()
+    tools = tool_registry.agent_tools()
+    for tool in tool_registry.definitions:
+        print(f"   ✅ {tool['name']}")
 
     # Add tools to agent
     if hasattr(agent, '_tools') and isinstance(agent._tools, list):
         agent._tools.extend(tools)
-        print(f"✅ تم تسجيل {len(tools)} أداة - Registered {len(tools)} tools!")
+        print(f"✅ تم تسجيل {len(tools)} أداة - Registered {len(tools)} tools! ({(time.perf_counter() - tools_start) * 1000:.2f}ms)")
     else:
         print("⚠️  تحذير: الوكيل لا يحتوي على _tools")
 
@@ -285,4 +241,4 @@ async def entrypoint(ctx: agents.JobContext):
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -0,0 +1,289 @@
+"""
+Answer Cache
+Semantic cache of FAQ-style answers (services, training, prices, contact) served without the LLM
+
+Questions are embedded locally with hashed character n-grams of the normalized
+Arabic/English text, so near-identical phrasings ("شو الدورات يلي عندكم؟" /
+"شو هي الدورات عندكم") hit the same entry, as long as both ask about the same
+FAQ topics and name exactly the same things. N-grams alone can't tell "2D" from
+"3D" or "دورة الذكاء الاصطناعي" from "... المتقدمة", so every word that isn't
+a topic or a filler ("2d", "online", "المتقدمه") must match word for word.
+Entries expire after a TTL and the whole cache is dropped when the knowledge
+base content changes (subscribed to kb_watcher).
+
+Only general, non-personal questions are cached: the question must mention an
+FAQ topic, must not carry personal data, must not be a follow-up that only
+points back at the conversation ("قديش مدة الدورة؟" - which course?), and the
+answer must have been produced without tools other than the read-only
+knowledge base tools.
+
+Off by default (ANSWER_CACHE_ENABLED=1 to enable) until checked on real traffic.
+"""
+
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+import logging
+
+import numpy as np
+
+from prompt_sections import normalize
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "0") == "1"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+
+EMBEDDING_DIM = 512
+NGRAM_SIZES = (2, 3, 4)
+
+# Read-only knowledge base tools - answers that used them are still cacheable
+CACHEABLE_TOOLS = {"search_knowledge_base", "get_all_products", "get_all_training_programs", "get_company_contact"}
+
+# A question must mention one of these to be considered FAQ-style
+FAQ_TOPICS = (
+    "خدم", "منتج", "تدريب", "دوره", "دورات", "برنامج", "مده", "ساعه", "ساعات", "سعر", "اسعار", "كلف",
+    "موقعكم", "عنوان", "وين", "تلفونكم", "رقمكم", "ايميلكم", "تواصل", "دوام", "شركه", "اورنينا",
+    "service", "product", "training", "course", "program", "duration", "hours", "price", "cost",
+    "address", "location", "where", "contact", "email", "company", "ornina",
+)
+
+# Personal data - never cache these questions
+_PERSONAL = re.compile(r"\d{6,}|@|اسمي|انا اسمي|my name|i am |i'm ")
+
+# Dialect fillers and question words that don't change what is asked
+# ("شو هي الدورات يلي عندكم" == "الدورات عندكم", "قديش مدة" == "شو مدة")
+STOPWORDS = {
+    "شو", "ايش", "قديش", "اديش", "كم", "هي", "هو", "يلي", "اللي", "الي", "عندكم", "عندك", "لو", "سمحت",
+    "من", "في", "عن", "على", "بدي", "اعرف", "ممكن", "يا", "و",
+    "what", "is", "are", "the", "a", "do", "you", "your", "please", "can", "of", "how", "much", "many", "and",
+}
+
+# Words that point back at something said earlier ("the course", "the price") -
+# without an explicit name next to them the answer depends on the conversation
+BACK_REFERENCES = {
+    "هاد", "هاي", "هدا", "هذا", "هذه", "هيدا", "هيدي", "ذلك", "تلك", "الدوره", "البرنامج", "المنتج",
+    "الخدمه", "الباقه", "السعر", "المده", "الكلفه", "this", "that", "it", "its", "these", "those", "them",
+    "one", "course", "program", "product", "service", "package", "price", "cost", "duration",
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def content_words(text: str) -> List[str]:
+    """Normalized words without stopwords"""
+    return [word for word in _WORD.findall(normalize(text)) if word not in STOPWORDS]
+
+
+def embed(text: str) -> np.ndarray:
+    """L2-normalized hashed character n-gram vector of the normalized text"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for word in content_words(text):
+        padded = f"<{word}>"
+        for n in NGRAM_SIZES:
+            for i in range(max(1, len(padded) - n + 1)):
+                digest = hashlib.blake2b(padded[i:i + n].encode("utf-8"), digest_size=4).digest()
+                vector[int.from_bytes(digest, "little") % EMBEDDING_DIM] += 1.0
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def question_topics(text: str) -> frozenset:
+    """FAQ topics a question mentions - a hit must ask about exactly the same ones"""
+    normalized = normalize(text)
+    return frozenset(topic for topic in FAQ_TOPICS if topic in normalized)
+
+
+def _is_topic_word(word: str) -> bool:
+    return any(topic in word for topic in FAQ_TOPICS)
+
+
+def question_entities(text: str) -> frozenset:
+    """Words naming what is asked about ("2d", "animation", "online") - a hit must name exactly the same ones"""
+    return frozenset(word for word in content_words(text) if not _is_topic_word(word))
+
+
+def _is_back_reference(word: str) -> bool:
+    # "سعرها", "مدتها" - a topic word with an "its/their" suffix
+    return word in BACK_REFERENCES or (word.endswith("ها") and _is_topic_word(word))
+
+
+def is_follow_up(text: str) -> bool:
+    """Points back at an earlier turn without naming what it asks about"""
+    words = content_words(text)
+    if not any(_is_back_reference(word) for word in words):
+        return False
+    # An explicit entity: a word that is neither a topic, nor a back-reference ("دورة التسويق")
+    return not any(not _is_back_reference(word) and not _is_topic_word(word) for word in words)
+
+
+def is_cacheable_question(text: str) -> bool:
+    """
+    General FAQ-style question without personal data, understandable on its own
+
+    Short replies ("نعم", "ok, and the second one?") don't mention a topic, and a
+    bare "السعر؟" / "the price?" is a follow-up - so "الدورات؟" on its own is fine.
+    """
+    if _PERSONAL.search(normalize(text)):
+        return False
+    return bool(question_topics(text)) and not is_follow_up(text)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    created_at: float
+    topics: frozenset = frozenset()
+    entities: frozenset = frozenset()
+    hits: int = 0
+
+
+@dataclass
+class AnswerLookup:
+    """A cache hit"""
+    answer: str
+    similarity: float
+    question: str
+
+
+class AnswerCache:
+    """
+    Process-wide semantic answer cache
+
+    Lookups are a single matrix-vector product over at most max_entries vectors.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # Rebuilt lazily after changes
+        self._keys: List[str] = []
+
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self._miss_latencies: List[float] = []
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def lookup(self, question: str) -> Optional[AnswerLookup]:
+        """Best fresh answer above the similarity threshold"""
+        if not is_cacheable_question(question):
+            return None
+
+        self.lookups += 1
+        self._expire()
+        if not self._entries:
+            return None
+
+        if self._matrix is None:
+            self._keys = list(self._vectors)
+            self._matrix = np.stack([self._vectors[key] for key in self._keys])
+
+        # "أسعار الدورات" is close to "الدورات" in n-gram space and "2D" to "3D" -
+        # topics and named entities must match too
+        similarities = self._matrix @ embed(question)
+        topics = question_topics(question)
+        entities = question_entities(question)
+        for best in np.argsort(-similarities):
+            if similarities[best] < self.threshold:
+                return None
+            key = self._keys[best]
+            if self._entries[key].topics == topics and self._entries[key].entities == entities:
+                break
+        else:
+            return None
+
+        entry = self._entries[key]
+        entry.hits += 1
+        self._entries.move_to_end(key)
+
+        self.hits += 1
+        self.saved_seconds += self.average_miss_latency
+        return AnswerLookup(entry.answer, float(similarities[best]), entry.question)
+
+    def store(self, question: str, answer: str, exclude_terms: Iterable[str] = ()):
+        """Remember an answer (skipped if personal or if it mentions any of exclude_terms)"""
+        answer = answer.strip()
+        if not answer or not is_cacheable_question(question):
+            return
+        if any(term and term in answer for term in exclude_terms):
+            return  # Personalized (e.g. addresses the caller by name)
+
+        key = normalize(question)
+        self._entries[key] = CachedAnswer(
+            question, answer, time.monotonic(), question_topics(question), question_entities(question)
+        )
+        self._vectors[key] = embed(question)
+        self._entries.move_to_end(key)
+        self._vectors.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._vectors.pop(oldest, None)
+        self._matrix = None
+
+    def record_miss_latency(self, seconds: float):
+        """Time a miss took through the LLM (used to estimate what hits save)"""
+        self._miss_latencies.append(seconds)
+        del self._miss_latencies[:-100]
+
+    @property
+    def average_miss_latency(self) -> float:
+        return sum(self._miss_latencies) / len(self._miss_latencies) if self._miss_latencies else 0.0
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            self._entries.pop(key)
+            self._vectors.pop(key)
+        if expired:
+            self._matrix = None
+
+    def clear(self):
+        self._entries.clear()
+        self._vectors.clear()
+        self._matrix = None
+
+    # ------------------------------------------------------------------
+    # Knowledge base invalidation
+    # ------------------------------------------------------------------
+
+    def on_knowledge_base_change(self):
+        """Drop every answer - subscribed to kb_watcher"""
+        logger.info(f"📚 Knowledge base changed - dropping {len(self._entries)} cached answers")
+        self.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "avg_miss_latency": self.average_miss_latency,
+        }
+
+
+# Global instance
+answer_cache = AnswerCache()
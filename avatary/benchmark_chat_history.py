@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark bounded chat history
+Simulates a long consultation call and compares the history tokens sent per LLM call
+with and without ChatHistoryManager (offline extractive summarizer)
+
+Usage: python benchmark_chat_history.py [turns]
+"""
+
+import asyncio
+import re
+import sys
+
+from livekit.agents import llm
+
+sys.path.insert(0, '.')
+from chat_history_manager import ChatHistoryManager
+from token_counter import count_tokens
+
+USER_TURNS = [
+    "السلام عليكم، بدي استفسر عن دورات التسويق الرقمي",
+    "قديش مدة الدورة وشو المواضيع يلي بتغطيها؟",
+    "تمام، اسمي أحمد الخطيب ورقمي 0933123456",
+    "في عندكم كمان تصميم موقع الكتروني لشركتي؟",
+    "شو الخطوات إذا بدي ابلش بالمشروع؟",
+    "طيب وكم بياخد وقت تقريباً؟",
+]
+ASSISTANT_REPLY = "أكيد! دورة التسويق الرقمي مدتها 45 ساعة وبتغطي السوشال ميديا والإعلانات والتحليلات. حابب سجلك؟"
+
+
+def extract_phone(text: str) -> dict:
+    """Minimal stand-in for agent.extract_user_info (agent.py needs the full plugin set)"""
+    match = re.search(r"\d{7,}", text)
+    return {"phone": match.group(0) if match else None}
+
+
+def chat_tokens(chat_ctx: llm.ChatContext) -> int:
+    return sum(count_tokens(item.text_content or "") for item in chat_ctx.items if item.type == "message")
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 90  # ~30 minutes at one turn per 20s
+
+    manager = ChatHistoryManager(keep_turns=8, fold_batch=4, fact_extractor=extract_phone)
+    history = llm.ChatContext()
+    history.add_message(role="system", content="[instructions]")
+
+    print(f"{'turn':>5} {'unbounded':>10} {'bounded':>8}")
+    for turn in range(1, turns + 1):
+        history.add_message(role="user", content=USER_TURNS[turn % len(USER_TURNS)])
+
+        request = history.copy()
+        manager.apply(request)
+        await asyncio.sleep(0)  # Let background folding run, as it would between turns
+
+        if turn % 10 == 0 or turn == 1:
+            print(f"{turn:5d} {chat_tokens(history):10d} {chat_tokens(request):8d}")
+
+        history.add_message(role="assistant", content=ASSISTANT_REPLY)
+
+    print(f"\nFacts kept: {manager.facts.render()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-job tool setup
+Compares building the function_tool wrappers in every job with handing out the prebuilt registry list
+
+Usage: python benchmark_tool_registry.py [jobs]
+"""
+
+import sys
+import time
+
+sys.path.insert(0, '.')
+from tool_registry import build_agent_tool, tool_registry
+
+
+def measure(name: str, fn, jobs: int) -> float:
+    """Average per-job time in ms"""
+    start = time.perf_counter()
+    for _ in range(jobs):
+        fn()
+    per_job = (time.perf_counter() - start) / jobs * 1000
+    print(f"{name:<36} {per_job:8.3f} ms/job")
+    return per_job
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{len(tool_registry.definitions)} tool definitions, {jobs} jobs\n")
+
+    # Before: every job compiled the schemas and decorated new closures
+    definitions = tool_registry.definitions
+    before = measure("Build tools in every job", lambda: [build_agent_tool(t) for t in definitions], jobs)
+
+    # After: built once in prewarm, each job only copies the list
+    tool_registry.warm()
+    after = measure("Prebuilt registry (per job)", tool_registry.agent_tools, jobs)
+
+    print(f"\nOne-time build in prewarm: {tool_registry.build_seconds * 1000:.3f} ms")
+    print(f"Per-job setup: {before / after:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vision capture path
+Compares the original PIL conversion chain with the NumPy FrameAdapter path
+
+Both paths start from the same I420 camera frame and pay for one I420 -> RGBA
+conversion (the agent now has LiveKit's VideoStream do it, the old code called
+frame.convert()). Reported per frame: time, peak traced memory while processing
+it, and memory still held afterwards (the adapter keeps the last frame and its
+reused RGB buffer alive on purpose - that is not a per-frame allocation).
+
+Usage: python benchmark_vision_frames.py [width] [height] [iterations]
+"""
+
+import io
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+from livekit import rtc
+
+sys.path.insert(0, '.')
+from vision_backends import LocalVisionBackend
+from vision_processor import FrameAdapter, VisionProcessor
+
+
+def make_i420_frame(width: int, height: int) -> rtc.VideoFrame:
+    """Synthetic camera frame in the format LiveKit usually delivers"""
+    rng = np.random.default_rng(0)
+    size = width * height + 2 * ((width + 1) // 2) * ((height + 1) // 2)
+    data = rng.integers(0, 255, size, dtype=np.uint8).tobytes()
+    return rtc.VideoFrame(width, height, rtc.VideoBufferType.I420, data)
+
+
+def legacy_path(frame: rtc.VideoFrame):
+    """Original capture path: convert -> frombytes -> convert(RGB) -> JPEG -> decode for InsightFace"""
+    argb_frame = frame.convert(rtc.VideoBufferType.RGBA)
+    img = Image.frombytes("RGBA", (frame.width, frame.height), argb_frame.data)
+    rgb_img = img.convert("RGB")
+    buffered = io.BytesIO()
+    rgb_img.save(buffered, format="JPEG", quality=60)
+    jpeg_bytes = buffered.getvalue()
+
+    # Recognition decoded the JPEG again
+    recognition_array = np.array(Image.open(io.BytesIO(jpeg_bytes)).convert('RGB'))
+    return jpeg_bytes, recognition_array
+
+
+def adapter_path(processor: VisionProcessor, adapter: FrameAdapter, frame: rtc.VideoFrame):
+    """Current capture path: RGBA frame -> NumPy views -> small JPEG + reused RGB buffer"""
+    adapter.load(frame.convert(rtc.VideoBufferType.RGBA))  # What VideoStream(format=RGBA) delivers
+    processor.frame_changed(adapter)
+    jpeg_bytes = processor.prepare_for_vision(adapter)
+    return jpeg_bytes, adapter.rgb_contiguous()
+
+
+def measure(name: str, fn, iterations: int):
+    """Report per-frame time, peak traced memory and memory held after the frame"""
+    fn()  # Warm up (first-use buffers are not steady state)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_frame_ms = (time.perf_counter() - start) / iterations * 1000
+
+    tracemalloc.start()
+    fn()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<10} {per_frame_ms:8.2f} ms/frame   peak {peak / 1024 / 1024:6.2f} MB   held {held / 1024 / 1024:6.2f} MB")
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1280
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 720
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    frame = make_i420_frame(width, height)
+    processor = VisionProcessor(backend=LocalVisionBackend())  # Offline - no API key needed
+    adapter = FrameAdapter()
+
+    print(f"Frame: {width}x{height}, {iterations} iterations\n")
+    measure("before", lambda: legacy_path(frame), iterations)
+    measure("after", lambda: adapter_path(processor, adapter, frame), iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark the visual context store
+Compares the original Pydantic store (validate_assignment, datetime ages) with the slot-based store
+
+Usage: python benchmark_visual_context.py [iterations]
+"""
+
+import sys
+import timeit
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+sys.path.insert(0, '.')
+from visual_context_models import VisualContextStore
+
+
+class LegacyVisualAnalysis(BaseModel):
+    """The original Pydantic analysis model"""
+    content: str
+    timestamp: datetime = Field(default_factory=datetime.now)
+    confidence: Optional[str] = None
+
+    @property
+    def age_seconds(self) -> float:
+        return (datetime.now() - self.timestamp).total_seconds()
+
+
+class LegacyVisualContextStore(BaseModel):
+    """The original Pydantic store"""
+    latest_analysis: Optional[LegacyVisualAnalysis] = None
+    enabled: bool = True
+    max_age_seconds: float = 15.0
+
+    def update(self, content: str, confidence: Optional[str] = None) -> LegacyVisualAnalysis:
+        analysis = LegacyVisualAnalysis(content=content, confidence=confidence)
+        self.latest_analysis = analysis
+        return analysis
+
+    def get_current(self) -> Optional[LegacyVisualAnalysis]:
+        if not self.enabled or not self.latest_analysis:
+            return None
+        if self.latest_analysis.age_seconds > self.max_age_seconds:
+            return None
+        return self.latest_analysis
+
+    class Config:
+        validate_assignment = True
+
+
+CONTENT = "Current person: Ahmad"
+
+
+def measure(name: str, fn, iterations: int):
+    """Report the best per-call time over a few repeats"""
+    best = min(timeit.repeat(fn, number=iterations, repeat=5))
+    print(f"{name:<28} {best / iterations * 1e6:8.2f} µs/call")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    legacy = LegacyVisualContextStore()
+    store = VisualContextStore()
+    legacy.update(CONTENT)
+    store.update(CONTENT)
+    store.update("مكتب مضاء جيداً", channel="scene")
+
+    print(f"{iterations} iterations\n")
+    measure("before  update", lambda: legacy.update(CONTENT, "high"), iterations)
+    measure("after   update", lambda: store.update(CONTENT, "high"), iterations)
+    measure("before  get_current", legacy.get_current, iterations)
+    measure("after   get_current", store.get_current, iterations)
+    measure("after   get_snapshot (2 ch)", store.get_snapshot, iterations)
+    measure("after   to_model (boundary)", store.to_model, iterations // 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Chat History Manager
+Bounds the history sent to the LLM: recent turns verbatim, older turns folded into a rolling summary
+
+Every LLM call used to carry the whole call transcript, so input tokens (and
+TTFT and cost) grew linearly with call length. Here only the last `keep_turns`
+user turns are sent verbatim; older turns are summarized in the background and
+replaced by one summary item placed right after the instructions. Booking
+facts (name, phone, email, requested service) are tracked separately and always
+sent with the summary, so summarization can't lose them. The name is only taken
+from an explicit "اسمي ..." or from a successful booking tool call, since the
+agent is told not to ask for it again.
+
+Turns are folded in batches of `fold_batch`, so the summary item - and with it
+the cached prompt prefix - only changes every few turns.
+"""
+
+import asyncio
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import logging
+
+from livekit.agents import llm
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Id of the summary item in the chat context
+HISTORY_SUMMARY_ITEM_ID = "history_summary"
+
+# Items our own per-turn slots add - never counted or folded as history
+SLOT_ITEM_IDS = {HISTORY_SUMMARY_ITEM_ID, "visual_context", "prompt_sections"}
+
+# Requested service -> keywords (matched in user turns)
+SERVICE_KEYWORDS = {
+    "مركز اتصال بالذكاء الاصطناعي (AI Call Center)": ("مركز اتصال", "كول سنتر", "call center"),
+    "إنتاج أفلام ومسلسلات (AI Film Production)": ("فيلم", "افلام", "مسلسل", "film"),
+    "الإعلانات الذكية (Smart Advertising)": ("اعلان", "إعلان", "advert"),
+    "الأنيميشن (2D/3D Animation)": ("انيميشن", "أنيميشن", "animation"),
+    "المنصة الرقمية (Digital Platform)": ("منصة", "platform"),
+    "تصميم وبرمجة المواقع (Website Development)": ("موقع الكتروني", "موقع إلكتروني", "تصميم موقع", "website"),
+    "تدريب (Training)": ("دورة", "دورات", "تدريب", "course", "training"),
+    "استشارة (Consultation)": ("استشارة", "consultation"),
+}
+
+# Write tools whose (successful) arguments confirm the customer's name
+NAME_TOOL_ARGUMENTS = {
+    "save_inquiry": "customer_name",
+    "schedule_consultation": "customer_name",
+    "register_training_interest": "student_name",
+}
+
+# Only an explicit "my name is ..." counts - "أنا مهتم بدورة ..." is not a name
+_STATED_NAME = re.compile(r"(?:اسمي|my name is)\s+([^\W\d_]+(?:\s+[^\W\d_]+){0,2})", re.IGNORECASE)
+
+
+# Words that end the name ("اسمي أحمد بدي احجز")
+_NAME_BREAKS = {"بدي", "وبدي", "و", "ورقمي", "رقمي", "وحابب", "حابب", "من", "and", "i", "my", "from"}
+
+
+def extract_stated_name(text: str) -> Optional[str]:
+    """Name from an explicit "اسمي ..." / "my name is ..." (None otherwise)"""
+    match = _STATED_NAME.search(text)
+    if not match:
+        return None
+    words = []
+    for word in match.group(1).split():
+        if word.lower() in _NAME_BREAKS:
+            break
+        words.append(word)
+    return " ".join(words) or None
+
+
+# Bound for the offline summary, so it stays flat like the LLM one (~120 words)
+EXTRACTIVE_SUMMARY_LINES = 12
+
+SUMMARY_PROMPT = """لخّص المحادثة التالية بين مساعد شركة أورنينا وعميل في 120 كلمة كحد أقصى.
+Summarize the conversation between the Ornina assistant and a customer in at most 120 words.
+
+احتفظ بـ: ما طلبه العميل، الخدمات أو الدورات المذكورة، أي أرقام أو مواعيد أو وعود، وما تم الاتفاق عليه.
+Keep: what the customer asked for, services/courses discussed, any numbers, dates or promises, and what was agreed.
+
+الملخص السابق (Previous summary):
+{previous}
+
+الأدوار الجديدة (New turns):
+{turns}"""
+
+
+@dataclass
+class ConversationFacts:
+    """Booking details that must survive summarization"""
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    services: List[str] = field(default_factory=list)
+    name_confirmed: bool = False  # Came from a successful booking tool call
+
+    def update(self, **values):
+        """Phone / email (names go through set_name)"""
+        for key, value in values.items():
+            if value and key in ("phone", "email"):
+                setattr(self, key, value)
+
+    def set_name(self, name: Optional[str], confirmed: bool = False):
+        """A stated name only fills an empty slot; a confirmed one (from a tool call) always wins"""
+        if not name or self.name_confirmed:
+            return
+        if confirmed or not self.name:
+            self.name = name
+            self.name_confirmed = confirmed
+
+    def add_service(self, service: str):
+        if service not in self.services:
+            self.services.append(service)
+
+    def render(self) -> str:
+        parts = []
+        if self.name:
+            parts.append(f"الاسم (Name): {self.name}")
+        if self.phone:
+            parts.append(f"الهاتف (Phone): {self.phone}")
+        if self.email:
+            parts.append(f"الإيميل (Email): {self.email}")
+        if self.services:
+            parts.append(f"الخدمة المطلوبة (Requested): {', '.join(self.services)}")
+        return " | ".join(parts)
+
+
+async def extractive_summary(previous: str, turns: List[str]) -> str:
+    """Offline summarizer: previous summary + the first line of each folded turn"""
+    lines = previous.splitlines() if previous else []
+    lines.extend(turn.splitlines()[0][:160] for turn in turns if turn)
+    return "\n".join(lines[-EXTRACTIVE_SUMMARY_LINES:])
+
+
+def openai_summarizer(model: str = "gpt-4o-mini") -> Callable[[str, List[str]], Awaitable[str]]:
+    """Summarizer backed by a small OpenAI model (falls back to extractive on errors)"""
+    from openai import AsyncOpenAI
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    async def summarize(previous: str, turns: List[str]) -> str:
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                temperature=0,
+                max_tokens=300,
+                messages=[{
+                    "role": "user",
+                    "content": SUMMARY_PROMPT.format(previous=previous or "-", turns="\n".join(turns))
+                }]
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.warning(f"⚠️  History summarization failed ({e}) - using extractive summary")
+            return await extractive_summary(previous, turns)
+
+    return summarize
+
+
+class ChatHistoryManager:
+    """
+    Trims the chat context handed to the LLM (the agent's own history is untouched)
+
+    Call apply() on the llm_node chat context before every generation.
+    """
+
+    def __init__(
+        self,
+        keep_turns: int = 8,
+        fold_batch: int = 4,
+        summarizer: Optional[Callable[[str, List[str]], Awaitable[str]]] = None,
+        fact_extractor: Optional[Callable[[str], Dict[str, Optional[str]]]] = None,
+    ):
+        """
+        Args:
+            keep_turns: User turns (with their replies and tool calls) always sent verbatim
+            fold_batch: Older turns are summarized once at least this many have piled up
+            summarizer: async (previous_summary, turn_texts) -> new summary
+            fact_extractor: text -> {"phone": ...} for user messages (a "name" it returns is ignored)
+        """
+        self.keep_turns = keep_turns
+        self.fold_batch = fold_batch
+        self.summarizer = summarizer or extractive_summary
+        self.fact_extractor = fact_extractor
+
+        self.summary = ""
+        self.facts = ConversationFacts()
+        self._folded_ids: Set[str] = set()
+        self._seen_user_ids: Set[str] = set()
+        self._seen_output_ids: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+        self.folded_turns = 0
+        self.folded_tokens = 0
+
+    # ------------------------------------------------------------------
+    # Facts
+    # ------------------------------------------------------------------
+
+    def _observe_user_message(self, item: llm.ChatMessage):
+        if item.id in self._seen_user_ids:
+            return
+        self._seen_user_ids.add(item.id)
+
+        text = item.text_content or ""
+        if self.fact_extractor:
+            values = dict(self.fact_extractor(text))
+            values.pop("name", None)  # Too guess-prone - see extract_stated_name
+            self.facts.update(**values)
+        self.facts.set_name(extract_stated_name(text))
+
+        lowered = text.lower()
+        for service, keywords in SERVICE_KEYWORDS.items():
+            if any(keyword in lowered for keyword in keywords):
+                self.facts.add_service(service)
+
+    def _observe_tool_output(self, call: llm.FunctionCall, output: llm.FunctionCallOutput):
+        if output.id in self._seen_output_ids:
+            return
+        self._seen_output_ids.add(output.id)
+
+        argument = NAME_TOOL_ARGUMENTS.get(call.name)
+        if not argument or output.is_error:
+            return
+        try:
+            result = json.loads(output.output)
+            arguments = json.loads(call.arguments or "{}")
+        except (TypeError, ValueError):
+            return
+        if not isinstance(result, dict) or "error" in result or result.get("success") is False:
+            return
+        self.facts.set_name(arguments.get(argument), confirmed=True)
+
+    # ------------------------------------------------------------------
+    # Trimming
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _split_turns(items: List[llm.ChatItem]) -> List[List[llm.ChatItem]]:
+        """Group history items into turns, each starting at a user message"""
+        turns: List[List[llm.ChatItem]] = [[]]
+        for item in items:
+            if item.type == "message" and item.role == "user" and turns[-1]:
+                turns.append([])
+            turns[-1].append(item)
+        return [turn for turn in turns if turn]
+
+    @staticmethod
+    def _is_history(item: llm.ChatItem) -> bool:
+        if item.id in SLOT_ITEM_IDS:
+            return False
+        if item.type == "message":
+            return item.role in ("user", "assistant")
+        return item.type in ("function_call", "function_call_output")
+
+    @staticmethod
+    def _turn_text(turn: List[llm.ChatItem]) -> str:
+        lines = []
+        for item in turn:
+            if item.type == "message" and item.text_content:
+                lines.append(f"{item.role}: {item.text_content}")
+            elif item.type == "function_call":
+                lines.append(f"tool call: {item.name}({item.arguments})")
+            elif item.type == "function_call_output":
+                lines.append(f"tool result: {item.output[:200]}")
+        return "\n".join(lines)
+
+    def apply(self, chat_ctx: llm.ChatContext, commit: bool = True) -> int:
+        """
+        Drop folded turns and insert the summary item
+
+        Args:
+            commit: Observe facts and schedule folds - False for speculative requests,
+                whose last user message is an interim transcript ("اسمي أح...")
+
+        Returns:
+            Number of history items removed from this request
+        """
+        if commit:
+            history = [item for item in chat_ctx.items if self._is_history(item)]
+            calls = {item.call_id: item for item in history if item.type == "function_call"}
+            for item in history:
+                if item.type == "message" and item.role == "user":
+                    self._observe_user_message(item)
+                elif item.type == "function_call_output" and item.call_id in calls:
+                    self._observe_tool_output(calls[item.call_id], item)
+
+            # Turns older than the verbatim window that the summary doesn't cover yet
+            turns = self._split_turns([item for item in history if item.id not in self._folded_ids])
+            pending = turns[:-self.keep_turns] if self.keep_turns and len(turns) > self.keep_turns else []
+            if len(pending) >= self.fold_batch and (self._task is None or self._task.done()):
+                self._task = asyncio.create_task(self._fold(pending))
+
+        removed = 0
+        if self._folded_ids:
+            before = len(chat_ctx.items)
+            chat_ctx.items[:] = [item for item in chat_ctx.items if item.id not in self._folded_ids]
+            removed = before - len(chat_ctx.items)
+
+        self._apply_summary_slot(chat_ctx)
+        return removed
+
+    def _apply_summary_slot(self, chat_ctx: llm.ChatContext):
+        existing_index = chat_ctx.index_by_id(HISTORY_SUMMARY_ITEM_ID)
+        if existing_index is not None:
+            chat_ctx.items.pop(existing_index)
+
+        if not self._folded_ids:
+            return  # Nothing folded - the verbatim history already has everything
+
+        text = "[CONVERSATION SUMMARY - earlier in this call]\n" + self.summary
+        facts = self.facts.render()
+        if facts:
+            text += f"\n[KNOWN CUSTOMER DETAILS - do not ask again]\n{facts}"
+
+        # Right after the leading system items (instructions), before the kept turns
+        index = 0
+        while index < len(chat_ctx.items) and chat_ctx.items[index].type == "message" \
+                and chat_ctx.items[index].role in ("system", "developer"):
+            index += 1
+        chat_ctx.items.insert(index, llm.ChatMessage(id=HISTORY_SUMMARY_ITEM_ID, role="system", content=[text]))
+
+    async def _fold(self, turns: List[List[llm.ChatItem]]):
+        """Summarize turns off the critical path; they are dropped from the next request on"""
+        texts = [self._turn_text(turn) for turn in turns]
+        try:
+            summary = await self.summarizer(self.summary, texts)
+        except Exception as e:
+            logger.warning(f"⚠️  History summarization failed: {e}")
+            return
+
+        self.summary = summary
+        self._folded_ids.update(item.id for turn in turns for item in turn)
+        self.folded_turns += len(turns)
+        self.folded_tokens += sum(count_tokens(text) for text in texts)
+        logger.info(
+            f"🗜️  Folded {len(turns)} turns into the history summary "
+            f"({self.folded_turns} turns, ~{self.folded_tokens} tokens so far)"
+        )
+
+    async def aclose(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def create_history_manager(fact_extractor=None) -> Optional[ChatHistoryManager]:
+    """Build from env: CHAT_HISTORY_KEEP_TURNS (0 disables), CHAT_HISTORY_FOLD_BATCH, CHAT_HISTORY_SUMMARIZER"""
+    keep_turns = int(os.getenv("CHAT_HISTORY_KEEP_TURNS", "8"))
+    if keep_turns <= 0:
+        return None
+
+    summarizer = extractive_summary
+    if os.getenv("CHAT_HISTORY_SUMMARIZER", "openai") == "openai":
+        summarizer = openai_summarizer()
+
+    return ChatHistoryManager(
+        keep_turns=keep_turns,
+        fold_batch=int(os.getenv("CHAT_HISTORY_FOLD_BATCH", "4")),
+        summarizer=summarizer,
+        fact_extractor=fact_extractor,
+    )
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Evaluate section-indexed prompt retrieval
+Checks that recorded questions select the sections they need, reports the prompt size
+per call, and (with --llm) compares answers from the full prompt and the sectioned prompt
+
+Usage: python evaluate_prompt_sections.py [--llm]
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, '.')
+from prompts import AGENT_INSTRUCTIONS
+from prompt_sections import PromptSectionIndex
+
+# Recorded user questions -> sections the answer depends on
+RECORDED_QUESTIONS = [
+    ("السلام عليكم", {"greeting"}),
+    ("مرحبا، كيفك؟", {"greeting"}),
+    ("شو الخدمات يلي بتقدموها؟", {"intent", "knowledge_base", "conversation_paths", "path_service"}),
+    ("في عندكم دورات تدريبية؟", {"intent", "knowledge_base", "conversation_paths", "path_training"}),
+    ("كم ساعة مدة دورة التسويق الرقمي؟", {"language", "knowledge_base", "path_training"}),  # Says a number
+    ("بدي صمم موقع لشركتي", {"conversation_paths", "path_service"}),
+    ("بدي احجز استشارة", {"intent", "conversation_flow", "conversation_paths", "path_consultation"}),
+    ("بدي سجل بالدورة، اسمي أحمد ورقمي 0933123456", {"data_collection", "knowledge_base", "path_training"}),
+    ("وين موقعكم؟", set()),  # Company info is in the always-on core
+    ("شو رقم تلفونكم؟", {"language"}),  # Digit-by-digit pronunciation
+    ("بتشوفني؟ شو لابس؟", {"visual"}),
+    ("بتعرفني؟ مين أنا؟", {"recognition"}),
+    ("ما فهمت عليك، فيك تعيد؟", {"error_handling"}),
+    ("شكراً كتير، مع السلامة", {"closing"}),
+    ("استنى لحظة، عم تسمعني؟", {"voice"}),
+    ("What services do you offer?", {"language", "intent", "knowledge_base", "conversation_paths", "path_service"}),
+    ("How much does the animation course cost?", {"language", "knowledge_base", "path_price"}),
+    ("Can you see me? What am I holding?", {"language", "visual"}),
+    ("My name is Sara, my phone number is 0944556677", {"language", "data_collection"}),
+    ("Sorry, I didn't understand, can you repeat?", {"language", "error_handling"}),
+    ("Thank you, goodbye!", {"language", "closing"}),
+    ("Hold on a second, are you still there?", {"language", "voice"}),
+]
+
+PARITY_PROMPT = """Two assistant answers to the same customer question are shown.
+Answer SAME if they give the same facts and the same next step (wording may differ),
+otherwise DIFFERENT. Reply with one word.
+
+Question: {question}
+
+Answer A: {full}
+
+Answer B: {sectioned}"""
+
+
+def evaluate_selection():
+    """Section coverage and prompt size per call - offline"""
+    index = PromptSectionIndex(AGENT_INSTRUCTIONS)
+    print(f"Full prompt: {index.full_tokens} tokens | always-on core: {index.core_tokens} tokens\n")
+
+    missing_total = 0
+    prompts = []
+    for question, expected in RECORDED_QUESTIONS:
+        index.reset()  # Recorded questions are independent turns
+        selection = index.select(question)
+        selected = set(selection.tags)
+        missing = expected - selected
+        missing_total += len(missing)
+
+        prompt_tokens = index.core_tokens + selection.tokens
+        prompts.append((question, selection))
+        status = "✅" if not missing else "❌"
+        print(f"{status} {prompt_tokens:6d} tokens  {question[:45]:<45} {', '.join(selection.tags) or '-'}")
+        if missing:
+            print(f"   missing: {', '.join(sorted(missing))}")
+
+    avg = sum(index.core_tokens + s.tokens for _, s in prompts) / len(prompts)
+    print(f"\nAverage prompt: {avg:.0f} tokens ({index.full_tokens / avg:.1f}x smaller than the full prompt)")
+    print(f"Missing sections: {missing_total}")
+    return index, prompts, missing_total == 0
+
+
+async def evaluate_parity(index: PromptSectionIndex, prompts):
+    """Ask gpt-4o-mini with both prompts and let it judge whether the answers match"""
+    from openai import AsyncOpenAI
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    async def answer(system_messages, question):
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            temperature=0,
+            messages=[*({"role": "system", "content": m} for m in system_messages),
+                      {"role": "user", "content": question}]
+        )
+        return response.choices[0].message.content
+
+    same = 0
+    for question, selection in prompts:
+        sectioned_messages = [index.core_text] + ([selection.text] if selection.sections else [])
+        full, sectioned = await asyncio.gather(
+            answer([AGENT_INSTRUCTIONS], question),
+            answer(sectioned_messages, question)
+        )
+        verdict = await answer([], PARITY_PROMPT.format(question=question, full=full, sectioned=sectioned))
+        matched = verdict.strip().upper().startswith("SAME")
+        same += matched
+        print(f"{'✅' if matched else '⚠️ '} {question[:45]}")
+        if not matched:
+            print(f"   full:      {full[:120]}")
+            print(f"   sectioned: {sectioned[:120]}")
+
+    print(f"\nAnswer parity: {same}/{len(prompts)}")
+    return same == len(prompts)
+
+
+def main():
+    index, prompts, coverage_ok = evaluate_selection()
+
+    parity_ok = True
+    if "--llm" in sys.argv:
+        print("\n" + "=" * 60)
+        parity_ok = asyncio.run(evaluate_parity(index, prompts))
+
+    return 0 if coverage_ok and parity_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
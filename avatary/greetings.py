@@ -0,0 +1,70 @@
+"""
+Greetings
+First-greeting texts for recognized VIPs, recognized guests and unknown visitors
+"""
+
+from typing import Iterable, List, Tuple
+
+GENERAL_GREETING = "السلام عليكم! أهلاً بك في شركة أورنينا للذكاء الاصطناعي. كيف بقدر ساعدك اليوم؟"
+
+# Matched in order against the recognized name (English or Arabic spelling)
+VIP_GREETINGS = {
+    "Abd Salam Haykal": {
+        "aliases": ("Abd Salam Haykal", "عبد السلام هيكل"),
+        "user_type": "minister",
+        "greeting": "السلام عليكم معالي الوزير عبد السلام هيكل، أهلاً وسهلاً بك في شركة أورنينا",
+        "context": "Government Minister: Abd Salam Haykal",
+    },
+    "Asaad Chaibani": {
+        "aliases": ("Asaad Chaibani", "أسعد شيباني"),
+        "user_type": "minister",
+        "greeting": "السلام عليكم معالي الوزير أسعد شيباني، أهلاً وسهلاً بك في شركة أورنينا",
+        "context": "Government Minister: Asaad Chaibani",
+    },
+    "Mohamed Bardouni": {
+        "aliases": ("Mohamed Bardouni", "محمد البردوني"),
+        "user_type": "developer",
+        "greeting": "السلام عليكم سيد محمد، أهلاً وسهلاً بك في شركة أورنينا",
+        "context": "Developer: Mohamed Bardouni",
+    },
+    "Radwan Nassar": {
+        "aliases": ("Radwan Nassar", "رضوان نصار"),
+        "user_type": "ceo",
+        "greeting": "السلام عليكم السيد رضوان نصار، أهلاً وسهلاً بك في شركة أورنينا",
+        "context": "CEO of Ornina Media: Radwan Nassar",
+    },
+    "Tarik Mardini": {
+        "aliases": ("طارق مارديني", "Tarik Mardini"),
+        "user_type": "operations_director",
+        "greeting": "السلام عليكم السيد طارق مارديني، أهلاً وسهلاً بك في شركة أورنينا",
+        "context": "Operations Director & Board Member: Tarik Mardini",
+    },
+}
+
+
+def build_greeting(user_name: str) -> Tuple[str, str, str]:
+    """
+    Greeting for a recognized person
+
+    Returns:
+        (greeting, user_type, user_context) - formal title for VIPs, just the name otherwise
+    """
+    for vip in VIP_GREETINGS.values():
+        if any(alias in user_name for alias in vip["aliases"]):
+            return vip["greeting"], vip["user_type"], vip["context"]
+
+    return (
+        f"السلام عليكم السيد {user_name}، أهلاً وسهلاً بك",
+        "recognized_guest",
+        f"Recognized Guest: {user_name}",
+    )
+
+
+def known_greetings(user_names: Iterable[str] = ()) -> List[str]:
+    """Every greeting that can be predicted ahead of time (for audio pre-rendering)"""
+    greetings = [GENERAL_GREETING] + [vip["greeting"] for vip in VIP_GREETINGS.values()]
+    for name in user_names:
+        greeting = build_greeting(name)[0]
+        if greeting not in greetings:
+            greetings.append(greeting)
+    return greetings
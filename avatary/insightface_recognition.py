@@ -6,7 +6,7 @@ Uses InsightFace for accurate and fast face recognition
 import os
 import sqlite3
 import pickle
-from typing import Optional, List
+from typing import Optional, List, Union
 from pathlib import Path
 import numpy as np
 from PIL import Image
@@ -246,12 +246,12 @@ class InsightFaceRecognition:
             logger.error(f"Registration failed: {e}")
             return False
 
-    def recognize_person(self, image_bytes: bytes) -> FaceMatch:
+    def recognize_person(self, image: Union[bytes, np.ndarray]) -> FaceMatch:
         """
         Recognize a person from image
 
         Args:
-            image_bytes: Image bytes (JPEG/PNG)
+            image: Image bytes (JPEG/PNG) or an RGB array (H, W, 3) straight from the frame
 
         Returns:
             FaceMatch object with recognition results
@@ -260,9 +260,13 @@ class InsightFaceRecognition:
             # Ensure model is loaded (lazy loading)
             self._ensure_model_loaded()
 
-            # Convert bytes to PIL Image
-            img = Image.open(io.BytesIO(image_bytes))
-            img_array = np.array(img.convert('RGB'))
+            if isinstance(image, np.ndarray):
+                # Live frames arrive as RGB arrays - no decode needed
+                img_array = image
+            else:
+                # Convert bytes to PIL Image
+                img = Image.open(io.BytesIO(image))
+                img_array = np.array(img.convert('RGB'))
 
             # Detect faces
             faces = self.app.get(img_array)
@@ -274,13 +278,14 @@ class InsightFaceRecognition:
             # Get embedding
             face = faces[0]
             current_embedding = face.embedding
+            face_box = [float(v) for v in face.bbox]
 
             # Load all registered faces
             registered_faces = self.db.get_all_faces()
 
             if len(registered_faces) == 0:
                 logger.info("👤 No registered faces in database")
-                return FaceMatch(matched=False)
+                return FaceMatch(matched=False, bbox=face_box)
 
             # Find best match using cosine similarity
             best_match = None
@@ -316,19 +321,36 @@ class InsightFaceRecognition:
                     user_name=best_match["user_name"],
                     phone=best_match["phone"],
                     email=best_match.get("email"),
-                    confidence=float(best_similarity)
+                    confidence=float(best_similarity),
+                    bbox=face_box
                 )
             else:
                 logger.info(
                     f"❌ No match found (best distance: {distance:.3f}, "
                     f"threshold: {self.threshold})"
                 )
-                return FaceMatch(matched=False)
+                return FaceMatch(matched=False, bbox=face_box)
 
         except Exception as e:
             logger.error(f"Recognition failed: {e}")
             return FaceMatch(matched=False)
 
+    def detect_faces(self, image: np.ndarray) -> List[List[float]]:
+        """
+        Face presence check - detection model only, no landmarks/embedding
+
+        Much cheaper than recognize_person(); used for the hibernation heartbeat.
+
+        Args:
+            image: RGB array (H, W, 3)
+
+        Returns:
+            Face boxes as [x1, y1, x2, y2, score]
+        """
+        self._ensure_model_loaded()
+        bboxes, _ = self.app.det_model.detect(image, max_num=0, metric='default')
+        return [[float(v) for v in box] for box in bboxes]
+
     @staticmethod
     def _cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """Calculate cosine similarity between two embeddings"""
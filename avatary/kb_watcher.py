@@ -0,0 +1,72 @@
+"""
+Knowledge Base Watcher
+Process-wide poll of the knowledge base fingerprint that tells subscribed caches when the content changed
+
+The answer cache and the tool result cache both serve knowledge base facts and
+must drop them when the content changes. Instead of each polling Supabase (the
+fingerprint hashes five full tables), they subscribe here and one background
+task polls every KB_VERSION_CHECK_SECONDS - and only while someone subscribed,
+so with both caches off nothing is polled at all.
+"""
+
+import asyncio
+import os
+from typing import Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+KB_VERSION_CHECK_SECONDS = float(os.getenv("KB_VERSION_CHECK_SECONDS", "300"))
+
+
+class KnowledgeBaseWatcher:
+    """Calls its subscribers whenever the knowledge base fingerprint changes"""
+
+    def __init__(self, interval: float = KB_VERSION_CHECK_SECONDS):
+        self.interval = interval
+        self.version: Optional[str] = None
+        self.changes = 0
+        self._subscribers: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, on_change: Callable[[], None]):
+        """Call on_change() after each content change (subscribing twice is a no-op)"""
+        if on_change not in self._subscribers:
+            self._subscribers.append(on_change)
+
+    def check(self, version: Optional[str]) -> bool:
+        """Record a fingerprint - notifies the subscribers and returns True if the content changed"""
+        changed = bool(version and self.version and version != self.version)
+        self.version = version or self.version
+        if changed:
+            self.changes += 1
+            logger.info(f"📚 Knowledge base changed - notifying {len(self._subscribers)} caches")
+            for on_change in self._subscribers:
+                try:
+                    on_change()
+                except Exception as e:
+                    logger.warning(f"⚠️  Knowledge base change handler failed: {e}")
+        return changed
+
+    def start(self, fingerprint_fn: Callable[[], str]):
+        """Poll fingerprint_fn in the background (once per process, and only if anything subscribed)"""
+        if not self._subscribers or (self._task and not self._task.done()):
+            return
+
+        async def poll():
+            while True:
+                try:
+                    self.check(await asyncio.to_thread(fingerprint_fn))
+                except Exception as e:
+                    logger.warning(f"⚠️  Knowledge base version check failed: {e}")
+                await asyncio.sleep(self.interval)
+
+        self._task = asyncio.create_task(poll())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+
+# Global instance
+kb_watcher = KnowledgeBaseWatcher()
@@ -4,6 +4,9 @@ Knowledge Base Manager - Search company information from database
 Searches: FAQs, Products, Training Programs, Services, Company Info
 """
 import os
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from supabase import create_client, Client
 from dotenv import load_dotenv
@@ -15,6 +18,8 @@ class KnowledgeBaseManager:
         supabase_url = os.environ.get("SUPABASE_URL")
         supabase_key = os.environ.get("SUPABASE_ANON_KEY")
         self.supabase: Client = create_client(supabase_url, supabase_key)
+        # smart_search runs its four table queries in parallel
+        self._search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kb-search")
 
     def search_faqs(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -177,12 +182,18 @@ class KnowledgeBaseManager:
         Smart search across all knowledge base
         Returns results from FAQs, products, training, and services
         """
+        # Independent HTTP queries - one round trip of latency instead of four
+        faqs = self._search_pool.submit(self.search_faqs, query, 3)
+        products = self._search_pool.submit(self.search_products, query, 2)
+        training = self._search_pool.submit(self.search_training_programs, query, 2)
+        services = self._search_pool.submit(self.search_services, query, 3)
+
         results = {
             "query": query,
-            "faqs": self.search_faqs(query, limit=3),
-            "products": self.search_products(query, limit=2),
-            "training": self.search_training_programs(query, limit=2),
-            "services": self.search_services(query, limit=3)
+            "faqs": faqs.result(),
+            "products": products.result(),
+            "training": training.result(),
+            "services": services.result()
         }
 
         # Count total results
@@ -192,6 +203,26 @@ class KnowledgeBaseManager:
 
         return results
 
+    def content_fingerprint(self) -> str:
+        """
+        Hash of the knowledge base content (changes whenever any answerable fact changes)
+        Used to invalidate cached answers and tool results. Rows are ordered by
+        primary key - Postgres doesn't guarantee a stable row order otherwise.
+        """
+        tables = {
+            "faqs": "question, answer",
+            "products": "name, description, features",
+            "training_programs": "name, duration_hours, objectives, outputs",
+            "work_areas": "category, service",
+            "company_info": "key, value",
+        }
+        digest = hashlib.sha256()
+        for table, columns in tables.items():
+            response = self.supabase.table(table).select(f"id, {columns}").order("id").execute()
+            digest.update(table.encode("utf-8"))
+            digest.update(json.dumps(response.data or [], ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
 # Global instance
 kb_manager = KnowledgeBaseManager()
 
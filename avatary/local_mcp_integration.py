@@ -2,43 +2,28 @@
 Local MCP Tools Integration for LiveKit Agent
 Adapter to use local appointment tools with the agent
 """
-from typing import Any, Dict, List, Callable
+from typing import Any, Dict, List, Callable, Tuple
 from livekit.agents import Agent, llm
-from local_mcp_server import get_local_tools, call_tool as execute_local_tool
-import inspect
+from tool_executor import execute_tools
+from tool_registry import tool_registry
 
 class LocalToolsIntegration:
     """Integration for local appointment booking tools"""
     
     @staticmethod
     def create_function_from_tool(tool: Dict) -> Callable:
-        """Create an async function from tool definition"""
-        tool_name = tool["name"]
-        
-        # Create the async function
-        async def tool_function(**kwargs):
-            """Dynamically created tool function"""
-            result = execute_local_tool(tool_name, kwargs)
-            return result
-        
-        # Set function metadata
-        tool_function.__name__ = tool_name
-        tool_function.__doc__ = tool["description"]
-        
-        return tool_function
+        """Async function for a tool definition (prebuilt once per process by tool_registry)"""
+        return tool_registry.plain_functions()[tool["name"]]
     
     @staticmethod
     def get_tools_for_agent() -> List[Callable]:
         """Get list of tool functions for the agent"""
-        local_tools = get_local_tools()
-        agent_functions = []
-        
-        for tool in local_tools:
-            # Create callable function
-            func = LocalToolsIntegration.create_function_from_tool(tool)
-            agent_functions.append(func)
-        
-        return agent_functions
+        return list(tool_registry.plain_functions().values())
+    
+    @staticmethod
+    async def call_tools(calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run several tool calls concurrently; results come back in call order"""
+        return await execute_tools(calls)
     
     @staticmethod
     async def create_agent_with_tools(agent_class) -> Agent:
@@ -47,7 +32,7 @@ class LocalToolsIntegration:
         agent = agent_class()
         
         # Get local tools
-        local_tools = get_local_tools()
+        local_tools = tool_registry.definitions
         
         # Register each tool with the agent
         for tool in local_tools:
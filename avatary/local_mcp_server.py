@@ -6,6 +6,8 @@ Agent can search database for FAQs, products, training, services
 from typing import Any, Dict, List
 import json
 from knowledge_base_manager import kb_manager
+from tool_cache import TOOL_CACHE_TTL
+from tool_registry import tool_registry
 
 # Define search tools
 TOOLS = [
@@ -52,146 +54,176 @@ TOOLS = [
     }
 ]
 
+_DEFINITIONS = {tool["name"]: tool for tool in TOOLS}
+
 def get_local_tools():
     """Return available knowledge base search tools"""
     return TOOLS
 
 def call_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute knowledge base search tools"""
-    try:
-        if tool_name == "search_knowledge_base":
-            query = arguments.get("query", "")
-            if not query:
-                return {"success": False, "error": "Query is required"}
-
-            # Smart search across all knowledge base
-            results = kb_manager.smart_search(query)
-
-            if results["total_results"] == 0:
-                return {
-                    "success": True,
-                    "message": "لم أجد نتائج مباشرة في قاعدة المعرفة. No direct results found in knowledge base.",
-                    "results": []
-                }
+    """Execute a knowledge base tool synchronously (no cache or timeout - agents use tool_executor)"""
+    spec = tool_registry.get(tool_name, enabled_only=False)
+    if spec is None or tool_name not in _DEFINITIONS:
+        return {
+            "success": False,
+            "error": f"أداة غير معروفة: {tool_name}. Unknown tool: {tool_name}"
+        }
+    return spec.handler(arguments)
 
-            # Format results
-            formatted_results = []
-
-            # Add FAQs
-            for faq in results["faqs"]:
-                formatted_results.append({
-                    "type": "FAQ",
-                    "question": faq["question"],
-                    "answer": faq["answer"]
-                })
-
-            # Add products
-            for prod in results["products"]:
-                formatted_results.append({
-                    "type": "منتج/Product",
-                    "name": prod["name"],
-                    "description": prod["description"],
-                    "features": prod.get("features", [])[:3]  # First 3 features
-                })
-
-            # Add training
-            for train in results["training"]:
-                formatted_results.append({
-                    "type": "تدريب/Training",
-                    "name": train["name"],
-                    "duration": f"{train['duration_hours']} ساعة",
-                    "objectives": train.get("objectives", "")[:150]  # First 150 chars
-                })
-
-            # Add services
-            for svc in results["services"]:
-                formatted_results.append({
-                    "type": "خدمة/Service",
-                    "category": svc["category"],
-                    "service": svc["service"]
-                })
+def _tool_error(e: Exception) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": f"خطأ في تنفيذ الأداة: {str(e)}. Tool execution error: {str(e)}"
+    }
 
-            return {
-                "success": True,
-                "total_results": results["total_results"],
-                "results": formatted_results,
-                "message": f"وجدت {results['total_results']} نتيجة. Found {results['total_results']} results."
-            }
+# Result "type" -> key the results are grouped under for the LLM
+_RESULT_GROUPS = {"FAQ": "faqs", "منتج/Product": "products", "تدريب/Training": "training", "خدمة/Service": "services"}
 
-        elif tool_name == "get_all_products":
-            products = kb_manager.get_all_products()
+def _group_search_results(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Results grouped by type, instead of a "type" key on every one"""
+    groups: Dict[str, list] = {}
+    for item in result.get("results", []):
+        fields = {k: v for k, v in item.items() if k != "type"}
+        groups.setdefault(_RESULT_GROUPS.get(item.get("type"), "other"), []).append(fields)
+    return groups
 
-            if not products:
-                return {
-                    "success": False,
-                    "error": "لا توجد منتجات في قاعدة البيانات. No products in database."
-                }
+@tool_registry.tool(_DEFINITIONS["search_knowledge_base"], timeout=6.0, projection=_group_search_results)
+def search_knowledge_base(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        query = arguments.get("query", "")
+        if not query:
+            return {"success": False, "error": "Query is required"}
+
+        # Smart search across all knowledge base
+        results = kb_manager.smart_search(query)
 
+        if results["total_results"] == 0:
             return {
                 "success": True,
-                "count": len(products),
-                "products": [{"name": p["name"], "description": p["description"][:200]} for p in products],
-                "message": f"لدينا {len(products)} منتجات/خدمات. We have {len(products)} products/services."
+                "message": "لم أجد نتائج مباشرة في قاعدة المعرفة. No direct results found in knowledge base.",
+                "results": []
             }
 
-        elif tool_name == "get_all_training_programs":
-            trainings = kb_manager.get_all_training_programs()
+        # Format results
+        formatted_results = []
+
+        # Add FAQs
+        for faq in results["faqs"]:
+            formatted_results.append({
+                "type": "FAQ",
+                "question": faq["question"],
+                "answer": faq["answer"]
+            })
+
+        # Add products
+        for prod in results["products"]:
+            formatted_results.append({
+                "type": "منتج/Product",
+                "name": prod["name"],
+                "description": prod["description"],
+                "features": prod.get("features", [])[:3]  # First 3 features
+            })
+
+        # Add training
+        for train in results["training"]:
+            formatted_results.append({
+                "type": "تدريب/Training",
+                "name": train["name"],
+                "duration": f"{train['duration_hours']} ساعة",
+                "objectives": train.get("objectives", "")[:150]  # First 150 chars
+            })
+
+        # Add services
+        for svc in results["services"]:
+            formatted_results.append({
+                "type": "خدمة/Service",
+                "category": svc["category"],
+                "service": svc["service"]
+            })
 
-            if not trainings:
-                return {
-                    "success": False,
-                    "error": "لا توجد تدريبات في قاعدة البيانات. No training programs in database."
-                }
+        return {
+            "success": True,
+            "total_results": results["total_results"],
+            "results": formatted_results,
+            "message": f"وجدت {results['total_results']} نتيجة. Found {results['total_results']} results."
+        }
+    except Exception as e:
+        return _tool_error(e)
 
+@tool_registry.tool(_DEFINITIONS["get_all_products"], timeout=4.0, cache_ttl=TOOL_CACHE_TTL)
+def get_all_products(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        products = kb_manager.get_all_products()
+
+        if not products:
             return {
-                "success": True,
-                "count": len(trainings),
-                "programs": [
-                    {
-                        "name": t["name"],
-                        "duration_hours": t["duration_hours"],
-                        "objectives": t.get("objectives", "")[:150]
-                    } for t in trainings
-                ],
-                "message": f"لدينا {len(trainings)} برامج تدريبية. We have {len(trainings)} training programs."
+                "success": False,
+                "error": "لا توجد منتجات في قاعدة البيانات. No products in database."
             }
 
-        elif tool_name == "get_company_contact":
-            contact_info = kb_manager.get_company_info()
-
-            if not contact_info:
-                return {
-                    "success": False,
-                    "error": "لا توجد معلومات اتصال. No contact info available."
-                }
+        return {
+            "success": True,
+            "count": len(products),
+            "products": [{"name": p["name"], "description": p["description"][:200]} for p in products],
+            "message": f"لدينا {len(products)} منتجات/خدمات. We have {len(products)} products/services."
+        }
+    except Exception as e:
+        return _tool_error(e)
 
-            # Organize by category
-            contact = {}
-            about = {}
-            for info in contact_info:
-                if info["category"] == "contact":
-                    contact[info["key"]] = info["value"]
-                elif info["category"] == "about":
-                    about[info["key"]] = info["value"]
+@tool_registry.tool(_DEFINITIONS["get_all_training_programs"], timeout=4.0, cache_ttl=TOOL_CACHE_TTL)
+def get_all_training_programs(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        trainings = kb_manager.get_all_training_programs()
 
+        if not trainings:
             return {
-                "success": True,
-                "contact": contact,
-                "about": about,
-                "message": "معلومات الشركة. Company information."
+                "success": False,
+                "error": "لا توجد تدريبات في قاعدة البيانات. No training programs in database."
             }
 
-        else:
+        return {
+            "success": True,
+            "count": len(trainings),
+            "programs": [
+                {
+                    "name": t["name"],
+                    "duration_hours": t["duration_hours"],
+                    "objectives": t.get("objectives", "")[:150]
+                } for t in trainings
+            ],
+            "message": f"لدينا {len(trainings)} برامج تدريبية. We have {len(trainings)} training programs."
+        }
+    except Exception as e:
+        return _tool_error(e)
+
+@tool_registry.tool(_DEFINITIONS["get_company_contact"], timeout=3.0, cache_ttl=TOOL_CACHE_TTL)
+def get_company_contact(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        contact_info = kb_manager.get_company_info()
+
+        if not contact_info:
             return {
                 "success": False,
-                "error": f"أداة غير معروفة: {tool_name}. Unknown tool: {tool_name}"
+                "error": "لا توجد معلومات اتصال. No contact info available."
             }
 
-    except Exception as e:
+        # Organize by category
+        contact = {}
+        about = {}
+        for info in contact_info:
+            if info["category"] == "contact":
+                contact[info["key"]] = info["value"]
+            elif info["category"] == "about":
+                about[info["key"]] = info["value"]
+
         return {
-            "success": False,
-            "error": f"خطأ في تنفيذ الأداة: {str(e)}. Tool execution error: {str(e)}"
+            "success": True,
+            "contact": contact,
+            "about": about,
+            "message": "معلومات الشركة. Company information."
         }
+    except Exception as e:
+        return _tool_error(e)
 
 if __name__ == "__main__":
     print("📋 PHASE 1.5 MCP Server - Knowledge Base Search Active")
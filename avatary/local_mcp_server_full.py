@@ -15,6 +15,7 @@ from inquiry_manager import inquiry_manager
 from consultation_manager import consultation_manager
 from training_manager import training_manager
 from users_manager import users_manager
+from tool_registry import tool_registry
 
 # Load environment variables
 load_dotenv()
@@ -211,155 +212,183 @@ TOOLS = [
     }
 ]
 
-# Tool execution functions
-def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute a tool and return results"""
+_DEFINITIONS = {tool["name"]: tool for tool in TOOLS}
 
-    if tool_name == "save_inquiry":
-        try:
-            # Save user first
-            users_manager.save_user(
-                name=arguments["customer_name"],
-                phone=arguments["phone"],
-                email=arguments.get("email", "")
-            )
+# The write tools return whole database rows - the LLM only needs the confirmation details
+def _project_inquiry(result: Dict[str, Any]) -> Dict[str, Any]:
+    inquiry = result["inquiry"]
+    return {"saved": True, "service_interest": inquiry.get("service_interest")}  # inquiry_id is a UUID nobody reads out
 
-            # Save inquiry
-            inquiry = inquiry_manager.save_inquiry(
-                customer_name=arguments["customer_name"],
-                phone=arguments["phone"],
-                service_interest=arguments["service_interest"],
-                email=arguments.get("email"),
-                company_name=arguments.get("company_name"),
-                message=arguments.get("message"),
-                budget_range=arguments.get("budget_range"),
-                timeline=arguments.get("timeline"),
-                inquiry_type="service"
-            )
+def _project_consultation(result: Dict[str, Any]) -> Dict[str, Any]:
+    consultation = result["consultation"]
+    return {
+        "booked": True,
+        "consultation_id": consultation.get("consultation_id"),
+        "service_type": consultation.get("service_type"),
+        "date": consultation.get("consultation_date"),
+        "time": consultation.get("consultation_time"),
+    }
 
-            if inquiry:
-                return {
-                    "success": True,
-                    "inquiry": inquiry,
-                    "message": f"تم حفظ استفسارك بنجاح! سيتواصل معك فريقنا قريباً."
-                }
-            return {"success": False, "error": "فشل حفظ الاستفسار"}
+def _project_registration(result: Dict[str, Any]) -> Dict[str, Any]:
+    registration = result["registration"]
+    return {"registered": True, "registration_id": registration.get("registration_id"), "program_name": registration.get("program_name")}
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+@tool_registry.tool(_DEFINITIONS["save_inquiry"], writes=True, projection=_project_inquiry)
+def save_inquiry(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        # Save user first
+        users_manager.save_user(
+            name=arguments["customer_name"],
+            phone=arguments["phone"],
+            email=arguments.get("email", "")
+        )
 
-    elif tool_name == "schedule_consultation":
-        try:
-            # Save user first
-            users_manager.save_user(
-                name=arguments["customer_name"],
-                phone=arguments["phone"],
-                email=arguments.get("email", "")
-            )
+        # Save inquiry
+        inquiry = inquiry_manager.save_inquiry(
+            customer_name=arguments["customer_name"],
+            phone=arguments["phone"],
+            service_interest=arguments["service_interest"],
+            email=arguments.get("email"),
+            company_name=arguments.get("company_name"),
+            message=arguments.get("message"),
+            budget_range=arguments.get("budget_range"),
+            timeline=arguments.get("timeline"),
+            inquiry_type="service"
+        )
 
-            # Schedule consultation
-            consultation = consultation_manager.schedule_consultation(
-                customer_name=arguments["customer_name"],
-                phone=arguments["phone"],
-                service_type=arguments["service_type"],
-                consultation_date=arguments["consultation_date"],
-                consultation_time=arguments["consultation_time"],
-                email=arguments.get("email"),
-                company_name=arguments.get("company_name"),
-                notes=arguments.get("notes")
-            )
+        if inquiry:
+            return {
+                "success": True,
+                "inquiry": inquiry,
+                "message": f"تم حفظ استفسارك بنجاح! سيتواصل معك فريقنا قريباً."
+            }
+        return {"success": False, "error": "فشل حفظ الاستفسار"}
 
-            if consultation:
-                return {
-                    "success": True,
-                    "consultation": consultation,
-                    "message": f"تم حجز موعد الاستشارة بنجاح! يوم {consultation['consultation_date']} الساعة {consultation['consultation_time']}"
-                }
-            return {"success": False, "error": "فشل حجز الاستشارة"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@tool_registry.tool(_DEFINITIONS["schedule_consultation"], writes=True, projection=_project_consultation)
+def schedule_consultation(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        # Save user first
+        users_manager.save_user(
+            name=arguments["customer_name"],
+            phone=arguments["phone"],
+            email=arguments.get("email", "")
+        )
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        # Schedule consultation
+        consultation = consultation_manager.schedule_consultation(
+            customer_name=arguments["customer_name"],
+            phone=arguments["phone"],
+            service_type=arguments["service_type"],
+            consultation_date=arguments["consultation_date"],
+            consultation_time=arguments["consultation_time"],
+            email=arguments.get("email"),
+            company_name=arguments.get("company_name"),
+            notes=arguments.get("notes")
+        )
 
-    elif tool_name == "check_consultation_slots":
-        try:
-            date = arguments["date"]
-            slots = consultation_manager.get_available_slots(date)
+        if consultation:
             return {
                 "success": True,
-                "date": date,
-                "available_slots": slots,
-                "count": len(slots),
-                "message": f"المواعيد المتاحة في {date}: {len(slots)} موعد"
+                "consultation": consultation,
+                "message": f"تم حجز موعد الاستشارة بنجاح! يوم {consultation['consultation_date']} الساعة {consultation['consultation_time']}"
             }
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return {"success": False, "error": "فشل حجز الاستشارة"}
 
-    elif tool_name == "register_training_interest":
-        try:
-            # Save user first
-            users_manager.save_user(
-                name=arguments["student_name"],
-                phone=arguments["phone"],
-                email=arguments.get("email", "")
-            )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-            # Register training interest
-            registration = training_manager.register_interest(
-                student_name=arguments["student_name"],
-                phone=arguments["phone"],
-                program_name=arguments["program_name"],
-                email=arguments.get("email"),
-                experience_level=arguments.get("experience_level", "beginner"),
-                preferred_start_date=arguments.get("preferred_start_date"),
-                notes=arguments.get("notes")
-            )
-
-            if registration:
-                return {
-                    "success": True,
-                    "registration": registration,
-                    "message": f"تم تسجيل اهتمامك ببرنامج {arguments['program_name']} بنجاح! سنتواصل معك قريباً."
-                }
-            return {"success": False, "error": "فشل تسجيل الاهتمام"}
+@tool_registry.tool(_DEFINITIONS["check_consultation_slots"], timeout=5.0)
+def check_consultation_slots(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        date = arguments["date"]
+        slots = consultation_manager.get_available_slots(date)
+        return {
+            "success": True,
+            "date": date,
+            "available_slots": slots,
+            "count": len(slots),
+            "message": f"المواعيد المتاحة في {date}: {len(slots)} موعد"
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+@tool_registry.tool(_DEFINITIONS["register_training_interest"], writes=True, projection=_project_registration)
+def register_training_interest(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        # Save user first
+        users_manager.save_user(
+            name=arguments["student_name"],
+            phone=arguments["phone"],
+            email=arguments.get("email", "")
+        )
 
-    elif tool_name == "get_training_programs":
-        try:
-            programs = training_manager.list_available_programs()
-            programs_info = []
-            for p in programs:
-                info = training_manager.get_program_info(p)
-                programs_info.append(info)
+        # Register training interest
+        registration = training_manager.register_interest(
+            student_name=arguments["student_name"],
+            phone=arguments["phone"],
+            program_name=arguments["program_name"],
+            email=arguments.get("email"),
+            experience_level=arguments.get("experience_level", "beginner"),
+            preferred_start_date=arguments.get("preferred_start_date"),
+            notes=arguments.get("notes")
+        )
 
+        if registration:
             return {
                 "success": True,
-                "programs": programs_info,
-                "count": len(programs_info),
-                "message": f"لدينا {len(programs_info)} برامج تدريبية متاحة"
+                "registration": registration,
+                "message": f"تم تسجيل اهتمامك ببرنامج {arguments['program_name']} بنجاح! سنتواصل معك قريباً."
             }
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return {"success": False, "error": "فشل تسجيل الاهتمام"}
 
-    elif tool_name == "get_program_details":
-        try:
-            program_name = arguments["program_name"]
-            info = training_manager.get_program_info(program_name)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-            if info:
-                return {
-                    "success": True,
-                    "program": info,
-                    "message": f"تفاصيل برنامج {program_name}"
-                }
-            return {"success": False, "error": "البرنامج غير موجود"}
+@tool_registry.tool(_DEFINITIONS["get_training_programs"], timeout=5.0)
+def get_training_programs(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        programs = training_manager.list_available_programs()
+        programs_info = []
+        for p in programs:
+            info = training_manager.get_program_info(p)
+            programs_info.append(info)
+
+        return {
+            "success": True,
+            "programs": programs_info,
+            "count": len(programs_info),
+            "message": f"لدينا {len(programs_info)} برامج تدريبية متاحة"
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+@tool_registry.tool(_DEFINITIONS["get_program_details"], timeout=5.0)
+def get_program_details(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        program_name = arguments["program_name"]
+        info = training_manager.get_program_info(program_name)
 
-    else:
+        if info:
+            return {
+                "success": True,
+                "program": info,
+                "message": f"تفاصيل برنامج {program_name}"
+            }
+        return {"success": False, "error": "البرنامج غير موجود"}
+
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+# Tool execution functions
+def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute a tool and return results (synchronously - agents use tool_executor)"""
+    spec = tool_registry.get(tool_name, enabled_only=False)
+    if spec is None or tool_name not in _DEFINITIONS:
         return {"success": False, "error": f"Unknown tool: {tool_name}"}
+    return spec.handler(arguments)
 
 # Export for use in agent
 def get_local_tools():
@@ -1 +1 @@
-from .server import MCPServer, MCPServerSse, MCPServerStdio, MCPServerSseParams, MCPServerStdioParams
\ No newline at end of file
+from .server import MCPServer, MCPServerSse, MCPServerStdio, MCPServerSseParams, MCPServerStdioParams, MCPSessionPool, mcp_session_pool
\ No newline at end of file
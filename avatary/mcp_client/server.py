@@ -1,6 +1,23 @@
+"""
+MCP client servers
+SSE (and stub stdio) MCP servers for the agent, plus a per-worker pool of connected sessions
+
+Opening an MCP session (SSE connection + initialize handshake) costs a few round
+trips. MCPSessionPool keeps one connected server per URL for each event loop
+and hands it to everything on that loop that asks for it. The agent warms it
+at job start, so tool latency doesn't include connection setup. Pooled sessions are health-checked (ping), reconnect with
+exponential backoff, and multiplex concurrent calls. The tools list is cached
+for MCP_TOOLS_CACHE_TTL seconds.
+"""
+
 import asyncio
+import math
+import os
+import random
+import time
+import weakref
 from contextlib import AbstractAsyncContextManager, AsyncExitStack
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 
 # Import from the installed mcp package
@@ -9,6 +26,17 @@ import mcp.types
 from mcp.types import CallToolResult, JSONRPCMessage, Tool as MCPTool
 from mcp.client.sse import sse_client
 from mcp.client.session import ClientSession
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+MCP_TOOLS_CACHE_TTL = float(os.getenv("MCP_TOOLS_CACHE_TTL", "300"))
+MCP_MAX_IN_FLIGHT = int(os.getenv("MCP_MAX_IN_FLIGHT", "8"))
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+MCP_HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT", "5"))
+MCP_RECONNECT_ATTEMPTS = int(os.getenv("MCP_RECONNECT_ATTEMPTS", "5"))
+MCP_RECONNECT_BASE_DELAY = float(os.getenv("MCP_RECONNECT_BASE_DELAY", "0.5"))
+MCP_RECONNECT_MAX_DELAY = float(os.getenv("MCP_RECONNECT_MAX_DELAY", "30"))
 
 # Base class for MCP servers
 class MCPServer:
@@ -35,25 +63,53 @@ class MCPServer:
 
 # Base class for MCP servers that use a ClientSession
 class _MCPServerWithClientSession(MCPServer):
-    """Base class for MCP servers that use a ClientSession to communicate with the server."""
+    """Base class for MCP servers that use a ClientSession to communicate with the server.
+
+    The connection is owned by a background task (the transport's task groups must be
+    entered and exited by the same task), so any job can use, reconnect or close it.
+    Concurrent calls are multiplexed over the one session (JSON-RPC request ids), up
+    to max_in_flight at a time.
+    """
 
-    def __init__(self, cache_tools_list: bool):
+    def __init__(
+        self,
+        cache_tools_list: bool,
+        tools_cache_ttl: Optional[float] = None,
+        max_in_flight: int = MCP_MAX_IN_FLIGHT,
+    ):
         """
         Args:
-            cache_tools_list: Whether to cache the tools list. If True, the tools list will be
-            cached and only fetched from the server once. If False, the tools list will be
-            fetched from the server on each call to list_tools(). You should set this to True
-            if you know the server will not change its tools list, because it can drastically
-            improve latency.
+            cache_tools_list: Cache the tools list for good (fetched once). Ignored if
+            tools_cache_ttl is given.
+            tools_cache_ttl: Seconds the tools list is cached before it is fetched again
+            (default MCP_TOOLS_CACHE_TTL, 0 = fetch on every list_tools() call).
+            max_in_flight: Concurrent requests allowed on the session.
         """
         self.session: Optional[ClientSession] = None
-        self.exit_stack: AsyncExitStack = AsyncExitStack()
+        self._session_task: Optional[asyncio.Task] = None
+        self._close_event: Optional[asyncio.Event] = None
+        self._connect_lock: asyncio.Lock = asyncio.Lock()
         self._cleanup_lock: asyncio.Lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._health_task: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._started = False  # connect() was called and cleanup() wasn't
+        self.pooled = False  # Owned by MCPSessionPool - jobs don't close it
+
         self.cache_tools_list = cache_tools_list
+        if tools_cache_ttl is None:
+            tools_cache_ttl = math.inf if cache_tools_list else MCP_TOOLS_CACHE_TTL
+        self.tools_cache_ttl = tools_cache_ttl
 
         # The cache is always dirty at startup, so that we fetch tools at least once
         self._cache_dirty = True
         self._tools_list: Optional[List[MCPTool]] = None
+        self._tools_fetched_at = 0.0
+
+        self.connects = 0
+        self.reconnects = 0
+        self.calls = 0
+        self.failures = 0
         self.logger = logging.getLogger(__name__)
 
     def create_streams(
@@ -72,68 +128,232 @@ class _MCPServerWithClientSession(MCPServer):
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
-        await self.cleanup()
+        if not self.pooled:
+            await self.cleanup()
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
 
     def invalidate_tools_cache(self):
         """Invalidate the tools cache."""
         self._cache_dirty = True
 
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+
     async def connect(self):
-        """Connect to the server."""
+        """Connect to the server (no-op if already connected; waits for a running reconnect)."""
+        if self.reconnecting:
+            await asyncio.shield(self._reconnect_task)
+            return
+        async with self._connect_lock:
+            if self.session is None:
+                await self._open()
+            self._started = True
+
+    async def _open(self):
+        ready = asyncio.get_running_loop().create_future()
+        self._close_event = asyncio.Event()
+        self._session_task = asyncio.create_task(self._run_session(ready, self._close_event))
         try:
-            transport = await self.exit_stack.enter_async_context(self.create_streams())
-            read, write = transport
-            session = await self.exit_stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
-            self.session = session
-            self.logger.info(f"Connected to MCP server: {self.name}")
+            await ready
         except Exception as e:
             self.logger.error(f"Error initializing MCP server: {e}")
-            await self.cleanup()
             raise
+        self.connects += 1
+        self.logger.info(f"Connected to MCP server: {self.name}")
 
-    async def list_tools(self) -> List[MCPTool]:
-        """List the tools available on the server."""
-        if not self.session:
+    async def _run_session(self, ready: asyncio.Future, closed: asyncio.Event):
+        """Owns the transport and session until closed is set (or the connection drops)."""
+        session = None
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(self.create_streams())
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                self.session = session
+                ready.set_result(None)
+                await closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                self.logger.warning(f"⚠️  Connection to MCP server {self.name} lost: {e}")
+        finally:
+            if session is not None and self.session is session:
+                self.session = None
+            if not ready.done():
+                ready.set_exception(ConnectionError(f"MCP server {self.name} closed during setup"))
+
+    async def _close(self):
+        task, self._session_task = self._session_task, None
+        if task is None:
+            return
+        self._close_event.set()
+        try:
+            await asyncio.wait_for(task, timeout=5)
+        except Exception as e:
+            self.logger.error(f"Error cleaning up server: {e}")
+        self.session = None
+
+    def _reconnect(self, failed: Optional[ClientSession]) -> asyncio.Task:
+        """Start replacing a failed session in the background (one reconnect at a time).
+
+        Callers that saw the same session fail share the running reconnect.
+        """
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop(failed))
+            self._reconnect_task.add_done_callback(self._on_reconnect_done)
+        return self._reconnect_task
+
+    def _on_reconnect_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            self.logger.error(f"Error reconnecting to MCP server {self.name}: {task.exception()}")
+
+    @property
+    def reconnecting(self) -> bool:
+        return self._reconnect_task is not None and not self._reconnect_task.done()
+
+    async def _reconnect_loop(self, failed: Optional[ClientSession]) -> ClientSession:
+        """Reconnect with exponential backoff - the lock is only held for each attempt, not the sleeps"""
+        for attempt in range(MCP_RECONNECT_ATTEMPTS):
+            async with self._connect_lock:
+                if self.session is not None and self.session is not failed:
+                    return self.session  # Someone else already reconnected
+                await self._close()
+                try:
+                    await self._open()
+                    self.reconnects += 1
+                    return self.session
+                except Exception as e:
+                    await self._close()
+                    if attempt == MCP_RECONNECT_ATTEMPTS - 1:
+                        raise
+                    error = e
+
+            delay = min(MCP_RECONNECT_BASE_DELAY * 2 ** attempt, MCP_RECONNECT_MAX_DELAY)
+            delay *= random.uniform(0.5, 1.0)  # Jitter - workers don't retry in lockstep
+            self.logger.warning(f"⚠️  Reconnect to {self.name} failed ({error}) - retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        # MCP_RECONNECT_ATTEMPTS <= 0 - fail instead of leaving waiters with no session
+        raise ConnectionError(f"MCP server {self.name} is down (reconnects disabled)")
+
+    async def _wait_for_reconnect(self, failed: Optional[ClientSession]) -> ClientSession:
+        return await asyncio.shield(self._reconnect(failed))
+
+    async def _request(self, fn: Callable[[ClientSession], Awaitable[Any]], retry: bool) -> Any:
+        """fn(session), reconnecting if the connection was lost.
+
+        With retry (idempotent requests), the request waits for the reconnect and is
+        sent again on the new session. Without (tool calls - they run inside an LLM
+        turn and may have side effects), it fails fast while the connection is down
+        and the reconnect continues in the background.
+        """
+        if not self._started:
             raise RuntimeError("Server not initialized. Make sure you call connect() first.")
 
-        # Return from cache if caching is enabled, we have tools, and the cache is not dirty
-        if self.cache_tools_list and not self._cache_dirty and self._tools_list:
-            return self._tools_list
+        session = self.session
+        if session is None or self.reconnecting:
+            if not retry:
+                self._reconnect(session)
+                raise ConnectionError(f"MCP server {self.name} is reconnecting")
+            session = await self._wait_for_reconnect(session)
+
+        try:
+            return await fn(session)
+        except McpError:
+            raise  # The server answered - the connection is fine
+        except Exception as e:
+            self.failures += 1
+            self.logger.warning(f"⚠️  Request to MCP server {self.name} failed ({e}) - reconnecting")
+            if not retry:
+                self._reconnect(session)
+                raise
+            session = await self._wait_for_reconnect(session)
+            return await fn(session)
+
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+
+    def start_health_checks(self, interval: float = MCP_HEALTH_CHECK_INTERVAL):
+        """Ping the server every `interval` seconds and reconnect if it doesn't answer."""
+        if interval > 0 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.create_task(self._health_loop(interval))
+
+    async def _health_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            session = self.session
+            try:
+                if session is None:
+                    raise ConnectionError("not connected")
+                await asyncio.wait_for(session.send_ping(), timeout=MCP_HEALTH_CHECK_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️  MCP server {self.name} failed its health check ({e}) - reconnecting")
+                try:
+                    await self._wait_for_reconnect(session)
+                except Exception as e:
+                    self.logger.error(f"Error reconnecting to MCP server {self.name}: {e}")
 
-        # Reset the cache dirty to False
-        self._cache_dirty = False
+    # ------------------------------------------------------------------
+    # MCP
+    # ------------------------------------------------------------------
+
+    async def list_tools(self) -> List[MCPTool]:
+        """List the tools available on the server (cached for tools_cache_ttl)."""
+        age = time.monotonic() - self._tools_fetched_at
+        if not self._cache_dirty and self._tools_list is not None and age < self.tools_cache_ttl:
+            return self._tools_list
 
         try:
             # Fetch the tools from the server
-            result = await self.session.list_tools()
+            result = await self._request(lambda session: session.list_tools(), retry=True)
             self._tools_list = result.tools
+            self._tools_fetched_at = time.monotonic()
+            self._cache_dirty = False
             return self._tools_list
         except Exception as e:
             self.logger.error(f"Error listing tools: {e}")
             raise
 
     async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> CallToolResult:
-        """Invoke a tool on the server."""
-        if not self.session:
-            raise RuntimeError("Server not initialized. Make sure you call connect() first.")
-
+        """Invoke a tool on the server (fails fast while the connection is being re-established)."""
         arguments = arguments or {}
-        try:
-            return await self.session.call_tool(tool_name, arguments)
-        except Exception as e:
-            self.logger.error(f"Error calling tool {tool_name}: {e}")
-            raise
+        async with self._in_flight:
+            self.calls += 1
+            try:
+                return await self._request(lambda session: session.call_tool(tool_name, arguments), retry=False)
+            except Exception as e:
+                self.logger.error(f"Error calling tool {tool_name}: {e}")
+                raise
 
     async def cleanup(self):
         """Cleanup the server."""
         async with self._cleanup_lock:
-            try:
-                await self.exit_stack.aclose()
-                self.session = None
-                self.logger.info(f"Cleaned up MCP server: {self.name}")
-            except Exception as e:
-                self.logger.error(f"Error cleaning up server: {e}")
+            self._started = False
+            for task in (self._health_task, self._reconnect_task):
+                if task and not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            self._health_task = self._reconnect_task = None
+            async with self._connect_lock:
+                await self._close()
+            self.logger.info(f"Cleaned up MCP server: {self.name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
 
 # Define parameter types for clarity
 MCPServerSseParams = Dict[str, Any]
@@ -148,16 +368,18 @@ class MCPServerSse(_MCPServerWithClientSession):
         params: MCPServerSseParams,
         cache_tools_list: bool = False,
         name: Optional[str] = None,
+        tools_cache_ttl: Optional[float] = None,
     ):
         """Create a new MCP server based on the HTTP with SSE transport.
 
         Args:
             params: The params that configure the server including the URL, headers,
                    timeout, and SSE read timeout.
-            cache_tools_list: Whether to cache the tools list.
+            cache_tools_list: Whether to cache the tools list for good.
             name: A readable name for the server.
+            tools_cache_ttl: Seconds the tools list is cached (default MCP_TOOLS_CACHE_TTL).
         """
-        super().__init__(cache_tools_list)
+        super().__init__(cache_tools_list, tools_cache_ttl)
         self.params = params
         self._name = name or f"SSE Server at {self.params.get('url', 'unknown')}"
 
@@ -217,4 +439,73 @@ class MCPServerStdio(MCPServer):
 
     async def cleanup(self):
         self.connected = False
-        self.logger.info(f"Cleaned up MCP Stdio server: {self.name}")
\ No newline at end of file
+        self.logger.info(f"Cleaned up MCP Stdio server: {self.name}")
+
+
+class MCPSessionPool:
+    """
+    Connected MCP servers shared by everything running on one event loop
+
+    One server per (event loop, key) - asyncio sessions can't cross loops. LiveKit
+    gives each job its own loop (a job process, or a thread with its own loop), so
+    in practice a pooled server lives as long as its job: connect it at job start
+    with warm() and close() it in the job's shutdown callback, before the loop goes.
+    """
+
+    def __init__(self, health_check_interval: float = MCP_HEALTH_CHECK_INTERVAL):
+        """
+        Args:
+            health_check_interval: Seconds between pings of each pooled server (0 = off)
+        """
+        self.health_check_interval = health_check_interval
+        self._servers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _MCPServerWithClientSession]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _loop_servers(self) -> Dict[str, _MCPServerWithClientSession]:
+        loop = asyncio.get_running_loop()
+        servers = self._servers.get(loop)
+        if servers is None:
+            servers = self._servers[loop] = {}
+        return servers
+
+    async def get(self, key: str, factory: Callable[[], _MCPServerWithClientSession]) -> _MCPServerWithClientSession:
+        """The pooled server for `key`, created with factory() and connected on first use"""
+        servers = self._loop_servers()
+        server = servers.get(key)
+        if server is None:
+            server = servers[key] = factory()
+            server.pooled = True
+        await server.connect()
+        server.start_health_checks(self.health_check_interval)
+        return server
+
+    async def sse(self, params: MCPServerSseParams, name: Optional[str] = None, **kwargs) -> MCPServerSse:
+        """Pooled MCPServerSse for params["url"]"""
+        return await self.get(params["url"], lambda: MCPServerSse(params, name=name, **kwargs))
+
+    def warm(self, params_list: List[MCPServerSseParams]) -> asyncio.Task:
+        """Connect the given SSE servers in the background (call at job start, before the user speaks)"""
+        async def connect_all():
+            results = await asyncio.gather(*(self.sse(params) for params in params_list), return_exceptions=True)
+            for params, result in zip(params_list, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"⚠️  MCP server {params.get('url')} not connected: {result}")
+        return asyncio.create_task(connect_all())
+
+    async def close(self):
+        """Close this loop's pooled servers"""
+        servers = self._loop_servers()
+        await asyncio.gather(*(server.cleanup() for server in servers.values()), return_exceptions=True)
+        servers.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: server.get_stats()
+            for servers in list(self._servers.values())
+            for key, server in servers.items()
+        }
+
+
+# Global instance
+mcp_session_pool = MCPSessionPool()
@@ -366,6 +366,7 @@ class FaceMatch(BaseModel):
     email: Optional[EmailStr] = None
     confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="Match confidence score")
     distance: float = Field(default=1.0, ge=0.0, description="Distance metric (lower = better match)")
+    bbox: Optional[List[float]] = Field(default=None, description="Detected face box (x1, y1, x2, y2) in frame pixels")
     timestamp: datetime = Field(default_factory=datetime.now)
 
     @property
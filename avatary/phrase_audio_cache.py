@@ -0,0 +1,172 @@
+"""
+Phrase Audio Cache
+Pre-synthesized TTS audio for fixed phrases (greetings), played without a TTS round trip
+
+Audio is keyed by (voice, model, text) and kept in memory for the worker process
+and as WAV files on disk (PHRASE_AUDIO_CACHE_DIR), so a restarted worker or a new
+job doesn't have to synthesize the same greeting again. Cache misses are spoken
+through the live TTS as before.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import time
+import wave
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Optional
+import logging
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts as agents_tts
+
+logger = logging.getLogger(__name__)
+
+# Next to this module whatever the working directory (matches .gitignore's data/phrase_audio/)
+PHRASE_AUDIO_CACHE_DIR = os.getenv(
+    "PHRASE_AUDIO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "phrase_audio")
+)
+
+# Playback chunk size - same order as the frames a TTS stream delivers
+PLAYBACK_CHUNK_MS = 20
+
+# Shared by every job in this worker process: cache key -> audio
+_audio_memory: Dict[str, rtc.AudioFrame] = {}
+
+
+def _frame_to_wav(frame: rtc.AudioFrame) -> bytes:
+    return frame.to_wav_bytes()
+
+
+def _wav_to_frame(data: bytes) -> rtc.AudioFrame:
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        pcm = wav.readframes(wav.getnframes())
+        return rtc.AudioFrame(
+            data=pcm,
+            sample_rate=wav.getframerate(),
+            num_channels=wav.getnchannels(),
+            samples_per_channel=wav.getnframes(),
+        )
+
+
+class PhraseAudioCache:
+    """Pre-renders phrases with a session's TTS and plays them from cache"""
+
+    def __init__(self, tts: agents_tts.TTS, voice: str, model: str, cache_dir: str = PHRASE_AUDIO_CACHE_DIR):
+        """
+        Args:
+            tts: The TTS the session speaks with (used to render and on misses)
+            voice: Voice id - part of the cache key
+            model: TTS model - part of the cache key
+            cache_dir: Where rendered WAV files are kept
+        """
+        self.tts = tts
+        self.voice = voice
+        self.model = model
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._rendering: Dict[str, asyncio.Task] = {}
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.voice}|{self.model}|{text}".encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def get(self, text: str) -> Optional[rtc.AudioFrame]:
+        """Cached audio for a phrase (memory first, then disk)"""
+        key = self.key(text)
+        frame = _audio_memory.get(key)
+        if frame is not None:
+            return frame
+
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            frame = _wav_to_frame(path.read_bytes())
+        except Exception as e:
+            logger.warning(f"⚠️  Unreadable cached phrase audio {path.name}: {e}")
+            return None
+
+        _audio_memory[key] = frame
+        return frame
+
+    async def render(self, text: str) -> Optional[rtc.AudioFrame]:
+        """Synthesize a phrase and store it (concurrent requests for the same phrase share one call)"""
+        frame = self.get(text)
+        if frame is not None:
+            return frame
+
+        key = self.key(text)
+        task = self._rendering.get(key)
+        if task is None:
+            task = self._rendering[key] = asyncio.create_task(self._render(key, text))
+            task.add_done_callback(lambda _: self._rendering.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _render(self, key: str, text: str) -> Optional[rtc.AudioFrame]:
+        try:
+            async with self.tts.synthesize(text) as stream:
+                frame = await stream.collect()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not pre-render phrase audio: {e}")
+            return None
+
+        _audio_memory[key] = frame
+        try:
+            await asyncio.to_thread(self._path(key).write_bytes, _frame_to_wav(frame))
+        except Exception as e:
+            logger.warning(f"⚠️  Could not write phrase audio to disk: {e}")
+        return frame
+
+    async def warm(self, texts: Iterable[str]):
+        """Render every phrase not cached yet (run in the background at startup)"""
+        missing = [text for text in dict.fromkeys(texts) if self.get(text) is None]
+        if not missing:
+            return
+
+        start = time.perf_counter()
+        rendered = 0
+        for text in missing:
+            rendered += await self.render(text) is not None
+        print(f"🔊 Pre-rendered {rendered}/{len(missing)} phrases in {time.perf_counter() - start:.1f}s")
+
+    @staticmethod
+    async def _playback(frame: rtc.AudioFrame) -> AsyncIterator[rtc.AudioFrame]:
+        """Replay cached audio as a stream of short frames"""
+        samples = frame.sample_rate * PLAYBACK_CHUNK_MS // 1000
+        bytes_per_sample = 2 * frame.num_channels  # 16-bit PCM
+        data = frame.data.tobytes()
+        step = samples * bytes_per_sample
+
+        for offset in range(0, len(data), step):
+            chunk = data[offset:offset + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=frame.sample_rate,
+                num_channels=frame.num_channels,
+                samples_per_channel=len(chunk) // bytes_per_sample,
+            )
+
+    def say(self, session: AgentSession, text: str, allow_interruptions: bool = True, remember: bool = True):
+        """
+        Speak a phrase - from cache if possible, live TTS otherwise
+
+        Args:
+            remember: On a miss, render the phrase in the background for next time
+        """
+        frame = self.get(text)
+        if frame is not None:
+            self.hits += 1
+            return session.say(text, audio=self._playback(frame), allow_interruptions=allow_interruptions)
+
+        self.misses += 1
+        if remember:
+            asyncio.create_task(self.render(text))
+        return session.say(text, allow_interruptions=allow_interruptions)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Prompt Analyzer
+Token size, per-section breakdown, cross-file duplicates and per-turn cost of the prompt files
+
+Usage:
+    python prompt_analyzer.py [files...] [--budget TOKENS] [--turns-per-day N] [--cache-hit-rate R]
+
+Exits with status 1 when any prompt constant exceeds the token budget
+(--budget or PROMPT_TOKEN_BUDGET), so it can run as a CI check.
+"""
+
+import argparse
+import ast
+import hashlib
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from token_counter import count_tokens, is_exact
+from prompt_sections import split_sections
+
+DEFAULT_FILES = ["prompts.py", "prompts_v2.py", "prompts_v2_example.py", "prompts copy.py"]
+
+# gpt-4o-mini list prices (USD per 1M input tokens)
+PRICE_INPUT_PER_M = float(os.getenv("PROMPT_PRICE_INPUT_PER_M", "0.15"))
+PRICE_CACHED_PER_M = float(os.getenv("PROMPT_PRICE_CACHED_PER_M", "0.075"))
+
+# Rough prefill model for the TTFT estimate: fixed overhead + uncached tokens / throughput
+TTFT_BASE_MS = float(os.getenv("PROMPT_TTFT_BASE_MS", "250"))
+PREFILL_TOKENS_PER_SEC = float(os.getenv("PROMPT_PREFILL_TOKENS_PER_SEC", "25000"))
+
+# Passages shorter than this are too generic to count as duplicates
+MIN_DUPLICATE_CHARS = 80
+
+# Box-drawing characters and fences - stripped from passage previews
+_BOX_CHARS = re.compile(r"[\u2500-\u257f━═|]+")
+
+_NUMBERED_HEADING = re.compile(r"^\s*(\d{1,2}\.\s+\S[^\n]{0,60})\s*$", re.MULTILINE)
+
+
+@dataclass
+class PromptConstant:
+    """A module-level string constant in a prompt file"""
+    file: str
+    name: str
+    text: str
+    tokens: int = 0
+    sections: List[Tuple[str, int]] = field(default_factory=list)  # (heading, tokens)
+
+    @property
+    def label(self) -> str:
+        return f"{self.file}:{self.name}"
+
+
+def load_constants(path: str) -> List[PromptConstant]:
+    """Module-level string assignments, read with ast (no import - 'prompts copy.py' isn't importable)"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    constants = []
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Constant):
+            continue
+        if not isinstance(node.value.value, str):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                constants.append(PromptConstant(os.path.basename(path), target.id, node.value.value))
+    return constants
+
+
+def split_headings(text: str) -> List[Tuple[str, str]]:
+    """(heading, text) pairs - "SECTION N:" fences if present, else numbered headings"""
+    sections = split_sections(text)
+    if len(sections) > 1:
+        return [(s.title, s.text) for s in sections]
+
+    headings = list(_NUMBERED_HEADING.finditer(text))
+    if not headings:
+        return [("(whole prompt)", text)]
+
+    parts = [("PREAMBLE", text[:headings[0].start()])]
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        parts.append((heading.group(1).strip(), text[heading.start():end]))
+    return parts
+
+
+def passages(text: str) -> List[str]:
+    """Blank-line separated passages, whitespace-normalized"""
+    blocks = (" ".join(block.split()) for block in re.split(r"\n\s*\n", text))
+    return [b for b in blocks if len(b) >= MIN_DUPLICATE_CHARS]
+
+
+def find_duplicates(constants: List[PromptConstant]) -> List[Tuple[str, int, List[str]]]:
+    """Passages that appear in more than one file: (passage, tokens, [labels])"""
+    seen: Dict[str, Tuple[str, set]] = {}
+    for const in constants:
+        for passage in passages(const.text):
+            key = hashlib.md5(passage.encode("utf-8")).hexdigest()
+            seen.setdefault(key, (passage, set()))[1].add(const.label)
+
+    duplicates = []
+    for passage, labels in seen.values():
+        files = {label.split(":")[0] for label in labels}
+        if len(files) > 1:
+            duplicates.append((passage, count_tokens(passage), sorted(labels)))
+    return sorted(duplicates, key=lambda d: d[1] * len(d[2]), reverse=True)
+
+
+def estimate_turn(tokens: int, cache_hit_rate: float) -> Tuple[float, float]:
+    """(cost in USD, TTFT in ms) for one LLM call that sends `tokens` of prompt"""
+    cached = tokens * cache_hit_rate
+    uncached = tokens - cached
+    cost = (uncached * PRICE_INPUT_PER_M + cached * PRICE_CACHED_PER_M) / 1_000_000
+    ttft_ms = TTFT_BASE_MS + uncached / PREFILL_TOKENS_PER_SEC * 1000
+    return cost, ttft_ms
+
+
+def analyze(constants: List[PromptConstant]):
+    for const in constants:
+        const.tokens = count_tokens(const.text)
+        const.sections = [(heading, count_tokens(text)) for heading, text in split_headings(const.text)]
+
+
+def print_report(constants: List[PromptConstant], duplicates, turns_per_day: int, cache_hit_rate: float, top: int):
+    tokenizer = "o200k_base" if is_exact() else "estimated (tokenizer unavailable)"
+    print("=" * 78)
+    print(f"PROMPT ANALYSIS - tokenizer: {tokenizer}")
+    print("=" * 78)
+
+    for const in constants:
+        cost, ttft_ms = estimate_turn(const.tokens, cache_hit_rate)
+        print(f"\n📄 {const.label}")
+        print(f"   {const.tokens} tokens, {len(const.text)} chars")
+        print(
+            f"   Per turn: ${cost:.5f}, ~{ttft_ms:.0f}ms TTFT  |  "
+            f"{turns_per_day}/day: ${cost * turns_per_day:.2f}/day, ${cost * turns_per_day * 30:.2f}/month"
+        )
+        if len(const.sections) > 1:
+            for heading, tokens in const.sections:
+                share = tokens / const.tokens if const.tokens else 0
+                print(f"     {tokens:6d}  {share:5.1%}  {heading[:60]}")
+
+    print("\n" + "=" * 78)
+    duplicated_tokens = sum(tokens * (len(labels) - 1) for _, tokens, labels in duplicates)
+    print(f"DUPLICATED PASSAGES ACROSS FILES ({len(duplicates)}, {duplicated_tokens} redundant tokens)")
+    print("=" * 78)
+    for passage, tokens, labels in duplicates[:top]:
+        preview = _BOX_CHARS.sub("", passage).strip()
+        print(f"   {tokens:5d} tokens × {len(labels)}  {preview[:60]}...")
+        print(f"         in: {', '.join(labels)}")
+    if len(duplicates) > top:
+        print(f"   ... {len(duplicates) - top} more")
+
+    print(f"\nAssumptions: ${PRICE_INPUT_PER_M}/M input, ${PRICE_CACHED_PER_M}/M cached, "
+          f"{cache_hit_rate:.0%} cache hit rate, TTFT ≈ {TTFT_BASE_MS:.0f}ms + uncached/{PREFILL_TOKENS_PER_SEC:.0f} tok/s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze prompt size and per-turn token cost")
+    parser.add_argument("files", nargs="*", help="Prompt files (default: all prompt files in this directory)")
+    parser.add_argument("--budget", type=int, default=int(os.getenv("PROMPT_TOKEN_BUDGET", "0")),
+                        help="Fail if any prompt constant exceeds this many tokens (0 = no check)")
+    parser.add_argument("--turns-per-day", type=int, default=int(os.getenv("PROMPT_TURNS_PER_DAY", "5000")),
+                        help="LLM calls per day for the cost estimate")
+    parser.add_argument("--cache-hit-rate", type=float, default=0.0,
+                        help="Share of prompt tokens served from the provider cache (0-1)")
+    parser.add_argument("--top", type=int, default=10, help="Duplicated passages to list")
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    files = args.files or [os.path.join(base_dir, name) for name in DEFAULT_FILES]
+
+    constants = []
+    for path in files:
+        if not os.path.exists(path):
+            print(f"⚠️  {path} not found - skipped")
+            continue
+        constants.extend(load_constants(path))
+
+    analyze(constants)
+    print_report(constants, find_duplicates(constants), args.turns_per_day, args.cache_hit_rate, args.top)
+
+    if args.budget:
+        over = [c for c in constants if c.tokens > args.budget]
+        if over:
+            print(f"\n❌ Token budget exceeded ({args.budget} tokens):")
+            for const in over:
+                print(f"   {const.label}: {const.tokens} tokens (+{const.tokens - args.budget})")
+            return 1
+        print(f"\n✅ All prompts within budget ({args.budget} tokens)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Prompt Cache
+Keeps the system prompt byte-stable for provider prefix caching and measures the hit rate
+
+Layout of every LLM request:
+
+    [tools] [static system prompt] [conversation history] [dynamic slot] [latest user turn]
+    \\_______ cached prefix _______/
+
+Anything that changes per turn (visual context, identity, time) must live in the
+dynamic slot after the history - never inside the system prompt - or the provider
+cache misses on every call.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import List, Optional
+import logging
+
+from livekit.agents import llm, metrics
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# OpenAI only caches prompts with at least this many identical leading tokens
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def prefix_fingerprint(text: str) -> str:
+    """Short hash of the exact bytes sent as the static prefix"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class StaticPrefixGuard:
+    """
+    Verifies that the system prompt sent to the LLM is the byte-stable static prefix
+
+    A drifting prefix (e.g. someone formatting a timestamp into the instructions)
+    silently turns every turn into a full-price cache miss; this logs it once per
+    distinct drift so it shows up in the worker logs.
+    """
+
+    def __init__(self, static_prefix: str):
+        self.static_prefix = static_prefix
+        self.fingerprint = prefix_fingerprint(static_prefix)
+        self.tokens = count_tokens(static_prefix)
+        self._reported = set()
+
+        if self.tokens < MIN_CACHEABLE_TOKENS:
+            logger.warning(
+                f"⚠️  Static prompt prefix is {self.tokens} tokens - below the "
+                f"{MIN_CACHEABLE_TOKENS}-token minimum for provider caching"
+            )
+
+    def check(self, chat_ctx: llm.ChatContext) -> bool:
+        """True if the first system message is exactly the static prefix"""
+        for item in chat_ctx.items:
+            if item.type == "message" and item.role == "system":
+                text = item.text_content or ""
+                if text == self.static_prefix:
+                    return True
+
+                drifted = prefix_fingerprint(text)
+                if drifted not in self._reported:
+                    self._reported.add(drifted)
+                    logger.warning(
+                        f"⚠️  System prompt drifted from static prefix "
+                        f"({self.fingerprint} → {drifted}) - prompt cache will miss"
+                    )
+                return False
+        return False
+
+
+@dataclass
+class PromptCacheStats:
+    """Cached vs uncached input tokens and TTFT per LLM call, for one session"""
+    turns: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    ttft_cached: List[float] = field(default_factory=list)
+    ttft_uncached: List[float] = field(default_factory=list)
+
+    def record(self, llm_metrics: metrics.LLMMetrics) -> float:
+        """Record one LLM call - returns its cached share of input tokens"""
+        self.turns += 1
+        self.prompt_tokens += llm_metrics.prompt_tokens
+        self.cached_tokens += llm_metrics.prompt_cached_tokens
+
+        if llm_metrics.ttft >= 0:
+            bucket = self.ttft_cached if llm_metrics.prompt_cached_tokens else self.ttft_uncached
+            bucket.append(llm_metrics.ttft)
+
+        if not llm_metrics.prompt_tokens:
+            return 0.0
+        return llm_metrics.prompt_cached_tokens / llm_metrics.prompt_tokens
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of all input tokens served from the provider cache"""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    @staticmethod
+    def _mean(values: List[float]) -> Optional[float]:
+        return sum(values) / len(values) if values else None
+
+    def get_summary(self) -> dict:
+        return {
+            "turns": self.turns,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_rate": self.hit_rate,
+            "cached_turns": len(self.ttft_cached),
+            "avg_ttft_cached": self._mean(self.ttft_cached),
+            "avg_ttft_uncached": self._mean(self.ttft_uncached),
+        }
+
+    def print_report(self):
+        if not self.turns:
+            return
+
+        summary = self.get_summary()
+        print("\n📦 Prompt cache report")
+        print(f"   LLM calls: {summary['turns']} ({summary['cached_turns']} with cache hits)")
+        print(
+            f"   Input tokens: {summary['prompt_tokens']} "
+            f"({summary['cached_tokens']} cached, {summary['hit_rate']:.0%})"
+        )
+        for label, key in (("cached", "avg_ttft_cached"), ("uncached", "avg_ttft_uncached")):
+            if summary[key] is not None:
+                print(f"   Avg TTFT ({label}): {summary[key] * 1000:.0f}ms")
@@ -0,0 +1,309 @@
+"""
+Prompt Sections
+Splits AGENT_INSTRUCTIONS on its "SECTION N:" headers and selects sections per turn
+
+The always-on core (dialect rules, identity, company facts, response style) is
+the static system prompt. Topic sections (language and numbers, data collection,
+closing, ...) and the single conversation paths of SECTION 11 (service, training,
+price, ...) are picked from the user's latest transcript with a keyword index and
+sent in a per-turn system item after the history, so the cached prefix stays
+byte-stable (see prompt_cache).
+
+Opt-in with PROMPT_SECTION_RETRIEVAL=1.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+PROMPT_SECTION_RETRIEVAL = os.getenv("PROMPT_SECTION_RETRIEVAL", "0") == "1"
+
+# Id of the per-turn sections item in the chat context
+PROMPT_SECTIONS_ITEM_ID = "prompt_sections"
+
+_SECTION_HEADER = re.compile(r"\n(═+)\n(SECTION (\d+): [^\n]*)\n═+\n")
+
+# Section number -> (tag, keywords). Sections not listed here are always on.
+# Keywords are matched as substrings of the normalized transcript (see normalize());
+# pad a keyword with spaces to match it as a whole word only.
+SECTION_KEYWORDS: Dict[int, Tuple[str, Tuple[str, ...]]] = {
+    # Arabic replies follow the preamble's dialect rules - this section is for English
+    # speakers and for replies that say numbers (prices, durations, phone numbers)
+    2: ("language", (
+        "english", "انجليزي", "سعر", "اسعار", "كلف", "قديش", " كم ", "رقم", "مده", "ساعه", "ساعات",
+        "تلفون", "هاتف", "موبايل",
+        " i ", " i'm ", " my ", " you ", " the ", " what ", " how ", " is ", " are ", " do ", " can ",
+        "hello", " hi ", "thank", "please",
+    )),
+    3: ("conversation_flow", (
+        "استشار", "موعد", "مشروع",
+        "consult", "appointment", "project",
+    )),
+    # Silence and interruptions are handled by VAD - the rules only matter when the
+    # caller asks us to wait or checks the line
+    4: ("voice", (
+        "استنى", "لحظه", "ثانيه", "ثواني", "عم تسمعني", "بتسمعني", "انت معي", "لسا معي", "لسه معي", "قاطع",
+        "wait", "hold on", "one moment", "one sec", "can you hear", "are you there", "still there", "interrupt",
+    )),
+    5: ("greeting", (
+        "السلام عليكم", "سلام عليكم", " سلام ", "مرحبا", "اهلا", "صباح الخير", "مسا الخير", "مساء الخير",
+        "hello", " hi ", " hey ", "good morning", "good evening",
+    )),
+    6: ("recognition", (
+        "بتعرفني", "تعرفني", "مين انا", "بتذكر", "تذكرني", "شفتني",
+        "do you know me", "who am i", "remember me",
+    )),
+    7: ("visual", (
+        "شايف", "شايفني", "بتشوف", "تشوف", "كاميرا", "لابس", "بايدي", "صوره", "لون",
+        "see me", "can you see", "look at", "camera", "wearing", "holding", "colour", "color",
+    )),
+    # Listing / "I want" questions - a question about one named course has a single intent
+    8: ("intent", (
+        "خدمات", "الخدمات", "دورات", "تدريبات", "برامج", "تعلم", "استشار", "موعد", "شو عندكم", "بتقدمو",
+        "services", "courses", "trainings", "programs", "learn", "consult", "appointment", "offer",
+    )),
+    # The caller's own details - not "what is your number"
+    9: ("data_collection", (
+        "سجل", "تسجيل", " رقمي", " ورقمي", "موبايلي", "تلفوني", "جوالي", "ايميلي", "اسمي", "احجز", "تواصلو",
+        "register", "sign up", "my number", "my phone", "my email", "my name", "book", "contact me",
+    )),
+    10: ("knowledge_base", (
+        "خدم", "منتج", "تدريب", "دوره", "دورات", "برنامج", "سعر", "اسعار", "كلف", "مده", "ساعه", "ساعات", "تفاصيل",
+        "service", "product", "training", "course", "program", "price", "cost", "duration", "hours", "details",
+    )),
+    13: ("closing", (
+        "شكرا", "مشكور", "يعطيك العافيه", "مع السلامه", "باي", "خلص", "بس هيك",
+        "thank", "bye", "goodbye", "that's all", "that is all",
+    )),
+    14: ("error_handling", (
+        "ما فهمت", "مو فاهم", "شو قلت", " عيد", "مو واضح", "غلط", "ما بتفهم",
+        "didn't understand", "don't understand", "repeat", "pardon", "what?", "wrong",
+    )),
+}
+
+# Sections split further on their boxed "المسار X:" headers: section -> (tag, part -> (tag, keywords)).
+# The section's own intro is sent with any of its parts; parts not listed are always on.
+SECTION_PART_KEYWORDS: Dict[int, Tuple[str, Dict[str, Tuple[str, Tuple[str, ...]]]]] = {
+    11: ("conversation_paths", {
+        "A": ("path_service", (
+            "خدم", "تصميم", "صمم", "موقع الكتروني", "موقع ويب", "انيميشن", "اعلان", "فيلم", "مسلسل", "مركز اتصال",
+            "منصه", "مشروع",
+            "service", "design", "website", "animation", "advert", "film", "call center", "platform", "project",
+        )),
+        "B": ("path_training", (
+            "تدريب", "دوره", "دورات", "تعلم", "كورس",
+            "training", "course", "learn", "class",
+        )),
+        "C": ("path_consultation", (
+            "استشار", "موعد",
+            "consult", "appointment", "meeting",
+        )),
+        "D": ("path_general_info", (
+            "موقعكم", "وين", "عنوان", "رقمكم", "تلفونكم", "تواصل معكم", "فيسبوك", "تيكتوك", "يوتيوب",
+            "where", "address", "location", "your number", "contact you", "facebook", "tiktok", "youtube",
+        )),
+        "E": ("path_visual", (
+            "شايف", "شايفني", "بتشوف", "تشوف", "لابس", "وصفلي",
+            "see me", "can you see", "describe", "wearing", "holding",
+        )),
+        "F": ("path_price", (
+            "سعر", "اسعار", "كلف", "قديش",
+            "price", "cost", "how much", "fee",
+        )),
+    }),
+}
+
+_PART_HEADER = re.compile(r"\n┌─+┐\n│ المسار ([A-Z]):[^\n]*\n└─+┘\n")
+
+_ARABIC_DIACRITICS = re.compile(r"[ً-ْـ]")
+_ARABIC_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي"})
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip Arabic diacritics/tatweel, fold letter variants and collapse whitespace"""
+    text = _ARABIC_DIACRITICS.sub("", text.lower())
+    return " ".join(text.translate(_ARABIC_FOLD).split())
+
+
+def _normalize_keyword(keyword: str) -> str:
+    """Normalize a keyword but keep its whole-word padding"""
+    lead = " " if keyword.startswith(" ") else ""
+    trail = " " if keyword.endswith(" ") else ""
+    return lead + normalize(keyword) + trail
+
+
+@dataclass
+class PromptSection:
+    """One "SECTION N:" block of the system prompt (or one "المسار X:" part of it)"""
+    number: int  # 0 = text before SECTION 1 (dialect rules)
+    title: str
+    text: str
+    tag: str = "core"
+    keywords: Tuple[str, ...] = ()
+    tokens: int = 0
+    part: str = ""  # "" = the whole section, or its intro if it was split into parts
+
+    @property
+    def key(self) -> str:
+        return f"{self.number}{self.part}"
+
+    @property
+    def always_on(self) -> bool:
+        return not self.keywords
+
+
+@dataclass
+class SectionSelection:
+    """Sections chosen for one turn"""
+    sections: List[PromptSection] = field(default_factory=list)
+    matched: Dict[str, str] = field(default_factory=dict)  # section key -> keyword that matched
+
+    @property
+    def text(self) -> str:
+        return "\n".join(s.text for s in self.sections)
+
+    @property
+    def tokens(self) -> int:
+        return sum(s.tokens for s in self.sections)
+
+    @property
+    def tags(self) -> List[str]:
+        return [s.tag for s in self.sections]
+
+
+def split_sections(instructions: str) -> List[PromptSection]:
+    """Split on the fenced "SECTION N: TITLE" headers; each section keeps its header"""
+    headers = list(_SECTION_HEADER.finditer(instructions))
+    if not headers:
+        return [PromptSection(0, "ALL", instructions)]
+
+    sections = [PromptSection(0, "PREAMBLE", instructions[:headers[0].start()])]
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(instructions)
+        sections.append(PromptSection(int(header.group(3)), header.group(2), instructions[header.start():end]))
+    return sections
+
+
+def split_parts(section: PromptSection) -> List[PromptSection]:
+    """Split a section on its boxed "المسار X:" headers; the first part is the section's intro"""
+    headers = list(_PART_HEADER.finditer(section.text))
+    if not headers:
+        return [section]
+
+    parts = [PromptSection(section.number, section.title, section.text[:headers[0].start()])]
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(section.text)
+        parts.append(PromptSection(section.number, section.title, section.text[header.start():end], part=header.group(1)))
+    return parts
+
+
+class PromptSectionIndex:
+    """
+    Keyword index from user transcripts to prompt sections
+
+    Selected sections stay selected for `sticky_turns` further turns, so multi-turn
+    flows (collecting name then phone) keep their rules after the keyword is gone.
+    """
+
+    def __init__(
+        self,
+        instructions: str,
+        sticky_turns: int = 1,
+        keywords: Optional[Dict] = None,
+        part_keywords: Optional[Dict] = None
+    ):
+        self.sticky_turns = sticky_turns
+        keywords = SECTION_KEYWORDS if keywords is None else keywords
+        part_keywords = SECTION_PART_KEYWORDS if part_keywords is None else part_keywords
+
+        self.sections: List[PromptSection] = []
+        for section in split_sections(instructions):
+            if section.number in keywords:
+                section.tag, words = keywords[section.number]
+                section.keywords = tuple(_normalize_keyword(w) for w in words)
+                self.sections.append(section)
+            elif section.number in part_keywords:
+                self.sections.extend(self._split_with_keywords(section, *part_keywords[section.number]))
+            else:
+                self.sections.append(section)
+        for section in self.sections:
+            section.tokens = count_tokens(section.text)
+
+        self.core = [s for s in self.sections if s.always_on]
+        self.optional = [s for s in self.sections if not s.always_on]
+        # Byte-stable static prefix: core sections in their original order
+        self.core_text = "".join(s.text for s in self.core)
+        self.core_tokens = count_tokens(self.core_text)
+        self.full_tokens = sum(s.tokens for s in self.sections)
+
+        self._last_selected: Dict[str, int] = {}  # section key -> turns left
+        self._turns = 0
+        self._selected_tokens = 0
+
+    @staticmethod
+    def _split_with_keywords(section: PromptSection, tag: str, parts: Dict) -> List[PromptSection]:
+        """Parts of a section with their keywords - the intro goes with any of them"""
+        intro, *rest = split_parts(section)
+        for part in rest:
+            if part.part in parts:
+                part.tag, words = parts[part.part]
+                part.keywords = tuple(_normalize_keyword(w) for w in words)
+        if rest:
+            intro.tag = tag
+            intro.keywords = tuple(dict.fromkeys(k for part in rest for k in part.keywords))
+        return [intro, *rest]
+
+    def match(self, transcript: str) -> Dict[str, str]:
+        """Section key -> first keyword found in the transcript"""
+        text = f" {normalize(transcript)} "
+        matched = {}
+        for section in self.optional:
+            for keyword in section.keywords:
+                if keyword in text:
+                    matched[section.key] = keyword
+                    break
+        return matched
+
+    def select(self, transcript: str, commit: bool = True) -> SectionSelection:
+        """
+        Pick the optional sections for this turn (keyword hits + sticky ones)
+
+        Args:
+            commit: False for a preview (speculative generation) - sticky state and stats are left untouched
+        """
+        matched = self.match(transcript) if transcript else {}
+
+        remaining = {key: left - 1 for key, left in self._last_selected.items() if left > 0}
+        for key in matched:
+            remaining[key] = self.sticky_turns
+
+        selection = SectionSelection(
+            sections=[s for s in self.optional if s.key in remaining],
+            matched=matched
+        )
+        if not commit:
+            return selection
+
+        self._last_selected = remaining
+        self._turns += 1
+        self._selected_tokens += self.core_tokens + selection.tokens
+        return selection
+
+    def reset(self):
+        self._last_selected = {}
+
+    def get_stats(self) -> dict:
+        avg = self._selected_tokens / self._turns if self._turns else self.core_tokens
+        return {
+            "turns": self._turns,
+            "full_tokens": self.full_tokens,
+            "core_tokens": self.core_tokens,
+            "avg_tokens": avg,
+            "reduction": self.full_tokens / avg if avg else 0.0,
+        }
@@ -0,0 +1,304 @@
+"""
+Speculative LLM
+Starts the LLM on a stable interim STT transcript, before the final transcript arrives
+
+When the user pauses, the interim transcript usually already holds the whole
+question, but the LLM only starts after the STT has finalized it. Here a
+speculative request is started as soon as an interim transcript has stayed
+unchanged for SPECULATION_STABLE_MS. Its output is buffered, never spoken: it
+is only handed to TTS (through the agent's llm_node) if the final transcript
+matches the speculated one closely enough, otherwise it is cancelled and the
+turn runs through the LLM as usual.
+
+Opt-in with SPECULATIVE_LLM=1 (switches the STT to streaming interim results).
+
+LiveKit's own preemptive_generation starts on the final (or STT preflight)
+transcript, so it hides end-of-turn detection but not STT finalization, and it
+runs the request through llm_node as a real turn. Here the request starts on
+interims and bypasses the per-turn logic of llm_node until it is claimed.
+
+Speculative requests go through the session LLM, so their metrics reach the
+session's metrics_collected handlers: pass them through session_metrics()
+first (discarded speculations are dropped, a claimed one reports the TTFT the
+user actually waited).
+"""
+
+import asyncio
+import difflib
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, List, Optional
+import logging
+
+from livekit.agents import llm
+
+from chat_history_manager import SLOT_ITEM_IDS
+from prompt_sections import normalize
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_LLM = os.getenv("SPECULATIVE_LLM", "0") == "1"
+SPECULATION_STABLE_MS = float(os.getenv("SPECULATION_STABLE_MS", "250"))
+SPECULATION_MATCH_THRESHOLD = float(os.getenv("SPECULATION_MATCH_THRESHOLD", "0.9"))
+SPECULATION_MAX_PER_TURN = int(os.getenv("SPECULATION_MAX_PER_TURN", "3"))
+
+# Interims shorter than this are too early to be worth a request
+MIN_SPECULATION_WORDS = 2
+
+
+def transcript_similarity(a: str, b: str) -> float:
+    """0-1 similarity of two transcripts after Arabic normalization"""
+    return difflib.SequenceMatcher(None, normalize(a), normalize(b)).ratio()
+
+
+def history_tail(chat_ctx: llm.ChatContext) -> Optional[str]:
+    """Id of the last history item before the user's message (slots ignored)"""
+    items = [item for item in chat_ctx.items if item.id not in SLOT_ITEM_IDS]
+    return items[-2].id if len(items) >= 2 else None
+
+
+class Speculation:
+    """One speculative LLM request; its chunks are buffered until claimed"""
+
+    def __init__(self, transcript: str, history_id: Optional[str]):
+        self.transcript = transcript
+        self.history_id = history_id
+        self.started_at = time.perf_counter()
+        self.first_chunk_at: Optional[float] = None
+        self.claimed_at: Optional[float] = None
+        self.request_id: Optional[str] = None
+        self.chunks: List[llm.ChatChunk] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    async def run(self, llm_instance: llm.LLM, chat_ctx: llm.ChatContext, tools: list):
+        try:
+            async with llm_instance.chat(chat_ctx=chat_ctx, tools=tools) as stream:
+                async for chunk in stream:
+                    if self.first_chunk_at is None:
+                        self.first_chunk_at = time.perf_counter()
+                        self.request_id = chunk.id
+                    self.chunks.append(chunk)
+                    self._changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._changed.set()
+
+    def cancel(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    @property
+    def waited_ttft(self) -> float:
+        """Time to first token after the claim (0 if it was already there)"""
+        if self.claimed_at is None or self.first_chunk_at is None:
+            return 0.0
+        return max(0.0, self.first_chunk_at - self.claimed_at)
+
+    async def replay(self) -> AsyncIterator[llm.ChatChunk]:
+        """Buffered chunks, then the rest as they arrive"""
+        index = 0
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    break
+                self._changed.clear()
+                if index == len(self.chunks) and not self.done:
+                    await self._changed.wait()
+            if self.error:
+                raise self.error
+        finally:
+            self.cancel()  # Interrupted while replaying
+
+
+class SpeculativeGenerator:
+    """
+    Runs at most one speculative request per user turn and hands it to llm_node
+
+    Wire on_transcript() to the session's user_input_transcribed event and call
+    claim() from llm_node with the final user message.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        llm_instance: llm.LLM,
+        stable_ms: float = SPECULATION_STABLE_MS,
+        threshold: float = SPECULATION_MATCH_THRESHOLD,
+        max_per_turn: int = SPECULATION_MAX_PER_TURN,
+    ):
+        """
+        Args:
+            agent: The VisualAwareAgent (prepares the chat context like llm_node does)
+            llm_instance: The session's LLM
+            stable_ms: An interim must stay unchanged this long to be speculated on
+            threshold: Minimum transcript similarity for the final to reuse a speculation
+            max_per_turn: Restarts allowed per user turn (each one is a paid request)
+        """
+        self.agent = agent
+        self.llm = llm_instance
+        self.stable_ms = stable_ms
+        self.threshold = threshold
+        self.max_per_turn = max_per_turn
+
+        self._current: Optional[Speculation] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._started_this_turn = 0
+        self._recent: deque = deque(maxlen=32)  # Started speculations, for tagging their metrics
+
+        self.started = 0
+        self.attempts = 0  # Turns that had a speculation when the final transcript came
+        self.hits = 0
+        self.saved_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Transcripts
+    # ------------------------------------------------------------------
+
+    def on_transcript(self, transcript: str, is_final: bool):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        if is_final:
+            # Drop a diverging speculation right away instead of at claim time
+            if self._current and transcript_similarity(self._current.transcript, transcript) < self.threshold:
+                self.attempts += 1
+                self._discard()
+            return
+
+        if len(transcript.split()) < MIN_SPECULATION_WORDS:
+            return
+        self._timer = asyncio.get_event_loop().call_later(
+            self.stable_ms / 1000, self._on_stable, transcript
+        )
+
+    def _on_stable(self, transcript: str):
+        self._timer = None
+        if self._current and transcript_similarity(self._current.transcript, transcript) >= self.threshold:
+            return  # The running speculation already covers it
+        if self._started_this_turn >= self.max_per_turn:
+            return
+
+        self._discard()
+        self._start(transcript)
+
+    def _start(self, transcript: str):
+        chat_ctx = self.agent.chat_ctx.copy()
+        chat_ctx.add_message(role="user", content=transcript)
+        self.agent.prepare_chat_ctx(chat_ctx, speculative=True)
+
+        speculation = Speculation(transcript, history_tail(chat_ctx))
+        speculation.task = asyncio.create_task(speculation.run(self.llm, chat_ctx, list(self.agent.tools)))
+        self._current = speculation
+        self._recent.append(speculation)
+        self._started_this_turn += 1
+        self.started += 1
+        logger.debug(f"🔮 Speculating on interim: {transcript[:60]}")
+
+    def _discard(self):
+        if self._current:
+            self._current.cancel()
+            self._current = None
+
+    # ------------------------------------------------------------------
+    # Commit
+    # ------------------------------------------------------------------
+
+    def claim(self, final_transcript: str, chat_ctx: llm.ChatContext) -> Optional[Speculation]:
+        """
+        The speculation for this turn if it matches the final transcript (None otherwise)
+
+        Called once per user turn from llm_node; any unclaimed speculation is cancelled.
+        """
+        speculation = self._end_turn()
+        if speculation is None:
+            return None
+
+        self.attempts += 1
+        similarity = transcript_similarity(speculation.transcript, final_transcript)
+        if similarity < self.threshold or speculation.history_id != history_tail(chat_ctx) or speculation.error:
+            speculation.cancel()
+            logger.debug(f"🔮 Speculation discarded (similarity {similarity:.2f})")
+            return None
+
+        # Saved time = how much of the LLM's time to first token was already spent before the final
+        now = time.perf_counter()
+        ahead = now - speculation.started_at
+        if speculation.first_chunk_at is not None:
+            ahead = min(ahead, speculation.first_chunk_at - speculation.started_at)
+        speculation.claimed_at = now
+        self.hits += 1
+        self.saved_seconds += ahead
+        logger.info(f"🔮 Speculation hit ({similarity:.2f}), {ahead * 1000:.0f}ms ahead")
+        return speculation
+
+    def cancel(self):
+        """Drop any pending speculation (e.g. the turn was answered from a cache) - not counted as an attempt"""
+        speculation = self._end_turn()
+        if speculation:
+            speculation.cancel()
+
+    def _end_turn(self) -> Optional[Speculation]:
+        """Reset the per-turn state; returns the turn's speculation (if any)"""
+        speculation, self._current = self._current, None
+        self._started_this_turn = 0
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        return speculation
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def session_metrics(self, m: Any) -> Optional[Any]:
+        """
+        Metrics as the session's reports should see them
+
+        None for a discarded speculative request; a claimed one gets the TTFT the
+        user actually waited after the final transcript; anything else unchanged.
+        """
+        if getattr(m, "type", None) != "llm_metrics":
+            return m
+        if m.request_id:
+            speculation = next((s for s in self._recent if s.request_id == m.request_id), None)
+        elif m.speech_id is None:
+            # No chunk, no speech: a speculation cancelled before its first token
+            # (every request of the agent's own replies carries its speech id)
+            return None
+        else:
+            speculation = None
+
+        if speculation is None:
+            return m
+        if speculation.claimed_at is None:
+            return None
+        return m.model_copy(update={"ttft": speculation.waited_ttft})
+
+    def get_stats(self) -> dict:
+        return {
+            "started": self.started,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "avg_saved_ms": self.saved_seconds / self.hits * 1000 if self.hits else 0.0,
+        }
+
+    def print_report(self):
+        stats = self.get_stats()
+        print(
+            f"🔮 Speculative LLM: {stats['hits']}/{stats['attempts']} turns reused ({stats['hit_rate']:.0%}), "
+            f"{stats['started']} requests started, ~{stats['avg_saved_ms']:.0f}ms saved per hit"
+        )
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Test script for Visual Context System
-Validates Pydantic models and VisualAwareAgent
+Validates visual context store, its Pydantic boundary models and VisualAwareAgent
 """
 
 import asyncio
@@ -11,7 +11,7 @@ from visual_aware_agent import VisualAwareAgent
 
 
 def test_visual_analysis():
-    """Test VisualAnalysis Pydantic model"""
+    """Test VisualAnalysis model"""
     print("\n" + "="*60)
     print("TEST 1: VisualAnalysis Model")
     print("="*60)
@@ -44,7 +44,7 @@ def test_visual_analysis():
 
 
 def test_visual_context_store():
-    """Test VisualContextStore Pydantic model"""
+    """Test VisualContextStore model"""
     print("\n" + "="*60)
     print("TEST 2: VisualContextStore Model")
     print("="*60)
@@ -85,6 +85,16 @@ def test_visual_context_store():
     print(f"\n📭 Get current (expired):")
     print(f"   Should be None: {current is None}")
 
+    # Channels are independent
+    store.update("Current person: Ahmad")
+    store.update("شخص يبتسم", channel="emotion")
+    store.update("مكتب مضاء جيداً", channel="scene")
+    snapshot = store.get_snapshot()
+    print(f"\n🗂️  Channels in render order: {[a.channel for a in snapshot]}")
+    if [a.channel for a in snapshot] != ["identity", "scene", "emotion"]:
+        print("❌ Unexpected channel order")
+        return False
+
     # Clear test
     store.update("New analysis")
     store.clear()
@@ -147,9 +157,9 @@ async def test_visual_aware_agent():
 
 
 def test_pydantic_validation():
-    """Test Pydantic validation"""
+    """Test construction validation and Pydantic boundary models"""
     print("\n" + "="*60)
-    print("TEST 4: Pydantic Validation")
+    print("TEST 4: Validation & Pydantic Boundary")
     print("="*60)
 
     try:
@@ -158,7 +168,7 @@ def test_pydantic_validation():
         print("❌ Should have raised validation error!")
         return False
     except Exception as e:
-        print(f"✅ Pydantic validation working: {type(e).__name__}")
+        print(f"✅ Construction validation working: {type(e).__name__}")
 
     try:
         # Test valid construction
@@ -168,6 +178,10 @@ def test_pydantic_validation():
         )
         print(f"✅ Valid construction works")
         print(f"   max_age_seconds type: {type(store.max_age_seconds)}")
+
+        store.update("أرى شخصًا يحمل كتاباً", confidence="high")
+        model = store.to_model()
+        print(f"✅ Pydantic snapshot: {model.model_dump_json()[:100]}...")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         return False
@@ -176,6 +190,148 @@ def test_pydantic_validation():
     return True
 
 
+def test_tool_output_order():
+    """Test that concurrent tool calls are put back in emission order"""
+    print("\n" + "="*60)
+    print("TEST 5: Concurrent Tool Call Order")
+    print("="*60)
+
+    from livekit.agents import llm
+
+    # LiveKit's layout for the second-pass request: A emitted first, B finished first,
+    # so calls and outputs are both in completion order
+    call_a = llm.FunctionCall(call_id="a", name="get_all_products", arguments="{}", created_at=100.0)
+    call_b = llm.FunctionCall(call_id="b", name="get_company_contact", arguments="{}", created_at=100.1)
+    out_a = llm.FunctionCallOutput(call_id="a", name="get_all_products", output="A", is_error=False)
+    out_b = llm.FunctionCallOutput(call_id="b", name="get_company_contact", output="B", is_error=False)
+
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content="شو منتجاتكم وكيف بتواصل معكم؟")
+    chat_ctx.items.extend([call_b, call_a, out_b, out_a])
+
+    VisualAwareAgent._order_tool_outputs(chat_ctx)
+    order = [(item.type, item.call_id) for item in chat_ctx.items[1:]]
+    expected = [("function_call", "a"), ("function_call", "b"),
+                ("function_call_output", "a"), ("function_call_output", "b")]
+    if order != expected:
+        print(f"❌ Wrong order: {order}")
+        return False
+    print(f"✅ Calls and outputs in emission order: {[call_id for _, call_id in order]}")
+
+    # A sequential call (its own step) keeps its place
+    call_c = llm.FunctionCall(call_id="c", name="search_knowledge_base", arguments="{}", created_at=99.0)
+    out_c = llm.FunctionCallOutput(call_id="c", name="search_knowledge_base", output="C", is_error=False)
+    chat_ctx.items[1:1] = [call_c, out_c]
+    VisualAwareAgent._order_tool_outputs(chat_ctx)
+    order = [item.call_id for item in chat_ctx.items[1:]]
+    if order != ["c", "c", "a", "b", "a", "b"]:
+        print(f"❌ Wrong order with an earlier step: {order}")
+        return False
+    print("✅ Earlier tool step left in place")
+
+    print("\n✅ Tool call order test passed!")
+    return True
+
+
+def test_answer_cache_entities():
+    """Test that near-duplicate questions about different things don't share answers"""
+    print("\n" + "="*60)
+    print("TEST 6: Answer Cache Near-Duplicates")
+    print("="*60)
+
+    from answer_cache import AnswerCache
+
+    cache = AnswerCache(threshold=0.9)
+    pairs = [
+        ("how much is the 2D animation course", "how much is the 3D animation course"),
+        ("price of the video editing course", "price of the video editing course online"),
+        ("شو مدة دورة الذكاء الاصطناعي", "شو مدة دورة الذكاء الاصطناعي المتقدمة"),
+    ]
+    for cached, other in pairs:
+        cache.store(cached, f"answer for: {cached}")
+        hit = cache.lookup(other)
+        if hit:
+            print(f"❌ '{other}' served the answer for '{hit.question}' ({hit.similarity:.3f})")
+            return False
+        if not cache.lookup(cached + "?"):
+            print(f"❌ '{cached}' missed its own answer")
+            return False
+    print("✅ Different courses, modifiers and versions are separate entries")
+
+    # Rephrasings of the same question still hit
+    cache.store("شو الدورات يلي عندكم؟", "الدورات: ...")
+    hit = cache.lookup("شو هي الدورات عندكم")
+    if not hit:
+        print("❌ Rephrased question missed")
+        return False
+    print(f"✅ Rephrasing hit '{hit.question}' ({hit.similarity:.3f})")
+
+    print("\n✅ Answer cache test passed!")
+    return True
+
+
+async def test_vision_backoff_recovery():
+    """Test that the capture cadence recovers after throttling when the scene stays static"""
+    print("\n" + "="*60)
+    print("TEST 7: Vision Backoff Recovery")
+    print("="*60)
+
+    import numpy as np
+    from vision_backends import VisionBackend, VisionDescription
+    from vision_processor import FrameAdapter, VisionProcessor
+
+    class StaticBackend(VisionBackend):
+        name = "test"
+
+        async def describe(self, image_bytes, prompt):
+            return VisionDescription("شخص أمام الكاميرا", tokens=10, backend=self.name)
+
+    class Limiter:
+        """Grants the first call, throttles the next three, then has tokens again"""
+        def __init__(self):
+            self.grants = [True, False, False, False]
+
+        def try_acquire(self, budget=None):
+            return self.grants.pop(0) if self.grants else True
+
+        def release(self, budget=None, tokens=0):
+            pass
+
+    def make_frame(value):
+        frame = FrameAdapter()
+        frame.width, frame.height = 64, 48
+        frame.rgba = np.full((48, 64, 4), value, dtype=np.uint8)
+        return frame
+
+    # Scene A, then scene B (throttled 3x, then described) and B stays static
+    frames = [make_frame(20)] + [make_frame(200) for _ in range(12)]
+    processor = VisionProcessor(rate_limiter=Limiter(), backend=StaticBackend())
+    processor.analysis_interval = 0.001
+    backoffs = []
+
+    async def capture(video_track):
+        if not frames:
+            processor.stop()
+            return None
+        backoffs.append(processor.backoff)
+        return frames.pop(0)
+
+    processor.capture_frame_from_track = capture
+    await processor.start_continuous_analysis(video_track=None)
+
+    print(f"   Backoff per cycle: {backoffs}")
+    if max(backoffs) < 8.0:
+        print("❌ Throttling didn't slow the cadence")
+        return False
+    if processor.backoff != 1.0:
+        print(f"❌ Cadence stuck at x{processor.backoff:.0f} on a static scene")
+        return False
+    print("✅ Throttled to x8, back to x1 while the scene stayed static")
+
+    print("\n✅ Vision backoff test passed!")
+    return True
+
+
 async def main():
     """Run all tests"""
     print("\n" + "="*60)
@@ -189,6 +345,9 @@ async def main():
     results.append(("VisualContextStore", test_visual_context_store()))
     results.append(("VisualAwareAgent", await test_visual_aware_agent()))
     results.append(("Pydantic Validation", test_pydantic_validation()))
+    results.append(("Tool Call Order", test_tool_output_order()))
+    results.append(("Answer Cache Near-Duplicates", test_answer_cache_entities()))
+    results.append(("Vision Backoff Recovery", await test_vision_backoff_recovery()))
 
     # Summary
     print("\n" + "="*60)
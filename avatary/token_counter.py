@@ -0,0 +1,44 @@
+"""
+Token Counter
+Counts tokens the way the target model does (tiktoken), with an offline fallback
+"""
+
+import math
+from functools import lru_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# gpt-4o / gpt-4o-mini tokenizer
+DEFAULT_ENCODING = "o200k_base"
+
+# Fallback when tiktoken (or its encoding file) is unavailable.
+# Mixed Arabic/English prompts average roughly 3 characters per token on o200k_base.
+FALLBACK_CHARS_PER_TOKEN = 3.0
+
+
+@lru_cache(maxsize=4)
+def _get_encoding(name: str):
+    """Load a tiktoken encoding once - returns None if it can't be loaded"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"⚠️  tiktoken encoding '{name}' unavailable ({e}) - using estimate")
+        return None
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    """Number of tokens in `text` for the target model (estimated if no tokenizer)"""
+    if not text:
+        return 0
+
+    enc = _get_encoding(encoding)
+    if enc is None:
+        return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def is_exact(encoding: str = DEFAULT_ENCODING) -> bool:
+    """Whether count_tokens() uses the real tokenizer"""
+    return _get_encoding(encoding) is not None
@@ -0,0 +1,167 @@
+"""
+Tool Cache
+Process-wide TTL cache for tool results (used for tools registered with a cache_ttl)
+
+The static knowledge base listings (products, training programs, contact) change
+maybe weekly, but every tool call went to Supabase. Results are kept for the
+tool's TTL; after that the stale result is still served (for up to
+TOOL_CACHE_STALE_TTL) while one background refresh fetches the new one, so
+callers never wait on the network once the cache is warm. Only successful
+results are cached. A cold miss is computed once per key - concurrent callers
+wait for it instead of all querying Supabase - and everything is dropped when
+the knowledge base content changes (invalidate() is subscribed to kb_watcher).
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "3600"))
+TOOL_CACHE_STALE_TTL = float(os.getenv("TOOL_CACHE_STALE_TTL", "86400"))
+
+
+@dataclass
+class CacheEntry:
+    value: Dict[str, Any]
+    fetched_at: float
+    ttl: float
+    compute: Callable[[], Dict[str, Any]]
+
+
+def cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Tool name, plus the arguments if there are any"""
+    if not arguments:
+        return tool_name
+    return f"{tool_name}:{json.dumps(arguments, ensure_ascii=False, sort_keys=True)}"
+
+
+class ToolResultCache:
+    """
+    TTL + stale-while-revalidate cache, safe to use from the tool worker threads
+    """
+
+    def __init__(self, ttl: float = TOOL_CACHE_TTL, stale_ttl: float = TOOL_CACHE_STALE_TTL):
+        """
+        Args:
+            ttl: Default seconds a result is fresh
+            stale_ttl: Seconds a result may still be served (while refreshing) - after that callers wait
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}  # Single-flight compute per key
+        self._generation = 0  # Bumped by invalidate() - results computed before it are not stored
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result if servable (a stale one schedules a background refresh), else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            age = time.monotonic() - entry.fetched_at
+            if age < entry.ttl:
+                self.hits += 1
+                return entry.value
+            if age >= self.stale_ttl:
+                return None
+
+            self.stale_hits += 1
+            if key not in self._refreshing:
+                self._refreshing.add(key)
+                threading.Thread(target=self._refresh, args=(key, entry), daemon=True).start()
+            return entry.value
+
+    def get(self, key: str, compute: Callable[[], Dict[str, Any]], ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Cached result, or compute() now (blocking, once per key) and cache it for ttl seconds"""
+        value = self.peek(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.peek(key)  # Computed by the caller we waited for
+            if value is not None:
+                return value
+
+            with self._lock:
+                self.misses += 1
+                generation = self._generation
+            value = compute()
+            self._store(key, value, compute, ttl or self.ttl, generation)
+        return value
+
+    def _store(
+        self,
+        key: str,
+        value: Dict[str, Any],
+        compute: Callable[[], Dict[str, Any]],
+        ttl: float,
+        generation: int,
+    ):
+        if not value.get("success"):
+            return  # Don't pin an error for a whole TTL
+        with self._lock:
+            if generation != self._generation:
+                return  # Invalidated while computing - may be the old content
+            self._entries[key] = CacheEntry(value, time.monotonic(), ttl, compute)
+
+    def _refresh(self, key: str, entry: CacheEntry):
+        try:
+            with self._lock:
+                generation = self._generation
+            value = entry.compute()
+            self._store(key, value, entry.compute, entry.ttl, generation)
+            with self._lock:
+                self.refreshes += 1
+            if not value.get("success"):
+                logger.warning(f"⚠️  Refresh of {key} failed - keeping the stale result")
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"⚠️  Refresh of {key} failed ({e}) - keeping the stale result")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, tool_name: Optional[str] = None):
+        """Drop a tool's cached results (or all of them) - the next call fetches them again"""
+        with self._lock:
+            self._generation += 1
+            if tool_name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k == tool_name or k.startswith(f"{tool_name}:")]:
+                del self._entries[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+            }
+
+
+# Global instance
+tool_cache = ToolResultCache()
@@ -0,0 +1,200 @@
+"""
+Tool Executor
+Dispatches tool calls through the tool registry: off the event loop, with timeouts, caching and barge-in cancellation
+
+The tool handlers do synchronous Supabase HTTP requests. Called directly from
+an async tool wrapper they block the event loop - and with it audio in/out -
+for the whole query. Here sync handlers run on a small dedicated thread pool;
+the agent only awaits the result, gives up after the tool's timeout, and stops
+waiting as soon as the user interrupts the reply.
+
+When the LLM asks for several tools in one turn they run concurrently, at most
+TOOL_MAX_CONCURRENCY_PER_TURN at a time; tools that write customer records run
+one after another, since each of them saves the user first.
+
+Write tools are never dropped on barge-in, and their timeout doesn't report a
+failure: the worker thread usually still commits the row, and a retry would
+create a duplicate inquiry or booking. The LLM is told the outcome is unknown
+and not to call the tool again.
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from tool_cache import cache_key, tool_cache
+from tool_registry import ToolSpec, tool_registry
+
+logger = logging.getLogger(__name__)
+
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "4"))
+TOOL_MAX_CONCURRENCY_PER_TURN = int(os.getenv("TOOL_MAX_CONCURRENCY_PER_TURN", "3"))
+
+# Separate from the default executor, so slow tools can't starve other to_thread users
+_executor = ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_WORKERS, thread_name_prefix="mcp-tool")
+
+
+class TurnLimiter:
+    """Concurrency cap for the tool calls of one LLM turn"""
+
+    def __init__(self, max_concurrency: int = TOOL_MAX_CONCURRENCY_PER_TURN):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._write_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def slot(self, tool_name: str):
+        spec = tool_registry.get(tool_name)
+        if spec and spec.writes:
+            async with self._write_lock, self._semaphore:
+                yield
+        else:
+            async with self._semaphore:
+                yield
+
+
+# One limiter per reply (SpeechHandle) - the tools LiveKit starts for the same LLM turn share it
+_turn_limiters: "weakref.WeakKeyDictionary[Any, TurnLimiter]" = weakref.WeakKeyDictionary()
+
+
+def turn_limiter(speech_handle: Any) -> TurnLimiter:
+    limiter = _turn_limiters.get(speech_handle)
+    if limiter is None:
+        limiter = _turn_limiters[speech_handle] = TurnLimiter()
+    return limiter
+
+
+def _run_handler_sync(spec: ToolSpec, arguments: Dict[str, Any], loop: asyncio.AbstractEventLoop) -> Dict[str, Any]:
+    """Handler call from a worker thread (async handlers are run on the event loop)"""
+    if spec.is_async:
+        return asyncio.run_coroutine_threadsafe(spec.handler(arguments), loop).result()
+    return spec.handler(arguments)
+
+
+async def _call(spec: ToolSpec, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    if spec.cache_ttl:
+        key = cache_key(spec.name, arguments)
+        compute = lambda: _run_handler_sync(spec, arguments, loop)
+        return await loop.run_in_executor(_executor, tool_cache.get, key, compute, spec.cache_ttl)
+    if spec.is_async:
+        return await spec.handler(arguments)
+    return await loop.run_in_executor(_executor, spec.handler, arguments)
+
+
+async def execute_tool(tool_name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run a registered tool (dict lookup) and record its latency, errors and payload size
+
+    A timeout returns an error result (like any other tool failure) so the LLM can
+    answer without it. Cancelling the caller stops the wait; a worker thread
+    finishes its request in the background and the result is dropped.
+    """
+    spec = tool_registry.get(tool_name)
+    if spec is None:
+        return {"success": False, "error": f"أداة غير معروفة: {tool_name}. Unknown tool: {tool_name}"}
+
+    start = time.perf_counter()
+    if spec.cache_ttl:
+        cached = tool_cache.peek(cache_key(tool_name, arguments))
+        if cached is not None:
+            tool_registry.record(tool_name, time.perf_counter() - start, cached, cache_hit=True)
+            return cached  # No thread hop needed
+
+    timeout = timeout or spec.timeout
+    timed_out = False
+    try:
+        result = await asyncio.wait_for(_call(spec, arguments), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️  Tool {tool_name} timed out after {timeout:.1f}s")
+        timed_out = True
+        if spec.writes:
+            result = {
+                "success": False,
+                "outcome_unknown": True,
+                "error": (
+                    "الطلب قيد المعالجة وقد يكون حُفظ. The request is still being processed and may already be saved - "
+                    "do NOT call this tool again; tell the customer the team will confirm it."
+                )
+            }
+        else:
+            result = {
+                "success": False,
+                "error": f"انتهت مهلة الأداة. Tool timed out after {timeout:.1f}s - answer from your instructions."
+            }
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": f"خطأ في تنفيذ الأداة: {str(e)}. Tool execution error: {str(e)}"
+        }
+
+    elapsed = time.perf_counter() - start
+    tool_registry.record(tool_name, elapsed, result, timed_out=timed_out)
+    logger.debug(f"🔧 {tool_name}: {elapsed * 1000:.0f}ms")
+    return result
+
+
+async def execute_tool_interruptible(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    speech_handle: Any = None,
+    timeout: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    execute_tool that is abandoned when the user barges in
+
+    Args:
+        speech_handle: The reply's SpeechHandle (RunContext.speech_handle)
+
+    Returns:
+        The tool result, or None if the reply was interrupted first
+    """
+    if speech_handle is None:
+        return await execute_tool(tool_name, arguments, timeout)
+
+    async def run():
+        async with turn_limiter(speech_handle).slot(tool_name):
+            return await execute_tool(tool_name, arguments, timeout)
+
+    task = asyncio.ensure_future(run())
+    spec = tool_registry.get(tool_name)
+    if spec and spec.writes:
+        # Half-done writes are worse than a late reply: finish even if the user barges in
+        return await asyncio.shield(task)
+    if not speech_handle.allow_interruptions:
+        return await task
+
+    try:
+        await speech_handle.wait_if_not_interrupted([task])
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+    if speech_handle.interrupted:
+        task.cancel()
+        logger.info(f"🛑 Tool {tool_name} cancelled - user interrupted")
+        return None
+    return task.result()
+
+
+async def execute_tools(
+    calls: Sequence[Tuple[str, Dict[str, Any]]],
+    max_concurrency: int = TOOL_MAX_CONCURRENCY_PER_TURN,
+) -> List[Dict[str, Any]]:
+    """
+    Run several tool calls of one turn concurrently
+
+    Returns:
+        Results in the same order as `calls` (not completion order)
+    """
+    limiter = TurnLimiter(max_concurrency)
+
+    async def run(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        async with limiter.slot(tool_name):
+            return await execute_tool(tool_name, arguments)
+
+    return list(await asyncio.gather(*(run(name, arguments) for name, arguments in calls)))
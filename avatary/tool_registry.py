@@ -0,0 +1,312 @@
+"""
+Tool Registry
+Every local tool (knowledge base, inquiries, consultations, training) registered once, with its policies
+
+Tool modules (TOOL_MODULES) register each tool with its JSON schema, handler,
+timeout and cache policy; dispatch is a dict lookup by name (see tool_executor).
+A deployment picks its tools with ENABLED_TOOLS (comma-separated names, or
+"all") - the default is the knowledge base tools the agent always had.
+
+The agent-facing wrappers are compiled from the schemas once per process (in
+the worker's prewarm, or on first use) and the same list is handed to every job.
+Per-tool latency, error rate, payload size and result tokens are recorded for every call.
+"""
+
+import importlib
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from livekit.agents import RunContext, function_tool
+from livekit.agents.llm import FunctionTool
+
+from workflow_analyzer import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Modules that register tools on import
+TOOL_MODULES = ("local_mcp_server", "local_mcp_server_full")
+
+DEFAULT_ENABLED_TOOLS = "search_knowledge_base,get_all_products,get_all_training_programs,get_company_contact"
+ENABLED_TOOLS = os.getenv("ENABLED_TOOLS", DEFAULT_ENABLED_TOOLS)
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "8"))
+# Write tools commit their row even after we stop waiting - give them time to finish
+WRITE_TOOL_TIMEOUT_SECONDS = float(os.getenv("WRITE_TOOL_TIMEOUT_SECONDS", "30"))
+
+JSON_TYPES = {
+    "string": str, "integer": int, "number": float,
+    "boolean": bool, "array": list, "object": dict,
+}
+
+
+@dataclass
+class ToolSpec:
+    """A registered tool"""
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: Callable[[Dict[str, Any]], Any]  # arguments -> result dict (sync handlers run on the tool thread pool)
+    timeout: float = TOOL_TIMEOUT_SECONDS
+    cache_ttl: Optional[float] = None  # Seconds results are fresh in tool_cache (None = not cached)
+    writes: bool = False  # Writes customer records - never runs alongside another write in the same turn
+    projection: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None  # Result -> what the LLM needs (tool_results)
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.handler)
+
+    def definition(self) -> Dict[str, Any]:
+        """MCP-style definition (name, description, inputSchema)"""
+        return {"name": self.name, "description": self.description, "inputSchema": self.input_schema}
+
+
+@dataclass
+class ToolMetrics:
+    """Per-tool call statistics"""
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cache_hits: int = 0
+    payload_bytes: int = 0
+    shaped: int = 0  # Results formatted for the LLM
+    raw_tokens: int = 0  # ... as json.dumps(result) would have sent them
+    llm_tokens: int = 0  # ... as actually sent
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def record(self, seconds: float, result: Dict[str, Any], cache_hit: bool = False, timed_out: bool = False):
+        self.calls += 1
+        self.latency.add(seconds)
+        self.payload_bytes += len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        if not result.get("success", False):
+            self.errors += 1
+        self.timeouts += timed_out
+        self.cache_hits += cache_hit
+
+    def record_tokens(self, raw_tokens: int, llm_tokens: int):
+        self.shaped += 1
+        self.raw_tokens += raw_tokens
+        self.llm_tokens += llm_tokens
+
+    def get_summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "avg_payload_bytes": self.payload_bytes / self.calls if self.calls else 0.0,
+            "p50": self.latency.percentile(50),
+            "p95": self.latency.percentile(95),
+            "avg_raw_tokens": self.raw_tokens / self.shaped if self.shaped else 0.0,
+            "avg_llm_tokens": self.llm_tokens / self.shaped if self.shaped else 0.0,
+        }
+
+
+def schema_parameters(schema: Dict[str, Any]) -> Tuple[List[inspect.Parameter], Dict[str, type]]:
+    """Keyword-only parameters and annotations for a JSON-schema "object" input"""
+    params = []
+    annotations = {}
+    required = set(schema.get("required", []))
+
+    for name, details in schema.get("properties", {}).items():
+        py_type = JSON_TYPES.get(details.get("type", "string"), str)
+        annotations[name] = py_type
+        params.append(inspect.Parameter(
+            name=name,
+            kind=inspect.Parameter.KEYWORD_ONLY,
+            annotation=py_type,
+            default=inspect.Parameter.empty if name in required else None
+        ))
+
+    return params, annotations
+
+
+def build_agent_tool(tool: Dict[str, Any]) -> FunctionTool:
+    """function_tool for one definition: runs off the event loop, dropped on barge-in, returns JSON"""
+    from tool_executor import execute_tool_interruptible
+    from tool_results import format_result
+
+    name = tool["name"]
+    params, annotations = schema_parameters(tool["inputSchema"])
+
+    async def tool_fn(context: RunContext, **kwargs):
+        print(f"\nاستدعاء أداة: {name} - Calling tool")
+        print(f"   Parameters: {kwargs}")
+        # Off the event loop (audio keeps flowing), with a timeout; dropped on barge-in
+        result = await execute_tool_interruptible(name, kwargs, context.speech_handle)
+        if result is None:
+            return None
+        print(f"   Result: {result.get('success', False)}")
+        return format_result(name, result)
+
+    context_param = inspect.Parameter("context", inspect.Parameter.KEYWORD_ONLY, annotation=RunContext)
+    tool_fn.__signature__ = inspect.Signature(parameters=[*params, context_param])
+    tool_fn.__name__ = name
+    tool_fn.__doc__ = tool["description"]
+    tool_fn.__annotations__ = {"return": str, "context": RunContext, **annotations}
+
+    return function_tool()(tool_fn)
+
+
+def build_plain_function(tool: Dict[str, Any]) -> Callable:
+    """async (**kwargs) -> result dict, for callers outside an agent session"""
+    from tool_executor import execute_tool
+
+    name = tool["name"]
+
+    async def tool_function(**kwargs):
+        """Dynamically created tool function"""
+        return await execute_tool(name, kwargs)
+
+    tool_function.__name__ = name
+    tool_function.__doc__ = tool["description"]
+    return tool_function
+
+
+class ToolRegistry:
+    """All registered tools; the enabled subset is what agents get and what dispatch accepts"""
+
+    def __init__(self, modules: Tuple[str, ...] = TOOL_MODULES, enabled: str = ENABLED_TOOLS):
+        """
+        Args:
+            modules: Modules imported (once) to register their tools
+            enabled: Comma-separated tool names, or "all"
+        """
+        self.modules = modules
+        self.enabled = enabled
+        self._specs: Dict[str, ToolSpec] = {}
+        self._loaded = False
+        self.metrics: Dict[str, ToolMetrics] = {}
+
+        self._agent_tools: Optional[List[FunctionTool]] = None
+        self._plain_functions: Optional[Dict[str, Callable]] = None
+        self.build_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(self, spec: ToolSpec) -> ToolSpec:
+        existing = self._specs.get(spec.name)
+        if existing and existing.handler.__qualname__ != spec.handler.__qualname__:
+            logger.warning(f"⚠️  Tool {spec.name} registered twice - keeping the last one")
+        self._specs[spec.name] = spec
+        return spec
+
+    def tool(self, definition: Dict[str, Any], **policy):
+        """Decorator: register a handler for an MCP-style definition (policy: timeout, cache_ttl, writes, projection)"""
+        if policy.get("writes") and "timeout" not in policy:
+            policy["timeout"] = WRITE_TOOL_TIMEOUT_SECONDS
+
+        def decorator(handler):
+            self.register(ToolSpec(
+                name=definition["name"],
+                description=definition["description"],
+                input_schema=definition["inputSchema"],
+                handler=handler,
+                **policy
+            ))
+            return handler
+        return decorator
+
+    def load(self):
+        """Import the tool modules (each registers its tools)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        for module in self.modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                logger.warning(f"⚠️  Tool module {module} not loaded: {e}")
+
+        unknown = self.enabled_names - set(self._specs)
+        if unknown:
+            logger.warning(f"⚠️  ENABLED_TOOLS lists unknown tools: {', '.join(sorted(unknown))}")
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    @property
+    def enabled_names(self) -> set:
+        if self.enabled.strip().lower() == "all":
+            return set(self._specs)
+        return {name.strip() for name in self.enabled.split(",") if name.strip()}
+
+    @property
+    def specs(self) -> Dict[str, ToolSpec]:
+        """Enabled tools, in registration order"""
+        self.load()
+        enabled = self.enabled_names
+        return {name: spec for name, spec in self._specs.items() if name in enabled}
+
+    def get(self, name: str, enabled_only: bool = True) -> Optional[ToolSpec]:
+        self.load()
+        spec = self._specs.get(name)
+        if spec is None or (enabled_only and name not in self.enabled_names):
+            return None
+        return spec
+
+    @property
+    def definitions(self) -> List[Dict[str, Any]]:
+        return [spec.definition() for spec in self.specs.values()]
+
+    # ------------------------------------------------------------------
+    # Agent wrappers (built once per process)
+    # ------------------------------------------------------------------
+
+    def agent_tools(self) -> List[FunctionTool]:
+        """Decorated tools for Agent(tools=...) - the same objects for every job"""
+        if self._agent_tools is None:
+            start = time.perf_counter()
+            self._agent_tools = [build_agent_tool(tool) for tool in self.definitions]
+            self.build_seconds += time.perf_counter() - start
+            logger.info(f"🔧 Built {len(self._agent_tools)} agent tools in {self.build_seconds * 1000:.1f}ms")
+        return list(self._agent_tools)
+
+    def plain_functions(self) -> Dict[str, Callable]:
+        """Tool name -> async function returning the result dict"""
+        if self._plain_functions is None:
+            self._plain_functions = {tool["name"]: build_plain_function(tool) for tool in self.definitions}
+        return self._plain_functions
+
+    def warm(self):
+        """Build everything now (call from the worker's prewarm)"""
+        self.agent_tools()
+        self.plain_functions()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def record(self, name: str, seconds: float, result: Dict[str, Any], cache_hit: bool = False, timed_out: bool = False):
+        self.metrics.setdefault(name, ToolMetrics()).record(seconds, result, cache_hit, timed_out)
+
+    def record_tokens(self, name: str, raw_tokens: int, llm_tokens: int):
+        self.metrics.setdefault(name, ToolMetrics()).record_tokens(raw_tokens, llm_tokens)
+
+    def get_metrics_summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: metrics.get_summary() for name, metrics in self.metrics.items()}
+
+    def print_metrics(self):
+        if not self.metrics:
+            return
+        print("\n🔧 TOOL CALLS")
+        print(f"   {'tool':28s} {'calls':>5s} {'errors':>6s} {'p50':>7s} {'p95':>7s} {'payload':>8s} {'tokens (raw → LLM)':>18s}")
+        for name, summary in self.get_metrics_summary().items():
+            print(
+                f"   {name:28s} {summary['calls']:5d} {summary['error_rate']:6.0%} "
+                f"{summary['p50'] * 1000:5.0f}ms {summary['p95'] * 1000:5.0f}ms "
+                f"{summary['avg_payload_bytes']:6.0f} B "
+                f"{summary['avg_raw_tokens']:9.0f} → {summary['avg_llm_tokens']:<6.0f}"
+                + (f"  ({summary['cache_hits']} cached)" if summary['cache_hits'] else "")
+            )
+
+
+# Global instance
+tool_registry = ToolRegistry()
@@ -0,0 +1,70 @@
+"""
+Tool Results
+Shapes tool results before they go back to the LLM: per-tool projections, compact JSON
+
+Tool handlers return verbose dicts: a bilingual "message", counts the model can
+see for itself, whole database rows for the write tools, and the same "type"
+key repeated on every search result. json.dumps() then escapes every Arabic
+character to \\uXXXX (about 6 chars, often 2+ tokens, per letter). All of it is
+fed back to the LLM for the second pass of the turn.
+
+Here a result is reduced to what the model needs to answer - the tool's
+projection (registered with the tool, see tool_registry), minus the
+bookkeeping keys and empty values - and serialized without ASCII escaping or
+whitespace. Errors become {"error": ...}. The token counts before and after
+are recorded per tool (tool_registry.print_metrics).
+
+TOOL_RESULT_SHAPING=0 sends the handlers' results as before.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+from token_counter import count_tokens
+from tool_registry import ToolSpec, tool_registry
+
+TOOL_RESULT_SHAPING = os.getenv("TOOL_RESULT_SHAPING", "1") == "1"
+
+# Keys the model doesn't need: success is implied by the absence of "error",
+# counts by the lists themselves, and the reply is the model's to write
+BOOKKEEPING_KEYS = ("success", "message", "count", "total_results")
+
+
+def compact(value: Any) -> Any:
+    """value without None / empty strings, lists and dicts (recursively)"""
+    if isinstance(value, dict):
+        items = ((k, compact(v)) for k, v in value.items())
+        return {k: v for k, v in items if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in (compact(v) for v in value) if v not in (None, "", [], {})]
+    return value
+
+
+def shape(result: Dict[str, Any], spec: Optional[ToolSpec] = None) -> Dict[str, Any]:
+    """The part of a tool result the LLM needs"""
+    if not result.get("success", False):
+        return {"error": result.get("error", "Tool failed")}
+
+    shaped = spec.projection(result) if spec and spec.projection else result
+    shaped = compact({k: v for k, v in shaped.items() if k not in BOOKKEEPING_KEYS})
+    if not shaped and result.get("message"):
+        return {"message": result["message"]}  # e.g. "no results" - the message is all there is
+    return shaped
+
+
+def serialize(result: Dict[str, Any]) -> str:
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_result(tool_name: str, result: Dict[str, Any]) -> str:
+    """Tool output text for the LLM (records raw vs. shaped token counts)"""
+    raw = json.dumps(result)
+    if not TOOL_RESULT_SHAPING:
+        return raw
+
+    spec = tool_registry.get(tool_name, enabled_only=False)
+    text = serialize(shape(result, spec))
+    if spec is not None:
+        tool_registry.record_tokens(tool_name, count_tokens(raw), count_tokens(text))
+    return text
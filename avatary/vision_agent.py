@@ -4,7 +4,7 @@ Standalone module for analyzing user video and extracting visual context
 """
 
 import asyncio
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional, Set
 from livekit import rtc
 from vision_processor import VisionProcessor
 import logging
@@ -13,6 +13,103 @@ import time
 logger = logging.getLogger(__name__)
 
 
+class CameraTrackWatcher:
+    """
+    Event-driven discovery of remote camera tracks
+
+    Subscribes to camera publications as soon as they appear and reports
+    subscribed/lost tracks through callbacks, instead of polling the room.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        on_track: Callable[[rtc.RemoteVideoTrack, rtc.RemoteParticipant, float], None],
+        on_track_lost: Optional[Callable[[str, rtc.RemoteParticipant], None]] = None,
+    ):
+        """
+        Args:
+            room: Room to watch
+            on_track: Called with (track, participant, published_at) once a camera track is subscribed.
+                      published_at is a time.monotonic() timestamp of when the camera was first seen.
+            on_track_lost: Called with (track_sid, participant) when the camera track goes away
+        """
+        self.room = room
+        self.on_track = on_track
+        self.on_track_lost = on_track_lost
+        self.published_at: Dict[str, float] = {}
+        self._active: Set[str] = set()
+
+    def start(self):
+        """Register room handlers and pick up cameras published before we started"""
+        self.room.on("track_published", self._on_track_published)
+        self.room.on("track_subscribed", self._on_track_subscribed)
+        self.room.on("track_unsubscribed", self._on_track_unsubscribed)
+        self.room.on("track_unpublished", self._on_track_unpublished)
+
+        for participant in self.room.remote_participants.values():
+            for pub in participant.track_publications.values():
+                self._on_track_published(pub, participant)
+                if pub.track:
+                    self._on_track_subscribed(pub.track, pub, participant)
+
+    def stop(self):
+        """Unregister room handlers"""
+        self.room.off("track_published", self._on_track_published)
+        self.room.off("track_subscribed", self._on_track_subscribed)
+        self.room.off("track_unsubscribed", self._on_track_unsubscribed)
+        self.room.off("track_unpublished", self._on_track_unpublished)
+        self._active.clear()
+
+    @staticmethod
+    def _is_camera(pub: rtc.TrackPublication) -> bool:
+        return pub.source == rtc.TrackSource.SOURCE_CAMERA
+
+    def _on_track_published(self, pub: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+        if not self._is_camera(pub):
+            return
+
+        self.published_at.setdefault(pub.sid, time.monotonic())
+        if not pub.subscribed:
+            logger.info(f"📡 Subscribing to camera of {participant.identity}")
+            pub.set_subscribed(True)
+
+    def _on_track_subscribed(
+        self,
+        track: rtc.Track,
+        pub: rtc.RemoteTrackPublication,
+        participant: rtc.RemoteParticipant,
+    ):
+        if not self._is_camera(pub) or pub.sid in self._active:
+            return
+
+        self._active.add(pub.sid)
+        published_at = self.published_at.setdefault(pub.sid, time.monotonic())
+        logger.info(f"📹 Camera track subscribed: {participant.identity} ({pub.sid})")
+        self.on_track(track, participant, published_at)
+
+    def _on_track_unsubscribed(
+        self,
+        track: rtc.Track,
+        pub: rtc.RemoteTrackPublication,
+        participant: rtc.RemoteParticipant,
+    ):
+        self._track_gone(pub, participant)
+
+    def _on_track_unpublished(self, pub: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+        self._track_gone(pub, participant)
+        self.published_at.pop(pub.sid, None)
+
+    def _track_gone(self, pub: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+        if pub.sid not in self._active:
+            return
+
+        self._active.discard(pub.sid)
+        logger.info(f"📴 Camera track gone: {participant.identity} ({pub.sid})")
+        if self.on_track_lost:
+            self.on_track_lost(pub.sid, participant)
+
+
 class VisionAgent:
     """Manages video track monitoring and visual analysis"""
 
@@ -22,60 +119,42 @@ class VisionAgent:
         self.latest_analysis: Optional[str] = None
         self.last_update: Optional[float] = None
         self.callback: Optional[Callable] = None
+        self.watcher: Optional[CameraTrackWatcher] = None
+        self.video_track_sid: Optional[str] = None
 
     async def start_monitoring(self, room: rtc.Room, callback: Callable[[str], None]):
-        """Start monitoring for user video tracks and analyze them"""
+        """Start analysing the first user camera track as soon as it is subscribed"""
         self.callback = callback
 
-        print("👁️  Vision Agent: Starting video track monitoring...")
+        print("👁️  Vision Agent: Watching for camera tracks...")
         print(f"    Room: {room.name}")
-        print(f"    Local participant: {room.local_participant.identity}")
-
-        # Monitor for remote participants with video
-        attempt = 0
-        while True:
-            await asyncio.sleep(2)
-            attempt += 1
-
-            remote_participants = room.remote_participants
-
-            if attempt % 5 == 0:
-                print(f"👁️  Vision Agent: Checking participants ({len(remote_participants)} total)")
-                for p in remote_participants.values():
-                    print(f"      - {p.identity}: {len(p.track_publications)} tracks")
-
-            for participant in remote_participants.values():
-                # Skip agent itself
-                if participant.identity == room.local_participant.identity:
-                    continue
-
-                print(f"👁️  Vision Agent: Scanning {participant.identity}...")
-
-                for track_sid, pub in participant.track_publications.items():
-                    if pub.source == rtc.TrackSource.SOURCE_CAMERA:
-                        print(f"      ✅ Camera track found!")
-
-                        await asyncio.sleep(1)  # Wait for subscription
-
-                        if pub.track and not self.vision_task:
-                            video_track = pub.track
-                            print(f"📹 Vision Agent: Got video from {participant.identity}")
-                            print("🎥 Vision Agent: Starting analysis loop...")
-
-                            try:
-                                self.vision_task = asyncio.create_task(
-                                    self._analysis_loop(video_track)
-                                )
-                                print("✅ Vision Agent: Analysis task started!")
-                                return  # Exit monitoring loop once we have video
-                            except Exception as e:
-                                print(f"❌ Vision Agent: Failed to start analysis: {e}")
-                                import traceback
-                                traceback.print_exc()
+
+        self.watcher = CameraTrackWatcher(room, self._on_camera_track, self._on_camera_lost)
+        self.watcher.start()
+
+    def _on_camera_track(self, video_track: rtc.RemoteVideoTrack, participant: rtc.RemoteParticipant, published_at: float):
+        """Start the analysis loop for a newly subscribed camera"""
+        if self.vision_task and not self.vision_task.done():
+            return
+
+        print(f"📹 Vision Agent: Got video from {participant.identity}")
+        self.video_track_sid = video_track.sid
+        self.vision_task = asyncio.create_task(self._analysis_loop(video_track))
+
+    def _on_camera_lost(self, track_sid: str, participant: rtc.RemoteParticipant):
+        """Tear down the analysis loop when its camera goes away"""
+        if track_sid != self.video_track_sid or not self.vision_task:
+            return
+
+        print(f"📴 Vision Agent: Camera from {participant.identity} gone, stopping analysis")
+        self.vision_processor.stop()
+        self.vision_task.cancel()
+        self.vision_task = None
+        self.video_track_sid = None
 
     async def _analysis_loop(self, video_track: rtc.RemoteVideoTrack):
         """Continuous analysis loop with callback"""
-        async def handle_update(analysis: str):
+        async def handle_update(analysis: str, frame=None):
             """Internal callback wrapper"""
             self.latest_analysis = analysis
             self.last_update = time.time()
@@ -104,6 +183,9 @@ class VisionAgent:
 
     async def stop(self):
         """Stop vision processing"""
+        if self.watcher:
+            self.watcher.stop()
+        self.vision_processor.stop()
         if self.vision_task:
             self.vision_task.cancel()
             try:
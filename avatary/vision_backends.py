@@ -0,0 +1,184 @@
+"""
+Vision Backends
+Pluggable image describers used by VisionProcessor
+
+- OpenAIVisionBackend: remote GPT-4o-mini vision (default)
+- LocalVisionBackend: deterministic offline stand-in with configurable latency
+- FallbackVisionBackend: tries a primary backend, falls back when it is slow or fails
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+import logging
+
+from PIL import Image, ImageStat
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VisionDescription:
+    """Result of describing one image"""
+    text: str
+    tokens: int = 0  # Provider tokens billed for this call (0 for local backends)
+    backend: str = ""
+
+
+class VisionBackend(ABC):
+    """Interface for anything that can describe a JPEG frame"""
+
+    name: str = "base"
+    remote: bool = True  # Remote backends go through the vision rate limiter
+
+    @abstractmethod
+    async def describe(self, image_bytes: bytes, prompt: str) -> Optional[VisionDescription]:
+        """Describe a JPEG image - returns None on failure"""
+        raise NotImplementedError
+
+
+class OpenAIVisionBackend(VisionBackend):
+    """GPT-4o-mini vision with detail=low"""
+
+    name = "openai"
+    remote = True
+
+    def __init__(self, model: str = "gpt-4o-mini", max_tokens: int = 50, client=None):
+        # Imported lazily so offline runs don't need the OpenAI client configured
+        from openai import AsyncOpenAI
+
+        self.model = model
+        self.max_tokens = max_tokens
+        self.client = client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    async def describe(self, image_bytes: bytes, prompt: str) -> Optional[VisionDescription]:
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+
+        response = await self.client.chat.completions.create(
+            model=self.model,  # Faster, cheaper mini model - still accurate for vision
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{base64_image}",
+                                "detail": "low"  # Use "low" for faster processing
+                            }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=self.max_tokens  # Very short response - just need basic description for context
+        )
+
+        return VisionDescription(
+            text=response.choices[0].message.content,
+            tokens=response.usage.total_tokens if response.usage else 0,
+            backend=self.name
+        )
+
+
+# Canned descriptions for the local stand-in (same register as the remote prompt: 1 Arabic sentence)
+LOCAL_DESCRIPTIONS = [
+    "شخص يجلس أمام الكاميرا وينظر إليها مباشرة.",
+    "شخص يبتسم ويتحدث أمام الكاميرا.",
+    "شخص يرتدي ملابس رسمية ويجلس في مكتب.",
+    "شخص يجلس في غرفة مضاءة جيداً وينظر إلى الشاشة.",
+]
+LOCAL_DARK_DESCRIPTION = "الصورة مظلمة ولا يظهر الشخص بوضوح."
+LOCAL_EMPTY_DESCRIPTION = "لا يظهر أحد بوضوح أمام الكاميرا."
+
+
+class LocalVisionBackend(VisionBackend):
+    """
+    Deterministic offline describer
+
+    The same image always yields the same description (chosen from the image hash),
+    with simple rules for dark or flat frames. `latency` simulates a remote round
+    trip so the full pipeline can be load-tested without network.
+    """
+
+    name = "local"
+    remote = False
+
+    def __init__(self, latency: float = 0.0, descriptions: Optional[List[str]] = None):
+        self.latency = latency
+        self.descriptions = descriptions or LOCAL_DESCRIPTIONS
+
+    async def describe(self, image_bytes: bytes, prompt: str) -> Optional[VisionDescription]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return VisionDescription(text=self._describe_sync(image_bytes), backend=self.name)
+
+    def _describe_sync(self, image_bytes: bytes) -> str:
+        stat = ImageStat.Stat(Image.open(io.BytesIO(image_bytes)).convert("L"))
+        brightness = stat.mean[0]
+        contrast = stat.stddev[0]
+
+        if brightness < 40:
+            return LOCAL_DARK_DESCRIPTION
+        if contrast < 8:
+            return LOCAL_EMPTY_DESCRIPTION
+
+        index = hashlib.md5(image_bytes).digest()[0] % len(self.descriptions)
+        return self.descriptions[index]
+
+
+class FallbackVisionBackend(VisionBackend):
+    """Use `primary`, but answer from `fallback` when it is slower than `timeout` or fails"""
+
+    name = "fallback"
+
+    def __init__(self, primary: VisionBackend, fallback: VisionBackend, timeout: float = 2.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.remote = primary.remote
+        self.fallback_count = 0
+
+    async def describe(self, image_bytes: bytes, prompt: str) -> Optional[VisionDescription]:
+        try:
+            result = await asyncio.wait_for(self.primary.describe(image_bytes, prompt), self.timeout)
+            if result:
+                return result
+        except asyncio.TimeoutError:
+            logger.warning(f"Vision backend {self.primary.name} slower than {self.timeout}s - using {self.fallback.name}")
+        except Exception as e:
+            logger.warning(f"Vision backend {self.primary.name} failed ({e}) - using {self.fallback.name}")
+
+        self.fallback_count += 1
+        return await self.fallback.describe(image_bytes, prompt)
+
+
+def create_vision_backend(kind: Optional[str] = None) -> VisionBackend:
+    """
+    Build the configured backend
+
+    VISION_BACKEND:
+        openai          - remote only (default)
+        local           - offline stand-in, VISION_LOCAL_LATENCY_MS simulates latency
+        openai+local    - remote with local fallback after VISION_FALLBACK_TIMEOUT seconds
+    """
+    kind = (kind or os.getenv("VISION_BACKEND", "openai")).lower()
+    local_latency = float(os.getenv("VISION_LOCAL_LATENCY_MS", "0")) / 1000
+
+    if kind == "local":
+        return LocalVisionBackend(latency=local_latency)
+    if kind == "openai+local":
+        return FallbackVisionBackend(
+            OpenAIVisionBackend(),
+            LocalVisionBackend(latency=local_latency),
+            timeout=float(os.getenv("VISION_FALLBACK_TIMEOUT", "2.0"))
+        )
+    if kind != "openai":
+        logger.warning(f"Unknown VISION_BACKEND '{kind}' - using openai")
+    return OpenAIVisionBackend()
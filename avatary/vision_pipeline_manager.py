@@ -0,0 +1,218 @@
+"""
+Vision Pipeline Manager
+Runs one capture/recognition pipeline per remote camera track in a room
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+from livekit import rtc
+from vision_processor import VisionProcessor
+from vision_agent import CameraTrackWatcher
+from workflow_analyzer import workflow_analyzer
+
+logger = logging.getLogger(__name__)
+
+# Worker-wide CPU budget for face recognition (InsightFace runs on CPU)
+RECOGNITION_WORKERS = int(os.getenv("VISION_RECOGNITION_WORKERS", "2"))
+
+# Shared by every room handled by this worker process
+recognition_executor = ThreadPoolExecutor(
+    max_workers=RECOGNITION_WORKERS,
+    thread_name_prefix="face-recognition"
+)
+
+
+@dataclass
+class VisionPipeline:
+    """Capture/recognition pipeline for a single camera track"""
+    track_sid: str
+    participant_identity: str
+    processor: VisionProcessor
+    published_at: float
+    task: Optional[asyncio.Task] = None
+    first_attempt_reported: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class VisionPipelineManager:
+    """
+    Starts one vision pipeline per remote camera track
+
+    - Pipelines beyond max_pipelines wait until a slot frees up
+    - Face recognition runs on the shared recognition_executor, so CPU use is
+      bounded per worker no matter how many rooms or cameras there are
+    - Capture cadence slows down as more pipelines share the CPU budget
+    - The focus participant (active speaker, else first camera) is the one whose
+      visual context should be injected into the LLM
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        callback: Callable[[str, Any, VisionPipeline], Awaitable[None]],
+        max_pipelines: int = 4,
+        base_interval: float = 0.8,
+        processor_factory: Callable[[], VisionProcessor] = VisionProcessor,
+    ):
+        """
+        Args:
+            room: Room whose camera tracks should be analysed
+            callback: Called with (analysis, frame, pipeline) for every analysed frame
+            max_pipelines: Maximum number of cameras analysed at once in this room
+            base_interval: Capture interval for a single pipeline (seconds)
+            processor_factory: Creates the VisionProcessor for each pipeline
+        """
+        self.room = room
+        self.callback = callback
+        self.max_pipelines = max_pipelines
+        self.base_interval = base_interval
+        self.processor_factory = processor_factory
+
+        self.pipelines: Dict[str, VisionPipeline] = {}
+        self._waiting: Dict[str, tuple] = {}  # track_sid -> (track, participant, published_at)
+        self.focus_identity: Optional[str] = None
+
+        self.watcher = CameraTrackWatcher(room, self._on_camera_track, self._on_camera_lost)
+
+    def start(self):
+        """Start watching the room for camera tracks"""
+        self.room.on("active_speakers_changed", self._on_active_speakers_changed)
+        self.watcher.start()
+
+    async def stop(self):
+        """Stop all pipelines and unregister room handlers"""
+        self.watcher.stop()
+        self.room.off("active_speakers_changed", self._on_active_speakers_changed)
+        self._waiting.clear()
+
+        tasks = [p.task for p in self.pipelines.values() if p.task]
+        for track_sid in list(self.pipelines):
+            self._stop_pipeline(track_sid)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Pipeline lifecycle
+    # ------------------------------------------------------------------
+
+    def _on_camera_track(self, track: rtc.RemoteVideoTrack, participant: rtc.RemoteParticipant, published_at: float):
+        if len(self.pipelines) >= self.max_pipelines:
+            print(f"⏸️  Vision pipeline limit reached ({self.max_pipelines}) - {participant.identity} queued")
+            self._waiting[track.sid] = (track, participant, published_at)
+            return
+
+        self._start_pipeline(track, participant, published_at)
+
+    def _on_camera_lost(self, track_sid: str, participant: rtc.RemoteParticipant):
+        self._waiting.pop(track_sid, None)
+        if track_sid not in self.pipelines:
+            return
+
+        print(f"📴 Camera from {participant.identity} gone - stopping its vision pipeline")
+        self._stop_pipeline(track_sid)
+
+        # Hand the freed slot to the oldest queued camera
+        if self._waiting:
+            waiting_sid = next(iter(self._waiting))
+            self._start_pipeline(*self._waiting.pop(waiting_sid))
+
+    def _start_pipeline(self, track: rtc.RemoteVideoTrack, participant: rtc.RemoteParticipant, published_at: float):
+        pipeline = VisionPipeline(
+            track_sid=track.sid,
+            participant_identity=participant.identity,
+            processor=self.processor_factory(),
+            published_at=published_at,
+        )
+        self.pipelines[track.sid] = pipeline
+        if self.focus_identity is None:
+            self.focus_identity = participant.identity
+
+        workflow_analyzer.record_step(
+            "Camera Publish → Vision Start",
+            time.monotonic() - published_at,
+            participant=participant.identity
+        )
+
+        async def pipeline_callback(analysis: str, frame=None):
+            await self.callback(analysis, frame, pipeline)
+
+        pipeline.task = asyncio.create_task(
+            pipeline.processor.start_continuous_analysis(track, callback=pipeline_callback)
+        )
+        self._rebalance()
+        print(f"📹 Vision pipeline started for {participant.identity} ({len(self.pipelines)} active)")
+
+    def _stop_pipeline(self, track_sid: str):
+        pipeline = self.pipelines.pop(track_sid, None)
+        if not pipeline:
+            return
+
+        pipeline.processor.stop()
+        if pipeline.task:
+            pipeline.task.cancel()
+
+        if self.focus_identity == pipeline.participant_identity:
+            remaining = self.active_identities()
+            self.focus_identity = remaining[0] if remaining else None
+
+        self._rebalance()
+
+    def _rebalance(self):
+        """Spread the recognition budget across pipelines by slowing the capture cadence"""
+        share = max(1.0, len(self.pipelines) / RECOGNITION_WORKERS)
+        for pipeline in self.pipelines.values():
+            pipeline.processor.analysis_interval = self.base_interval * share
+
+    # ------------------------------------------------------------------
+    # Recognition and focus policy
+    # ------------------------------------------------------------------
+
+    async def recognize(self, pipeline: VisionPipeline, recognize_fn: Callable, frame) -> Any:
+        """Run a blocking recognizer on the shared executor (keeps the event loop free for audio)"""
+        if not pipeline.first_attempt_reported:
+            pipeline.first_attempt_reported = True
+            workflow_analyzer.record_step(
+                "Camera Publish → First Recognition",
+                time.monotonic() - pipeline.published_at,
+                participant=pipeline.participant_identity
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(recognition_executor, recognize_fn, frame)
+
+    def hibernate(
+        self,
+        pipeline: VisionPipeline,
+        reference_box,
+        detect_fn: Callable,
+        on_present: Optional[Callable[[], None]] = None
+    ):
+        """Put a pipeline into heartbeat mode; presence checks also run on the shared executor"""
+        async def presence_check(frame):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(recognition_executor, detect_fn, frame)
+
+        pipeline.processor.hibernate(reference_box, presence_check, on_present)
+
+    def _on_active_speakers_changed(self, speakers: List[rtc.Participant]):
+        """Follow the loudest remote speaker that has a camera pipeline"""
+        active = set(self.active_identities())
+        for speaker in speakers:
+            if speaker.identity in active:
+                if speaker.identity != self.focus_identity:
+                    logger.info(f"🎯 Visual focus → {speaker.identity}")
+                self.focus_identity = speaker.identity
+                return
+
+    def is_focus(self, pipeline: VisionPipeline) -> bool:
+        """Whether this pipeline's context should be injected into the LLM"""
+        return pipeline.participant_identity == self.focus_identity
+
+    def active_identities(self) -> List[str]:
+        return [p.participant_identity for p in self.pipelines.values()]
@@ -1,62 +1,280 @@
 """
 Vision Processor for AI Agent
-Captures and analyzes video frames from user's camera using GPT-4 Vision
+Captures and analyzes video frames from user's camera (GPT-4 Vision or a local backend)
 """
 
 import asyncio
-import base64
 import io
-import os
-from typing import Optional
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
 from PIL import Image
 import numpy as np
-from openai import AsyncOpenAI
+from vision_backends import VisionBackend, create_vision_backend
 from livekit import rtc
+from vision_rate_limiter import SessionVisionBudget, VisionRateLimiter, vision_rate_limiter
 import logging
 
 logger = logging.getLogger(__name__)
 
-class VisionProcessor:
+# OpenAI "detail: low" always sees a 512x512 image - anything bigger is wasted bytes
+LOW_DETAIL_MAX_SIDE = 512
+
+
+def upper_body_box(
+    face_box: Tuple[float, float, float, float],
+    frame_size: Tuple[int, int]
+) -> Tuple[int, int, int, int]:
+    """Expand a face box (x1, y1, x2, y2) to a head-and-shoulders crop clamped to the frame"""
+    x1, y1, x2, y2 = face_box
+    width, height = frame_size
+    face_w = x2 - x1
+    face_h = y2 - y1
+
+    left = max(0, int(x1 - face_w))
+    right = min(width, int(x2 + face_w))
+    top = max(0, int(y1 - face_h * 0.5))
+    bottom = min(height, int(y2 + face_h * 2.5))
+
+    if right - left < 2 or bottom - top < 2:
+        return (0, 0, width, height)
+    return (left, top, right, bottom)
+
+
+def box_iou(a: Sequence[float], b: Sequence[float]) -> float:
+    """Intersection-over-union of two (x1, y1, x2, y2) boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class FrameAdapter:
+    """
+    NumPy views over an RGBA LiveKit frame, reused across captures
+
+    Not zero-copy end to end: the camera's I420 still has to become RGBA (LiveKit
+    does it while delivering the frame, see capture_frame_from_track), and
+    InsightFace needs contiguous RGB, which is one copy into a buffer allocated
+    once per size. Everything else reads the RGBA buffer in place - the strided RGB
+    view, the change signature, and the PIL image the vision JPEG is cropped and
+    downscaled from. What it saves is the extra full-frame copies of the old PIL
+    chain (frombytes, convert("RGB"), the full-size JPEG re-decoded for recognition),
+    i.e. mostly peak memory and some time on larger frames.
+    """
+
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.width = 0
+        self.height = 0
+        self.rgba: Optional[np.ndarray] = None
+        self._frame: Optional[rtc.VideoFrame] = None  # Keeps the buffer behind the views alive
+        self._rgb_buffer: Optional[np.ndarray] = None
+
+    def load(self, frame: rtc.VideoFrame) -> "FrameAdapter":
+        """Point the views at a new frame (converting to RGBA only if the stream didn't)"""
+        if frame.type != rtc.VideoBufferType.RGBA:
+            frame = frame.convert(rtc.VideoBufferType.RGBA)
+
+        self._frame = frame
+        self.width = frame.width
+        self.height = frame.height
+        self.rgba = np.frombuffer(frame.data, dtype=np.uint8).reshape(self.height, self.width, 4)
+        return self
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """Strided RGB view over the RGBA buffer (no copy)"""
+        return self.rgba[..., :3]
+
+    def rgb_contiguous(self) -> np.ndarray:
+        """Contiguous RGB array, copied into a reused buffer"""
+        shape = (self.height, self.width, 3)
+        if self._rgb_buffer is None or self._rgb_buffer.shape != shape:
+            self._rgb_buffer = np.empty(shape, dtype=np.uint8)
+        for channel in range(3):  # Plane by plane - several times faster than one 3-channel strided copy
+            np.copyto(self._rgb_buffer[..., channel], self.rgba[..., channel])
+        return self._rgb_buffer
+
+    def to_image(self) -> Image.Image:
+        """PIL image sharing the RGBA buffer - RGBX encodes straight to JPEG without convert()"""
+        return Image.frombuffer("RGBX", self.size, self.rgba, "raw", "RGBX", 0, 1)
+
+    def signature(self, step: int = 16) -> np.ndarray:
+        """Coarse green-channel grid used for cheap change detection"""
+        return self.rgba[::step, ::step, 1].astype(np.int16)
+
+
+class VisionProcessor:
+    def __init__(
+        self,
+        budget: Optional[SessionVisionBudget] = None,
+        rate_limiter: VisionRateLimiter = vision_rate_limiter,
+        backend: Optional[VisionBackend] = None
+    ):
+        self.backend = backend or create_vision_backend()
         self.last_analysis = None
         self.last_frame_time = 0
         self.analysis_interval = 0.8  # Analyze every 0.8 seconds (much faster for face recognition)
         self.is_running = False
 
-    async def capture_frame_from_track(self, video_track: rtc.RemoteVideoTrack) -> Optional[bytes]:
-        """Capture a single frame from video track"""
-        stream = None
-        try:
-            # Create video stream and get one frame
-            stream = rtc.VideoStream(video_track)
+        # Shared worker limiter + this session's budget; throttling slows the cadence
+        self.budget = budget
+        self.rate_limiter = rate_limiter
+        self.backoff = 1.0  # Multiplier on analysis_interval, doubles while throttled
+        self.max_backoff = 8.0
 
-            async for event in stream:
-                frame = event.frame
+        # Preprocessing for the vision API
+        self.vision_max_side = LOW_DETAIL_MAX_SIDE
+        self.crop_to_face = True
+        self.focus_box: Optional[Tuple[float, float, float, float]] = None  # Last InsightFace box
+
+        # Reusable JPEG output buffer
+        self._vision_buffer = io.BytesIO()
+
+        # Reused frame views and change detection state
+        self._frame_adapter = FrameAdapter()
+        self._last_signature: Optional[np.ndarray] = None
+        self._pending_signature: Optional[np.ndarray] = None
+        self.change_threshold = 6.0  # Mean absolute difference (0-255) that counts as a new scene
+
+        # Hibernation - once identity is settled only a cheap face-presence heartbeat runs
+        self.hibernating = False
+        self.heartbeat_interval = 3.0
+        self.presence_check: Optional[Callable[[np.ndarray], Awaitable[List[Sequence[float]]]]] = None
+        self.on_present: Optional[Callable[[], None]] = None
+        self.reference_box: Optional[Tuple[float, float, float, float]] = None
+        self.min_iou = 0.3  # Face moved further than this -> probably someone else
+        self.wake_after_misses = 2  # Consecutive heartbeats without the face before waking
+        self._misses = 0
+        self.heartbeats = 0
+        self.full_cycles = 0
+
+    def set_focus_box(self, face_box: Optional[Sequence[float]]):
+        """Remember the latest detected face box so the next vision frame is cropped around it"""
+        self.focus_box = tuple(face_box) if face_box else None
 
-                # Convert frame to RGBA buffer using correct API
-                argb_frame = frame.convert(rtc.VideoBufferType.RGBA)
+    @staticmethod
+    def _encode_jpeg(img: Image.Image, buffer: io.BytesIO, quality: int) -> bytes:
+        """Encode image as JPEG into a reused buffer"""
+        buffer.seek(0)
+        buffer.truncate()
+        img.save(buffer, format="JPEG", quality=quality)
+        return buffer.getvalue()
 
-                # Create PIL Image from buffer
-                img = Image.frombytes(
-                    "RGBA",
-                    (frame.width, frame.height),
-                    argb_frame.data
-                )
+    def hibernate(
+        self,
+        reference_box: Sequence[float],
+        presence_check: Callable[[np.ndarray], Awaitable[List[Sequence[float]]]],
+        on_present: Optional[Callable[[], None]] = None
+    ):
+        """
+        Drop to heartbeat mode: only check that the same single face is still there
+
+        Args:
+            reference_box: Face box of the confirmed person
+            presence_check: Async face detector returning (x1, y1, x2, y2, ...) boxes
+            on_present: Called after each heartbeat that still sees the person
+                        (keeps downstream context fresh without a full cycle)
+        """
+        if self.hibernating:
+            return
+
+        self.hibernating = True
+        self.reference_box = tuple(reference_box[:4])
+        self.presence_check = presence_check
+        self.on_present = on_present
+        self._misses = 0
+        logger.info(f"😴 Vision hibernating - heartbeat every {self.heartbeat_interval:.0f}s")
+
+    def wake(self, reason: str = ""):
+        """Resume the full capture/describe/recognize pipeline"""
+        if not self.hibernating:
+            return
+
+        self.hibernating = False
+        self.reference_box = None
+        self._last_signature = None  # Force a fresh description
+        logger.info(f"👀 Vision waking up{f' ({reason})' if reason else ''}")
+
+    async def _heartbeat(self, frame: FrameAdapter) -> Optional[str]:
+        """Cheap presence check - returns a wake reason, or None to stay asleep"""
+        self.heartbeats += 1
+        boxes = await self.presence_check(frame.rgb_contiguous())
+
+        if len(boxes) > 1:
+            return "new person in frame"
+
+        if not boxes or box_iou(boxes[0], self.reference_box) < self.min_iou:
+            self._misses += 1
+            if self._misses >= self.wake_after_misses:
+                return "face left frame" if not boxes else "face changed"
+            return None
+
+        self._misses = 0
+        self.reference_box = tuple(boxes[0][:4])  # Follow small movements
+        if self.on_present:
+            self.on_present()
+        return None
+
+    def frame_changed(self, frame: FrameAdapter) -> bool:
+        """
+        Compare a coarse grid of the frame with the last described one
+
+        Only checks - call mark_described() once the frame was actually described,
+        so a throttled or failed describe call doesn't swallow the scene change.
+        """
+        signature = frame.signature()
+        self._pending_signature = signature
+        previous = self._last_signature
+
+        if previous is None or previous.shape != signature.shape:
+            return True
+        return float(np.abs(signature - previous).mean()) >= self.change_threshold
+
+    def mark_described(self):
+        """The frame last passed to frame_changed() was described - compare later frames with it"""
+        if self._pending_signature is not None:
+            self._last_signature = self._pending_signature
+            self._pending_signature = None
 
-                # Convert to RGB and encode as JPEG
-                rgb_img = img.convert("RGB")
-                buffered = io.BytesIO()
-                rgb_img.save(buffered, format="JPEG", quality=60)  # Lower quality to save memory
+    def prepare_for_vision(self, frame: FrameAdapter) -> bytes:
+        """
+        Crop to the person and downscale to the low-detail target before encoding
 
-                jpeg_bytes = buffered.getvalue()
+        The vision prompt only asks about the person in the centre of the frame and
+        uses detail=low, so the full camera resolution is never seen by the model.
+        The crop is read straight from the shared frame buffer by resize(box=...),
+        so the only new pixels are the small output image.
+        """
+        img = frame.to_image()
+        box = (0, 0, img.width, img.height)
+        if self.crop_to_face and self.focus_box:
+            box = upper_body_box(self.focus_box, img.size)
+        box_width, box_height = box[2] - box[0], box[3] - box[1]
 
-                # Clean up
-                buffered.close()
-                del img, rgb_img, argb_frame
+        scale = self.vision_max_side / max(box_width, box_height)
+        if scale < 1.0:
+            target = (max(1, round(box_width * scale)), max(1, round(box_height * scale)))
+            img = img.resize(target, Image.BILINEAR, box=box, reducing_gap=2.0)
+        elif box != (0, 0, img.width, img.height):
+            img = img.crop(box)  # Already small - copying it is cheap
 
-                # Return after getting first frame
-                return jpeg_bytes
+        return self._encode_jpeg(img, self._vision_buffer, quality=70)
+
+    async def capture_frame_from_track(self, video_track: rtc.RemoteVideoTrack) -> Optional[FrameAdapter]:
+        """Capture a single frame from video track (views are valid until the next capture)"""
+        stream = None
+        try:
+            # Create video stream and get one frame - converted to RGBA by LiveKit, so
+            # the I420 frame isn't copied into Python first and converted again
+            stream = rtc.VideoStream(video_track, format=rtc.VideoBufferType.RGBA)
+
+            async for event in stream:
+                # Wrap the RGBA buffer in reused NumPy views (no PIL round trip)
+                return self._frame_adapter.load(event.frame)
 
         except Exception as e:
             logger.error(f"Failed to capture frame: {e}")
@@ -69,48 +287,45 @@ class VisionProcessor:
                 except:
                     pass
 
+    def _relax_backoff(self):
+        """Halve the throttle backoff (after a describe call, or a cycle that didn't need one)"""
+        self.backoff = max(1.0, self.backoff / 2)
+
     async def analyze_image(self, image_bytes: bytes, context: str = "") -> Optional[str]:
-        """Analyze image using GPT-4 Vision"""
-        try:
-            # Encode image to base64
-            base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        """Describe image with the configured backend (returns None when throttled or on failure)"""
+        # Only remote backends cost API calls
+        limited = self.backend.remote
+        if limited and not self.rate_limiter.try_acquire(self.budget):
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            logger.debug(f"Vision call throttled - cadence x{self.backoff:.0f}")
+            return None
 
+        used_tokens = 0
+        try:
             # Ultra-simplified prompt for faster processing - Just detect person
             prompt = """Describe the main person in center of frame in 1 sentence. Arabic only."""
 
             if context:
                 prompt += f"\n\nAdditional context: {context}"
 
-            # Call GPT-4 Vision API
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Faster, cheaper mini model - still accurate for vision
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "low"  # Use "low" for faster processing
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=50  # Very short response - just need basic description for context
-            )
-
-            analysis = response.choices[0].message.content
+            result = await self.backend.describe(image_bytes, prompt)
+            if not result:
+                return None
+
+            analysis = result.text
             self.last_analysis = analysis
+            used_tokens = result.tokens
+            self._relax_backoff()
 
-            logger.info(f"Vision analysis: {analysis[:100]}...")
+            logger.info(f"Vision analysis ({result.backend}): {analysis[:100]}...")
             return analysis
 
         except Exception as e:
             logger.error(f"Vision analysis failed: {e}")
             return None
+        finally:
+            if limited:
+                self.rate_limiter.release(self.budget, used_tokens)
 
     async def start_continuous_analysis(
         self,
@@ -124,18 +339,41 @@ class VisionProcessor:
         try:
             while self.is_running:
                 # Capture frame
-                frame_bytes = await self.capture_frame_from_track(video_track)
+                frame = await self.capture_frame_from_track(video_track)
+
+                if frame and self.hibernating:
+                    try:
+                        wake_reason = await self._heartbeat(frame)
+                    except Exception as e:
+                        wake_reason = f"heartbeat failed: {e}"
+
+                    if wake_reason:
+                        self.wake(wake_reason)
+                        continue  # Run the full pipeline right away
+
+                    await asyncio.sleep(self.heartbeat_interval)
+                    continue
+
+                if frame:
+                    self.full_cycles += 1
 
-                if frame_bytes:
-                    # Analyze frame
-                    analysis = await self.analyze_image(frame_bytes)
+                    # Describe a small, person-centred copy - only when the scene changed
+                    analysis = None
+                    if self.frame_changed(frame) or not self.last_analysis:
+                        analysis = await self.analyze_image(self.prepare_for_vision(frame))
+                        if analysis:
+                            self.mark_described()
+                    else:
+                        # Static scene - no call needed, so nothing keeps the throttle backoff up
+                        self._relax_backoff()
 
-                    if analysis and callback:
-                        # Pass both analysis and frame_bytes for face recognition
-                        await callback(analysis, frame_bytes)
+                    if callback:
+                        # Recognition is local - keep it running even when the describe call was
+                        # skipped or throttled (falls back to the last description)
+                        await callback(analysis or self.last_analysis or "", frame.rgb_contiguous())
 
-                # Wait before next capture
-                await asyncio.sleep(self.analysis_interval)
+                # Wait before next capture (longer while the vision API is throttled)
+                await asyncio.sleep(self.analysis_interval * self.backoff)
 
         except Exception as e:
             logger.error(f"Vision processing error: {e}")
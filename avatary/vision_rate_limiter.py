@@ -0,0 +1,164 @@
+"""
+Vision API Rate Limiter
+Worker-wide token bucket plus per-session call/token budgets for vision requests
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    @property
+    def level(self) -> float:
+        """Fraction of the bucket currently available (0.0-1.0)"""
+        self._refill()
+        return self.tokens / self.capacity
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available - never waits"""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+@dataclass
+class SessionVisionBudget:
+    """Vision call and token allowance for one session (room)"""
+    session_id: str
+    max_calls: int
+    max_tokens: int
+    calls: int = 0
+    tokens: int = 0
+    denied: int = 0
+    identifying: bool = True  # Still inside the identification window - gets priority
+
+    @property
+    def exhausted(self) -> bool:
+        return self.calls >= self.max_calls or self.tokens >= self.max_tokens
+
+
+class VisionRateLimiter:
+    """
+    Shared limiter for every session handled by this worker
+
+    - A token bucket caps vision calls per minute for the whole worker
+    - At most max_in_flight requests are outstanding at once
+    - The last `priority_reserve` of the bucket is kept for sessions that are still
+      identifying the caller, so greetings are not starved by long-running calls
+    - Denials are not errors: callers skip the call and slow their cadence
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: float = 120,
+        max_in_flight: int = 8,
+        session_max_calls: int = 300,
+        session_max_tokens: int = 100_000,
+        priority_reserve: float = 0.25,
+    ):
+        self.bucket = TokenBucket(rate=calls_per_minute / 60.0, capacity=max(1.0, calls_per_minute / 6.0))
+        self.max_in_flight = max_in_flight
+        self.session_max_calls = session_max_calls
+        self.session_max_tokens = session_max_tokens
+        self.priority_reserve = priority_reserve
+
+        self.in_flight = 0
+        self.sessions: Dict[str, SessionVisionBudget] = {}
+        self.total_calls = 0
+        self.total_tokens = 0
+        self.total_denied = 0
+
+    def register_session(
+        self,
+        session_id: str,
+        max_calls: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> SessionVisionBudget:
+        """Create (or return) the budget for a session"""
+        if session_id not in self.sessions:
+            self.sessions[session_id] = SessionVisionBudget(
+                session_id=session_id,
+                max_calls=max_calls or self.session_max_calls,
+                max_tokens=max_tokens or self.session_max_tokens,
+            )
+        return self.sessions[session_id]
+
+    def release_session(self, session_id: str):
+        """Forget a finished session and log what it used"""
+        budget = self.sessions.pop(session_id, None)
+        if budget:
+            logger.info(
+                f"👁️  Vision budget for {session_id}: {budget.calls} calls, "
+                f"{budget.tokens} tokens, {budget.denied} throttled"
+            )
+
+    def try_acquire(self, budget: Optional[SessionVisionBudget] = None) -> bool:
+        """Reserve one vision call - returns False when the caller should back off"""
+        allowed = (
+            self.in_flight < self.max_in_flight
+            and not (budget and budget.exhausted)
+            and (
+                (budget is not None and budget.identifying)
+                or self.bucket.level > self.priority_reserve
+            )
+            and self.bucket.try_acquire()
+        )
+
+        if not allowed:
+            self.total_denied += 1
+            if budget:
+                budget.denied += 1
+            return False
+
+        self.in_flight += 1
+        if budget:
+            budget.calls += 1
+        self.total_calls += 1
+        return True
+
+    def release(self, budget: Optional[SessionVisionBudget] = None, tokens: int = 0):
+        """Finish a call reserved with try_acquire and account its token usage"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self.total_tokens += tokens
+        if budget:
+            budget.tokens += tokens
+
+    def get_stats(self) -> Dict:
+        """Worker-wide usage summary"""
+        return {
+            "calls": self.total_calls,
+            "tokens": self.total_tokens,
+            "denied": self.total_denied,
+            "in_flight": self.in_flight,
+            "bucket_level": round(self.bucket.level, 2),
+            "sessions": len(self.sessions),
+        }
+
+
+# Global instance shared by all sessions in this worker
+vision_rate_limiter = VisionRateLimiter(
+    calls_per_minute=float(os.getenv("VISION_CALLS_PER_MINUTE", "120")),
+    max_in_flight=int(os.getenv("VISION_MAX_IN_FLIGHT", "8")),
+    session_max_calls=int(os.getenv("VISION_SESSION_MAX_CALLS", "300")),
+    session_max_tokens=int(os.getenv("VISION_SESSION_MAX_TOKENS", "100000")),
+)
@@ -1,36 +1,226 @@
 """
 Visual-Aware Agent
-Custom Agent that injects visual context before each LLM call
+Custom Agent that keeps visual context in a single replaceable slot
 Uses LiveKit Agents 1.0 llm_node pattern
 """
 
 from livekit.agents import Agent, llm
-from typing import AsyncIterable, Any
+from typing import AsyncIterable, Any, Dict, List, Optional, Tuple
 import logging
-from visual_context_models import VisualContextStore
+import time
+from answer_cache import CACHEABLE_TOOLS, AnswerCache
+from chat_history_manager import ChatHistoryManager
+from prompt_cache import StaticPrefixGuard
+from prompt_sections import PROMPT_SECTIONS_ITEM_ID, PromptSectionIndex
+from speculative_llm import Speculation, SpeculativeGenerator
+from visual_context_models import IDENTITY_CHANNEL, VisualContextStore
+from visual_context_templates import render_visual_context
 
 logger = logging.getLogger(__name__)
 
 
+# Fixed id of the single visual context item in the chat context
+VISUAL_CONTEXT_ITEM_ID = "visual_context"
+
+
 class VisualAwareAgent(Agent):
     """
     Custom Agent that injects visual context into chat before LLM processing
 
-    This overrides llm_node to inject visual analysis as a system message
-    before each LLM call, ensuring the avatar always has fresh visual context.
+    The visual context lives in ONE tagged system item that is replaced in place
+    before each LLM call, so only the latest snapshot is ever sent and history
+    never accumulates stale copies.
+
+    The instructions stay byte-identical on every call and all per-turn data goes
+    into the slot after the history, so the provider can cache the prompt prefix
+    (see prompt_cache).
     """
 
-    def __init__(self, instructions: str, visual_store: VisualContextStore):
+    def __init__(
+        self,
+        instructions: str,
+        visual_store: VisualContextStore,
+        section_index: Optional[PromptSectionIndex] = None,
+        history_manager: Optional[ChatHistoryManager] = None,
+        answer_cache: Optional[AnswerCache] = None
+    ):
         """
         Initialize Visual-Aware Agent
 
         Args:
             instructions: Base agent instructions
-            visual_store: Pydantic store containing visual context
+            visual_store: Store containing visual context (one entry per channel)
+            section_index: If given, `instructions` is its always-on core and topic
+                sections are added per turn from the user's latest transcript
+            history_manager: If given, bounds the history sent to the LLM (older
+                turns are folded into a rolling summary)
+            answer_cache: If given, general FAQ questions seen before are answered
+                from it without an LLM call, and new answers are stored in it
         """
         super().__init__(instructions=instructions)
         self.visual_store = visual_store
         self._base_instructions = instructions
+        self.section_index = section_index
+        self.history_manager = history_manager
+        self.answer_cache = answer_cache
+        # Set after construction (it needs the agent): speculative LLM on interim transcripts
+        self.speculation: Optional[SpeculativeGenerator] = None
+        self.prefix_guard = StaticPrefixGuard(instructions)
+
+        # Rendered text of the current snapshot (re-rendered only when the snapshot changes)
+        self._rendered_snapshot = None
+        self._rendered_text = None
+
+        # User message id -> when its first LLM call started (for the answer cache miss latency)
+        self._turn_started: Dict[str, float] = {}
+
+    def _render_visual_context(self, snapshot: tuple) -> str:
+        """Render injection text once per snapshot (all fresh channels on one line)"""
+        if snapshot != self._rendered_snapshot:
+            if len(snapshot) == 1:
+                rendered = snapshot[0].render()
+            else:
+                newest = max(snapshot, key=lambda a: a.created_at)
+                content = " | ".join(a.content for a in snapshot)
+                rendered = render_visual_context(content, newest.time_str)
+            self._rendered_snapshot = snapshot
+            self._rendered_text = rendered.text
+            logger.info(f"👁️  Visual context: {rendered.tokens} tokens per turn ({rendered.variant})")
+        return self._rendered_text
+
+    def _apply_visual_slot(self, chat_ctx: llm.ChatContext) -> bool:
+        """
+        Put the latest visual snapshot into the single visual slot
+
+        The slot sits right before the latest user message. Any older copy is removed;
+        if the slot already holds the same text nothing changes.
+
+        Returns:
+            True if the chat context was modified
+        """
+        current_visual = self.visual_store.get_snapshot()
+        existing_index = chat_ctx.index_by_id(VISUAL_CONTEXT_ITEM_ID)
+        existing = chat_ctx.items.pop(existing_index) if existing_index is not None else None
+
+        if not current_visual:
+            return existing is not None
+
+        visual_text = self._render_visual_context(current_visual)
+        target_index = self._slot_index(chat_ctx)
+
+        if existing is not None and existing.text_content == visual_text:
+            # Unchanged snapshot - keep the same item, only make sure it is in place
+            chat_ctx.items.insert(target_index, existing)
+            return target_index != existing_index
+
+        chat_ctx.items.insert(
+            target_index,
+            llm.ChatMessage(id=VISUAL_CONTEXT_ITEM_ID, role="system", content=[visual_text])
+        )
+        return True
+
+    def _apply_sections_slot(self, chat_ctx: llm.ChatContext, commit: bool = True):
+        """Put the prompt sections selected for the latest user turn right before it"""
+        existing_index = chat_ctx.index_by_id(PROMPT_SECTIONS_ITEM_ID)
+        if existing_index is not None:
+            chat_ctx.items.pop(existing_index)
+
+        target_index = self._slot_index(chat_ctx)
+        if target_index >= len(chat_ctx.items):
+            return  # No user turn (e.g. a system-initiated reply)
+
+        selection = self.section_index.select(chat_ctx.items[target_index].text_content or "", commit=commit)
+        if not selection.sections:
+            return
+
+        logger.debug(f"📚 Prompt sections: {', '.join(selection.tags)} (+{selection.tokens} tokens)")
+        chat_ctx.items.insert(
+            target_index,
+            llm.ChatMessage(id=PROMPT_SECTIONS_ITEM_ID, role="system", content=[selection.text])
+        )
+
+    @staticmethod
+    def _slot_index(chat_ctx: llm.ChatContext) -> int:
+        """Index just before the latest user message (end of context if there is none)"""
+        for index in range(len(chat_ctx.items) - 1, -1, -1):
+            item = chat_ctx.items[index]
+            if item.type == "message" and item.role == "user":
+                return index
+        return len(chat_ctx.items)
+
+    def prepare_chat_ctx(self, chat_ctx: llm.ChatContext, speculative: bool = False):
+        """
+        Fill the per-turn slots (history summary, prompt sections, visual context)
+
+        Args:
+            speculative: Preparing a speculative request - per-turn state is not advanced
+        """
+        self._order_tool_outputs(chat_ctx)
+        if self.history_manager:
+            removed = self.history_manager.apply(chat_ctx, commit=not speculative)
+            if removed:
+                logger.debug(f"🗜️  {removed} history items replaced by summary")
+        if self.section_index:
+            self._apply_sections_slot(chat_ctx, commit=not speculative)
+        if self._apply_visual_slot(chat_ctx):
+            logger.debug("💉 Visual context slot updated")
+        if not speculative:
+            self.prefix_guard.check(chat_ctx)
+
+    @staticmethod
+    def _order_tool_outputs(chat_ctx: llm.ChatContext):
+        """
+        Put the calls and outputs of concurrent tool calls in the order the LLM emitted the calls
+
+        Tools of one turn run concurrently, and LiveKit adds both the
+        function_call and the function_call_output items in completion order.
+        Sorting them by the calls' creation (emission) time keeps the prompt the
+        same whichever tool was faster. Calls stay on call positions and outputs
+        on output positions, so multi-step tool runs keep their shape.
+        """
+        items = chat_ctx.items
+        emitted = {item.call_id: (item.created_at, index) for index, item in enumerate(items)
+                   if item.type == "function_call"}
+
+        def order(item):
+            return emitted.get(item.call_id, (float("inf"), 0))
+
+        start = 0
+        while start < len(items):
+            if items[start].type not in ("function_call", "function_call_output"):
+                start += 1
+                continue
+            end = start
+            while end < len(items) and items[end].type in ("function_call", "function_call_output"):
+                end += 1
+            if end - start > 2:
+                group = items[start:end]
+                for kind in ("function_call", "function_call_output"):
+                    positions = [i for i, item in enumerate(group) if item.type == kind]
+                    ordered = sorted((group[i] for i in positions), key=order)
+                    for i, item in zip(positions, ordered):
+                        items[start + i] = item
+            start = end
+
+    async def _speculative_stream(
+        self,
+        speculation: Speculation,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.FunctionTool],
+        model_settings: Any,
+    ) -> AsyncIterable[llm.ChatChunk]:
+        """Replay a claimed speculation; fall back to a normal request if it failed before any output"""
+        produced = False
+        try:
+            async for chunk in speculation.replay():
+                produced = True
+                yield chunk
+        except Exception as e:
+            if produced:
+                raise
+            logger.warning(f"⚠️  Speculative request failed ({e}) - running the LLM normally")
+            async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+                yield chunk
 
     async def llm_node(
         self,
@@ -44,53 +234,98 @@ class VisualAwareAgent(Agent):
         This is the modern LiveKit Agents 1.0 way to inject context.
         Called before every LLM generation, ensuring fresh context.
         """
+        self.prepare_chat_ctx(chat_ctx)
 
-        # Get current visual analysis
-        current_visual = self.visual_store.get_current()
-
-        if current_visual:
-            # Inject visual context as system message
-            visual_message = current_visual.to_injection_text()
+        question, tools_used = self._current_turn(chat_ctx)
+        new_turn = question is not None and not tools_used
 
-            logger.info(f"💉 Injecting visual context ({current_visual.age_seconds:.1f}s old)")
-            logger.debug(f"   Content: {current_visual.content[:100]}...")
+        if self.answer_cache and new_turn:
+            hit = self.answer_cache.lookup(question.text_content or "")
+            if hit:
+                logger.info(f"⚡ Answer cache hit ({hit.similarity:.2f}): {hit.question[:60]}")
+                if self.speculation:
+                    self.speculation.cancel()
+                yield hit.answer
+                return
 
-            # Add to chat context as system message
-            # This appears BEFORE the user's message, giving the LLM context
-            chat_ctx.add_message(
-                role="system",
-                content=visual_message
-            )
-
-            print(f"✅ Visual context injected into chat (age: {current_visual.age_seconds:.1f}s)")
+        speculation = None
+        if self.speculation and new_turn:
+            speculation = self.speculation.claim(question.text_content or "", chat_ctx)
+        if speculation:
+            stream = self._speculative_stream(speculation, chat_ctx, tools, model_settings)
         else:
-            logger.debug("ℹ️  No fresh visual context available for injection")
+            # Delegate to default LLM processing
+            stream = Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+
+        if not self.answer_cache:
+            async for chunk in stream:
+                yield chunk
+            return
 
-        # Delegate to default LLM processing
-        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+        # Miss: stream from the LLM as usual and remember the answer
+        started = self._turn_started.setdefault(question.id, time.perf_counter()) if question else None
+        answer: List[str] = []
+        calls_tools = False
+        async for chunk in stream:
+            if isinstance(chunk, str):
+                text = chunk
+            else:
+                text = chunk.delta.content if chunk.delta else None
+                calls_tools = calls_tools or bool(chunk.delta and chunk.delta.tool_calls)
+            if text:
+                if not answer and started is not None:
+                    self.answer_cache.record_miss_latency(time.perf_counter() - started)
+                answer.append(text)
             yield chunk
 
-    def update_visual_context(self, analysis: str, confidence: str = None):
+        if question is not None and not calls_tools and tools_used <= CACHEABLE_TOOLS:
+            self.answer_cache.store(question.text_content or "", "".join(answer), self._personal_terms())
+
+    @staticmethod
+    def _current_turn(chat_ctx: llm.ChatContext) -> Tuple[Optional[llm.ChatMessage], set]:
+        """Latest user message and the tools called since it (None if the turn isn't user-initiated)"""
+        tools_used = set()
+        for item in reversed(chat_ctx.items):
+            if item.type == "function_call":
+                tools_used.add(item.name)
+            elif item.type == "message" and item.role == "user":
+                return item, tools_used
+            elif item.type == "message" and item.role == "assistant":
+                return None, tools_used
+        return None, tools_used
+
+    def _personal_terms(self) -> List[str]:
+        """Names that make an answer personal (it must not be served to someone else)"""
+        terms = []
+        identity = self.visual_store.get_current(IDENTITY_CHANNEL)
+        if identity and ":" in identity.content:
+            terms.append(identity.content.split(":", 1)[1].strip())
+        if self.history_manager and self.history_manager.facts.name:
+            terms.append(self.history_manager.facts.name)
+        return terms
+
+    def update_visual_context(self, analysis: str, confidence: str = None, channel: str = IDENTITY_CHANNEL):
         """
         Update visual context (called by vision processor)
 
         Args:
             analysis: Visual analysis text from GPT-4 Vision
             confidence: Optional confidence level
+            channel: Context channel to update (identity/scene/emotion)
         """
-        visual_analysis = self.visual_store.update(analysis, confidence)
+        visual_analysis = self.visual_store.update(analysis, confidence, channel)
 
-        logger.info(f"📸 Visual context updated")
+        logger.info(f"📸 Visual context updated ({channel})")
         logger.debug(f"   Length: {len(analysis)} chars")
-        logger.debug(f"   Time: {visual_analysis.timestamp.strftime('%H:%M:%S')}")
+        logger.debug(f"   Time: {visual_analysis.time_str}")
 
         print(f"👁️  Visual context updated: {analysis[:80]}...")
 
         return visual_analysis
 
-    def clear_visual_context(self):
-        """Clear visual context"""
-        self.visual_store.clear()
+    def clear_visual_context(self, channel: str = None):
+        """Clear visual context (one channel, or all)"""
+        self.visual_store.clear(channel)
         logger.info("🧹 Visual context cleared")
 
     def get_visual_status(self) -> dict:
@@ -103,10 +338,11 @@ class VisualAwareAgent(Agent):
                 "age_seconds": current.age_seconds,
                 "is_fresh": current.is_fresh,
                 "content_length": len(current.content),
-                "timestamp": current.timestamp.isoformat()
+                "timestamp": current.timestamp.isoformat(),
+                "channels": [a.channel for a in self.visual_store.get_snapshot()]
             }
         else:
             return {
                 "has_context": False,
-                "reason": "no_data" if not self.visual_store.latest_analysis else "too_old"
+                "reason": "no_data" if not self.visual_store.has_data() else "too_old"
             }
@@ -1,102 +1,174 @@
 """
-Visual Context Models using Pydantic
-Clean data models for managing visual analysis context
+Visual Context Models
+Lightweight store for visual analysis context, with Pydantic models for API boundaries
+
+The store sits on the per-turn hot path (every llm_node call reads it), so the
+runtime objects are plain __slots__ classes timed with time.monotonic().
+Pydantic models are only built on demand via to_model().
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional
+import time
 from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from visual_context_templates import RenderedVisualContext, render_visual_context
+
+# Context channels, in the order they are rendered for the LLM
+IDENTITY_CHANNEL = "identity"
+SCENE_CHANNEL = "scene"
+EMOTION_CHANNEL = "emotion"
+DEFAULT_CHANNELS = (IDENTITY_CHANNEL, SCENE_CHANNEL, EMOTION_CHANNEL)
+
+
+class VisualAnalysisModel(BaseModel):
+    """Validated snapshot of one visual analysis (API / serialization boundary)"""
 
+    content: str = Field(description="The visual analysis description in Arabic/English")
+    timestamp: datetime = Field(description="When this analysis was created")
+    confidence: Optional[str] = Field(default=None, description="Confidence level (low/medium/high)")
+    channel: str = Field(default=IDENTITY_CHANNEL, description="Context channel (identity/scene/emotion)")
+    age_seconds: float = Field(default=0.0, description="Age when the snapshot was taken")
 
-class VisualAnalysis(BaseModel):
-    """Represents a single visual analysis from GPT-4 Vision"""
 
-    content: str = Field(
-        description="The visual analysis description in Arabic/English"
-    )
-    timestamp: datetime = Field(
-        default_factory=datetime.now,
-        description="When this analysis was created"
-    )
-    confidence: Optional[str] = Field(
-        default=None,
-        description="Confidence level (low/medium/high)"
-    )
+class VisualContextModel(BaseModel):
+    """Validated snapshot of the whole store (API / serialization boundary)"""
+
+    enabled: bool = True
+    max_age_seconds: float = 15.0
+    channels: Dict[str, VisualAnalysisModel] = Field(default_factory=dict)
+
+
+class VisualAnalysis:
+    """A single visual analysis - immutable once created"""
+
+    __slots__ = ("content", "confidence", "channel", "created_at", "wall_time")
+
+    def __init__(self, content: str, confidence: Optional[str] = None, channel: str = IDENTITY_CHANNEL):
+        self.content = content
+        self.confidence = confidence
+        self.channel = channel
+        self.created_at = time.monotonic()  # Age math - immune to wall clock jumps
+        self.wall_time = time.time()  # Only for display
 
     @property
     def age_seconds(self) -> float:
-        """Calculate how old this analysis is in seconds"""
-        return (datetime.now() - self.timestamp).total_seconds()
+        """How old this analysis is in seconds"""
+        return time.monotonic() - self.created_at
 
     @property
     def is_fresh(self) -> bool:
         """Check if analysis is fresh (less than 10 seconds old)"""
         return self.age_seconds < 10
 
-    def to_injection_text(self) -> str:
-        """Format for LLM context injection with focus emphasis"""
-        time_str = self.timestamp.strftime("%H:%M:%S")
-        return f"""
-[SYSTEM - VISUAL CONTEXT]
-وقت التحديث: {time_str} | Updated: {time_str}
-
-أنت تستطيع رؤية المستخدم الآن من خلال الكاميرا!
-YOU CAN NOW SEE THE USER THROUGH THE CAMERA!
-
-👤 المستخدم الحالي (Current User):
-{self.content}
-
-⚠️ ملاحظات مهمة جداً (CRITICAL Notes):
-- هذا الشخص هو من تتحدث معه مباشرة (THIS person is who you are directly talking to)
-- ركز عليه فقط واستجب لما يفعله (Focus ONLY on them and respond to what they're doing)
-- تجاهل أي نشاط أو أشخاص في الخلفية (IGNORE any background activity or other people)
-- استخدم ما تراه في ردك بشكل طبيعي (Use what you see naturally in your response)
-- لا تذكر أشخاص آخرين - فقط المستخدم الحالي (Don't mention others - ONLY current user)
-
-[END VISUAL CONTEXT]
-"""
-
+    @property
+    def timestamp(self) -> datetime:
+        """Wall-clock creation time"""
+        return datetime.fromtimestamp(self.wall_time)
 
-class VisualContextStore(BaseModel):
-    """Thread-safe store for visual context"""
-
-    latest_analysis: Optional[VisualAnalysis] = Field(
-        default=None,
-        description="Most recent visual analysis"
-    )
-    enabled: bool = Field(
-        default=True,
-        description="Whether visual context injection is enabled"
-    )
-    max_age_seconds: float = Field(
-        default=15.0,
-        description="Maximum age for context to be considered valid"
-    )
-
-    def update(self, content: str, confidence: Optional[str] = None) -> VisualAnalysis:
-        """Update with new analysis"""
-        analysis = VisualAnalysis(
-            content=content,
-            confidence=confidence
+    @property
+    def time_str(self) -> str:
+        return time.strftime("%H:%M:%S", time.localtime(self.wall_time))
+
+    def render(self, token_budget: Optional[int] = None) -> RenderedVisualContext:
+        """Render for LLM injection within the token budget (see visual_context_templates)"""
+        return render_visual_context(self.content, self.time_str, token_budget)
+
+    def to_injection_text(self, token_budget: Optional[int] = None) -> str:
+        """Format for LLM context injection"""
+        return self.render(token_budget).text
+
+    def to_model(self) -> VisualAnalysisModel:
+        return VisualAnalysisModel(
+            content=self.content,
+            timestamp=self.timestamp,
+            confidence=self.confidence,
+            channel=self.channel,
+            age_seconds=self.age_seconds
         )
-        self.latest_analysis = analysis
+
+    def __repr__(self) -> str:
+        return f"VisualAnalysis(channel={self.channel!r}, age={self.age_seconds:.1f}s, content={self.content[:40]!r})"
+
+
+class VisualContextStore:
+    """
+    Latest visual analysis per context channel
+
+    Writers replace a channel's entry with a new immutable VisualAnalysis (a single
+    dict assignment), so readers never need a lock and never see a half-written value.
+    """
+
+    __slots__ = ("enabled", "max_age_seconds", "channels", "_latest")
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_age_seconds: float = 15.0,
+        channels: Tuple[str, ...] = DEFAULT_CHANNELS
+    ):
+        """
+        Args:
+            enabled: Whether visual context injection is enabled
+            max_age_seconds: Maximum age for context to be considered valid
+            channels: Known channels, in render order (unknown channels render last)
+        """
+        # Validated once here instead of on every update
+        self.enabled = bool(enabled)
+        self.max_age_seconds = float(max_age_seconds)
+        self.channels = tuple(channels)
+        self._latest: Dict[str, VisualAnalysis] = {}
+
+    def update(self, content: str, confidence: Optional[str] = None, channel: str = IDENTITY_CHANNEL) -> VisualAnalysis:
+        """Replace the analysis for a channel"""
+        analysis = VisualAnalysis(content, confidence, channel)
+        self._latest[channel] = analysis
         return analysis
 
-    def get_current(self) -> Optional[VisualAnalysis]:
-        """Get current analysis if fresh enough"""
-        if not self.enabled or not self.latest_analysis:
+    def get_current(self, channel: str = IDENTITY_CHANNEL) -> Optional[VisualAnalysis]:
+        """Get a channel's analysis if fresh enough"""
+        if not self.enabled:
             return None
 
-        if self.latest_analysis.age_seconds > self.max_age_seconds:
+        analysis = self._latest.get(channel)
+        if analysis is None or time.monotonic() - analysis.created_at > self.max_age_seconds:
             return None
 
-        return self.latest_analysis
+        return analysis
+
+    def get_snapshot(self) -> Tuple[VisualAnalysis, ...]:
+        """Fresh analyses across all channels, in render order"""
+        if not self.enabled or not self._latest:
+            return ()
 
-    def clear(self):
-        """Clear current analysis"""
-        self.latest_analysis = None
+        cutoff = time.monotonic() - self.max_age_seconds
+        latest = self._latest  # Writers swap entries, never mutate them - safe to read without a lock
+        ordered = [latest[name] for name in self.channels if name in latest]
+        if len(ordered) != len(latest):
+            ordered.extend(a for name, a in list(latest.items()) if name not in self.channels)
+        return tuple(a for a in ordered if a.created_at >= cutoff)
+
+    @property
+    def latest_analysis(self) -> Optional[VisualAnalysis]:
+        """Identity channel analysis regardless of age"""
+        return self._latest.get(IDENTITY_CHANNEL)
+
+    def has_data(self) -> bool:
+        return bool(self._latest)
+
+    def clear(self, channel: Optional[str] = None):
+        """Clear one channel, or all of them"""
+        if channel is None:
+            self._latest = {}
+        else:
+            self._latest.pop(channel, None)
+
+    def to_model(self) -> VisualContextModel:
+        return VisualContextModel(
+            enabled=self.enabled,
+            max_age_seconds=self.max_age_seconds,
+            channels={name: analysis.to_model() for name, analysis in self._latest.items()}
+        )
 
-    class Config:
-        """Pydantic config"""
-        validate_assignment = True
-        arbitrary_types_allowed = True
+    def __repr__(self) -> str:
+        return f"VisualContextStore(enabled={self.enabled}, max_age_seconds={self.max_age_seconds}, channels={list(self._latest)})"
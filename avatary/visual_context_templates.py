@@ -0,0 +1,75 @@
+"""
+Visual Context Templates
+Renders visual context for LLM injection within a per-deployment token budget
+
+The standing rules about how to use visual context live in the system prompt
+(prompts.py, Section 7); these templates only carry the per-turn data.
+"""
+
+import os
+from dataclasses import dataclass
+import logging
+
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# One line: identity + description
+COMPACT_TEMPLATE = "[VISUAL {time}] {content}"
+
+# Original bilingual block, kept for deployments with a generous budget
+VERBOSE_TEMPLATE = """
+[SYSTEM - VISUAL CONTEXT]
+وقت التحديث: {time} | Updated: {time}
+
+أنت تستطيع رؤية المستخدم الآن من خلال الكاميرا!
+YOU CAN NOW SEE THE USER THROUGH THE CAMERA!
+
+👤 المستخدم الحالي (Current User):
+{content}
+
+⚠️ ملاحظات مهمة جداً (CRITICAL Notes):
+- هذا الشخص هو من تتحدث معه مباشرة (THIS person is who you are directly talking to)
+- ركز عليه فقط واستجب لما يفعله (Focus ONLY on them and respond to what they're doing)
+- تجاهل أي نشاط أو أشخاص في الخلفية (IGNORE any background activity or other people)
+- استخدم ما تراه في ردك بشكل طبيعي (Use what you see naturally in your response)
+- لا تذكر أشخاص آخرين - فقط المستخدم الحالي (Don't mention others - ONLY current user)
+
+[END VISUAL CONTEXT]
+"""
+
+# Tokens per turn that visual injection may cost (VISUAL_CONTEXT_TOKEN_BUDGET)
+DEFAULT_TOKEN_BUDGET = int(os.getenv("VISUAL_CONTEXT_TOKEN_BUDGET", "60"))
+
+
+@dataclass
+class RenderedVisualContext:
+    """Injection text plus what it costs"""
+    text: str
+    variant: str
+    tokens: int
+
+
+def render_visual_context(content: str, time_str: str, token_budget: int = None) -> RenderedVisualContext:
+    """
+    Pick the richest template that fits the token budget
+
+    verbose -> compact -> compact with the description truncated to fit
+    """
+    budget = DEFAULT_TOKEN_BUDGET if token_budget is None else token_budget
+    content = " ".join(content.split())  # Collapse newlines - the compact form is one line
+
+    verbose = VERBOSE_TEMPLATE.format(time=time_str, content=content)
+    verbose_tokens = count_tokens(verbose)
+    if verbose_tokens <= budget:
+        return RenderedVisualContext(verbose, "verbose", verbose_tokens)
+
+    compact = COMPACT_TEMPLATE.format(time=time_str, content=content)
+    compact_tokens = count_tokens(compact)
+    if compact_tokens <= budget:
+        return RenderedVisualContext(compact, "compact", compact_tokens)
+
+    # Over budget even in compact form - trim the description proportionally
+    keep = max(1, int(len(content) * budget / compact_tokens) - 1)
+    truncated = COMPACT_TEMPLATE.format(time=time_str, content=content[:keep].rstrip() + "…")
+    return RenderedVisualContext(truncated, "compact-truncated", count_tokens(truncated))
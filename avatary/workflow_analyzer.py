@@ -1,12 +1,14 @@
 """
 Workflow Performance Analyzer
-Tracks timing and memory usage of each step in the avatar workflow
+Tracks timing and memory usage of each step in the avatar workflow,
+and the per-turn latency breakdown of the conversational loop
 """
 
 import time
 import psutil
 import os
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import logging
@@ -49,6 +51,148 @@ class StepMetrics:
         return f"{status} {self.name}: {duration_str} {memory_str}"
 
 
+# Per-turn latency components, in pipeline order (seconds)
+TURN_COMPONENTS = {
+    "eou": "VAD end of speech -> end of turn",
+    "stt": "VAD end of speech -> final transcript",
+    "llm_ttft": "LLM first token",
+    "tools": "Tool calls",
+    "tts_ttfb": "TTS first audio byte",
+    "e2e": "End of speech -> playout start",
+}
+
+
+class LatencyHistogram:
+    """Latency samples (bounded) with percentiles"""
+
+    def __init__(self, max_samples: int = 2000):
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+@dataclass
+class TurnLatency:
+    """Latency breakdown of one user turn -> agent reply"""
+    user_end_time: float  # Wall time the user stopped speaking (VAD)
+    eou: Optional[float] = None
+    stt: Optional[float] = None
+    llm_ttft: Optional[float] = None
+    tools: float = 0.0
+    tool_calls: int = 0
+    llm_calls: int = 0
+    tts_ttfb: Optional[float] = None
+    e2e: Optional[float] = None
+    _last_llm_end: Optional[float] = None
+
+    def components(self) -> Dict[str, float]:
+        values = {name: getattr(self, name) for name in TURN_COMPONENTS}
+        if not self.tool_calls:
+            values.pop("tools")
+        return {name: value for name, value in values.items() if value is not None}
+
+    def __str__(self):
+        parts = [f"{name} {value * 1000:.0f}ms" for name, value in self.components().items()]
+        return f"⏱️  Turn: {', '.join(parts)}" + (f" ({self.tool_calls} tool calls)" if self.tool_calls else "")
+
+
+def _print_histograms(title: str, histograms: Dict[str, LatencyHistogram]):
+    print(f"\n{title}")
+    print(f"   {'component':10s} {'n':>5s} {'p50':>8s} {'p95':>8s}")
+    for name, label in TURN_COMPONENTS.items():
+        histogram = histograms.get(name)
+        if histogram:
+            print(
+                f"   {name:10s} {len(histogram):5d} {histogram.percentile(50) * 1000:6.0f}ms "
+                f"{histogram.percentile(95) * 1000:6.0f}ms  {label}"
+            )
+
+
+class TurnLatencyTracker:
+    """
+    Per-session conversational latency, built from AgentSession metrics and events
+
+    Feed it metrics_collected, agent_state_changed and function_tools_executed
+    events; each finished turn goes into this session's histograms and the
+    worker-wide ones on the WorkflowAnalyzer.
+    """
+
+    def __init__(self, analyzer: "WorkflowAnalyzer"):
+        self.analyzer = analyzer
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.turns = 0
+        self._current: Optional[TurnLatency] = None
+
+    def on_metrics(self, m):
+        """Handle an AgentMetrics object (EOU, LLM and TTS metrics are used)"""
+        kind = getattr(m, "type", None)
+        if kind == "eou_metrics":
+            self._finish_turn()
+            self._current = TurnLatency(
+                user_end_time=m.timestamp - m.end_of_utterance_delay,
+                eou=m.end_of_utterance_delay,
+                stt=m.transcription_delay,
+            )
+        elif self._current is None or getattr(m, "cancelled", False):
+            return
+        elif kind == "llm_metrics":
+            turn = self._current
+            start = m.timestamp - m.duration
+            if turn.llm_calls == 0:
+                turn.llm_ttft = m.ttft
+            elif turn._last_llm_end is not None:
+                turn.tools += max(0.0, start - turn._last_llm_end)  # Gap between LLM steps = tool execution
+            turn._last_llm_end = m.timestamp
+            turn.llm_calls += 1
+        elif kind == "tts_metrics" and self._current.tts_ttfb is None:
+            self._current.tts_ttfb = m.ttfb
+
+    def on_agent_state(self, new_state: str, created_at: float):
+        """Playout start = first switch to 'speaking' after the user's turn"""
+        if new_state == "speaking" and self._current and self._current.e2e is None:
+            self._current.e2e = max(0.0, created_at - self._current.user_end_time)
+
+    def on_tools_executed(self, count: int):
+        if self._current:
+            self._current.tool_calls += count
+
+    def _finish_turn(self):
+        turn, self._current = self._current, None
+        if turn is None or turn.e2e is None:
+            return  # The user spoke again before the agent answered
+
+        for name, value in turn.components().items():
+            self.histograms.setdefault(name, LatencyHistogram()).add(value)
+        self.analyzer.record_turn(turn)
+        self.turns += 1
+        logger.info(str(turn))
+
+    def flush(self):
+        """Record the last turn (call at session end)"""
+        self._finish_turn()
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {"count": len(h), "p50": h.percentile(50), "p95": h.percentile(95)}
+            for name, h in self.histograms.items()
+        }
+
+    def print_report(self):
+        self.flush()
+        if self.turns:
+            _print_histograms(f"⏱️  TURN LATENCY - this session ({self.turns} turns)", self.histograms)
+
+
 class WorkflowAnalyzer:
     """
     Tracks workflow performance and identifies bottlenecks
@@ -60,6 +204,10 @@ class WorkflowAnalyzer:
         self.workflow_start_time = time.time()
         self.process = psutil.Process(os.getpid())
 
+        # Conversational loop latency across every session in this worker
+        self.turn_histograms: Dict[str, LatencyHistogram] = {}
+        self.turns = 0
+
     def start_step(self, name: str) -> StepMetrics:
         """Start tracking a new step"""
         # Complete previous step if not completed
@@ -88,6 +236,40 @@ class WorkflowAnalyzer:
             logger.info(str(self.current_step))
             self.current_step = None
 
+    def record_step(
+        self, name: str, duration: float, success: bool = True, error: Optional[str] = None, **metadata
+    ) -> StepMetrics:
+        """Record a step measured elsewhere (spans that overlap the current step)"""
+        end_time = time.time()
+        step = StepMetrics(
+            name=name,
+            start_time=end_time - duration,
+            end_time=end_time,
+            duration=duration,
+            success=success,
+            error=error,
+            metadata=metadata
+        )
+        self.steps.append(step)
+
+        logger.info(str(step))
+        return step
+
+    def track_turns(self) -> TurnLatencyTracker:
+        """Per-turn latency tracker for a new session"""
+        return TurnLatencyTracker(self)
+
+    def record_turn(self, turn: TurnLatency):
+        """Add a finished turn to the worker-wide histograms"""
+        for name, value in turn.components().items():
+            self.turn_histograms.setdefault(name, LatencyHistogram()).add(value)
+        self.turns += 1
+
+    def print_turn_report(self):
+        """Print p50/p95 per latency component across all sessions"""
+        if self.turns:
+            _print_histograms(f"⏱️  TURN LATENCY - this worker ({self.turns} turns)", self.turn_histograms)
+
     def get_summary(self) -> Dict:
         """Get workflow performance summary"""
         total_duration = time.time() - self.workflow_start_time
@@ -127,7 +309,11 @@ class WorkflowAnalyzer:
                     "memory_delta": s.memory_delta
                 }
                 for s in memory_hogs
-            ]
+            ],
+            "turn_latency": {
+                name: {"count": len(h), "p50": h.percentile(50), "p95": h.percentile(95)}
+                for name, h in self.turn_histograms.items()
+            }
         }
 
     def print_report(self):